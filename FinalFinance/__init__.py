@@ -1,16 +1,23 @@
 from flask import Flask
 from flask_login import LoginManager
 from flask_migrate import Migrate
-from dotenv import load_dotenv
 from typing import Optional
 import os
 import uuid
 
 from .routes import routes
+from .api import api
 from .config import get_config
 from .database import init_db, db
-from .models import User, AdminUser, FundData, Submission, FundHoldings, AddFundToFavorites
+from .models import User, AdminUser, FundData, Submission, FundHoldings, FundSummary, SecurityFlow, \
+    AddFundToFavorites
 from .admin import init_admin
+from .watcher import watch_filings_command
+from .partitions import archive_holdings_command
+from .summaries import rebuild_fund_summaries_command
+from .flows import rebuild_security_flows_command
+from .instrumentation import init_instrumentation
+from .cache import init_cache
 
 import logging
 import logging.config
@@ -20,9 +27,6 @@ def create_app(config_name=None) -> Flask:
     """
     Create and configure an instance of the Flask application.
     """
-    # Load environment variables from a .env file
-    load_dotenv()
-
     # Print the FLASK_ENV variable to verify its value
     print("FLASK_ENV:", os.getenv('FLASK_ENV'))
 
@@ -44,6 +48,8 @@ def create_app(config_name=None) -> Flask:
     logger.info(f"Application started in {app.config['ENV']} mode")
 
     init_db(app)
+    init_instrumentation(app)
+    init_cache(app)
 
     migrate = Migrate(app, db)
 
@@ -63,7 +69,12 @@ def create_app(config_name=None) -> Flask:
         return AdminUser.query.get(uid)
 
     app.register_blueprint(routes)
+    app.register_blueprint(api)
     init_admin(app)
+    app.cli.add_command(watch_filings_command)
+    app.cli.add_command(archive_holdings_command)
+    app.cli.add_command(rebuild_fund_summaries_command)
+    app.cli.add_command(rebuild_security_flows_command)
     app.config['ADMIN_PIN'] = os.getenv('ADMIN_PIN')
 
     logger.info('Application started')
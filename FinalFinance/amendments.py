@@ -0,0 +1,333 @@
+import re
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .frames import category_codes, compact_holdings_frame, read_submission_holdings
+from .lazy import LazyImport
+from .models import Submission
+
+pd = LazyImport('pandas')
+
+# Amendment types of the cover page of a 13F-HR/A. A restatement replaces the holdings of the period, a new
+# holdings amendment adds positions that were left out of the original report.
+RESTATEMENT = 'RESTATEMENT'
+NEW_HOLDINGS = 'NEW HOLDINGS'
+
+AMENDMENT_TYPE_PATTERN = re.compile(r'<(?:\w+:)?amendmentType>\s*([^<]+?)\s*<', re.IGNORECASE)
+
+# A position as ingestion identifies it: company name, CUSIP and put/call flag
+PositionKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+# Value in USD and share amount of a position
+Amounts = Tuple[float, float]
+
+
+def is_amendment(submission_type: Optional[str]) -> bool:
+    """
+    Tell whether a submission type is an amendment, e.g. '13F-HR/A' or 'NPORT-P/A'.
+    """
+    return bool(submission_type) and submission_type.endswith('/A')
+
+
+def parse_amendment_type(submission_type: Optional[str], data: str) -> Optional[str]:
+    """
+    Read the amendment type of a filing.
+
+    Args:
+        submission_type (Optional[str]): The conformed submission type of the filing.
+        data (str): The complete submission text.
+
+    Returns:
+        Optional[str]: RESTATEMENT or NEW_HOLDINGS for amendments, None for original filings. N-PORT amendments
+            and 13F-HR/A without an amendment type restate the whole report.
+    """
+    if not is_amendment(submission_type):
+        return None
+    match = AMENDMENT_TYPE_PATTERN.search(data)
+    if match and match.group(1).upper() == NEW_HOLDINGS:
+        return NEW_HOLDINGS
+    return RESTATEMENT
+
+
+def filing_order(submission: Submission) -> Tuple[date, str]:
+    """
+    Sort key of the submissions of a period: amendments apply in the order they were filed.
+    """
+    return submission.filed_of_date or date.min, submission.accession_number
+
+
+def is_stored_in_full(submission: Submission) -> bool:
+    """
+    Tell whether a submission's stored holdings are its complete portfolio rather than changes to the
+    holdings in effect before it.
+    """
+    return submission.amendment_type != NEW_HOLDINGS and submission.base_accession_number is None
+
+
+def get_base_form(submission_type: Optional[str]) -> str:
+    """
+    Get the form type a submission type amends, e.g. 'NPORT-P' for 'NPORT-P/A' and for 'NPORT-P'.
+    """
+    submission_type = submission_type or ''
+    return submission_type[:-len('/A')] if is_amendment(submission_type) else submission_type
+
+
+def find_amended_chain(chains: List[List[Submission]], submission_type: Optional[str],
+                       base_accession_number: Optional[str] = None) -> Optional[List[Submission]]:
+    """
+    Find the chain an amendment belongs to among the chains of its period.
+
+    Args:
+        chains (List[List[Submission]]): The chains of the period, in the filing order of their originals.
+        submission_type (Optional[str]): The submission type of the amendment.
+        base_accession_number (Optional[str]): The accession number of the submission the amendment was
+            stored against, if known.
+
+    Returns:
+        Optional[List[Submission]]: The chain holding the base submission, otherwise the latest chain of the
+            same form type, or None if the amendment has no original in `chains`.
+    """
+    if base_accession_number:
+        for chain in chains:
+            if any(submission.accession_number == base_accession_number for submission in chain):
+                return chain
+    base_form = get_base_form(submission_type)
+    return next((chain for chain in reversed(chains) if get_base_form(chain[0].submission_type) == base_form), None)
+
+
+def get_filing_chains(submissions: Iterable[Submission]) -> List[List[Submission]]:
+    """
+    Get the submissions the effective holdings of every filing are built from.
+
+    Every original filing starts a chain of its own: funds of a trust file one N-PORT per series for the same
+    period. Amendments are added to the chain of the original they amend, found by the submission they were
+    stored against or by their form type. A chain starts with its latest submission stored in full, which
+    replaces everything filed before it, followed by the amendments filed after it, in filing order. The last
+    submission of a chain identifies the effective holdings of the filing.
+
+    Args:
+        submissions (Iterable[Submission]): Submissions of one fund.
+
+    Returns:
+        List[List[Submission]]: The chains, grouped by period, each period's in the filing order of their
+            originals.
+    """
+    by_period = defaultdict(list)
+    for submission in submissions:
+        by_period[submission.period_of_portfolio].append(submission)
+
+    chains = []
+    for period_submissions in by_period.values():
+        period_chains = []
+        for submission in sorted(period_submissions, key=filing_order):
+            chain = None
+            if is_amendment(submission.submission_type):
+                chain = find_amended_chain(period_chains, submission.submission_type,
+                                           submission.base_accession_number)
+            if chain is None:
+                period_chains.append([submission])
+            else:
+                chain.append(submission)
+        for chain in period_chains:
+            start = max((index for index, submission in enumerate(chain) if is_stored_in_full(submission)),
+                        default=0)
+            chains.append(chain[start:])
+    return chains
+
+
+def get_effective_submissions(submissions: List[Submission]) -> List[Submission]:
+    """
+    Get the submissions that identify the effective holdings of every filing, keeping the order of
+    `submissions`.
+    """
+    effective = {id(chain[-1]) for chain in get_filing_chains(submissions)}
+    return [submission for submission in submissions if id(submission) in effective]
+
+
+def get_effective_periods(submissions: Iterable[Submission]) -> Dict[str, List[Submission]]:
+    """
+    Get the submissions that identify the effective holdings of every period, one per original filing of the
+    period, in filing order.
+    """
+    periods = defaultdict(list)
+    for chain in get_filing_chains(submissions):
+        periods[chain[-1].period_of_portfolio].append(chain[-1])
+    return {period: sorted(period_submissions, key=filing_order) for period, period_submissions in periods.items()}
+
+
+def resolve_effective_holdings(holdings_df: 'pd.DataFrame', submissions: List[Submission]) -> 'pd.DataFrame':
+    """
+    Fold the stored holdings of amended periods into their effective holdings.
+
+    Within a chain (see `get_filing_chains`), a position takes the amounts of the latest submission that sets it
+    (a submission stored in full or a restatement) plus those of later new holdings amendments. Positions whose
+    amounts end at zero, as restatements store closed positions, are dropped. Rows of the resolved periods are
+    labeled with the accession number of the last submission of the chain; rows of superseded submissions are
+    left out. Filings without amendments are returned as they are.
+
+    Args:
+        holdings_df (pd.DataFrame): Holdings of `submissions`, as read by `read_submission_holdings`.
+        submissions (List[Submission]): The submissions of one fund.
+
+    Returns:
+        pd.DataFrame: The effective holdings, in the order and representation of `read_holdings_frame`.
+    """
+    chains = get_filing_chains(submissions)
+    if all(len(chain) == 1 for chain in chains) and len(chains) == len(submissions):
+        return holdings_df
+
+    holdings_df = compact_holdings_frame(holdings_df)
+    # Chain, position in the chain and whether the submission adds to the positions, per accession number
+    links = {submission.accession_number: (chain_index, sequence, submission.amendment_type == NEW_HOLDINGS)
+             for chain_index, chain in enumerate(chains) for sequence, submission in enumerate(chain)}
+    accession_codes, accession_numbers = category_codes(holdings_df['Accession Number'])
+    link_rows = np.array([links.get(accession_number, (-1, 0, False)) for accession_number in accession_numbers]
+                         + [(-1, 0, False)], dtype=np.int64)
+    chain_of_row, sequence, adds = (link_rows[accession_codes, column] for column in range(3))
+    amended = np.array([len(chain) > 1 for chain in chains] + [False])[chain_of_row]
+    kept_rows = np.flatnonzero((chain_of_row >= 0) & ~amended)
+    amended_rows = np.flatnonzero(amended)
+
+    # One group per chain and position
+    keys = np.zeros(len(holdings_df), dtype=np.int64)
+    for column in ('Company Name', 'CUSIP', 'Put/Call'):
+        codes, values = category_codes(holdings_df[column])
+        keys = keys * (len(values) + 1) + codes + 1
+    groups, uniques = pd.factorize(keys[amended_rows] * len(chains) + chain_of_row[amended_rows])
+    group_count = len(uniques)
+    row_sequence = sequence[amended_rows]
+    row_adds = adds[amended_rows].astype(bool)
+
+    last_set = np.full(group_count, -1, dtype=np.int64)
+    np.maximum.at(last_set, groups[~row_adds], row_sequence[~row_adds])
+    contributes = np.where(row_adds, row_sequence > last_set[groups], row_sequence == last_set[groups])
+    rows, groups = amended_rows[contributes], groups[contributes]
+
+    values = np.bincount(groups, weights=holdings_df['Value (USD)'].to_numpy(dtype=float)[rows],
+                         minlength=group_count)
+    share_amounts = np.bincount(groups, weights=holdings_df['Share Amount'].to_numpy(dtype=float)[rows],
+                                minlength=group_count)
+    # Every position keeps one of its contributing rows for its name, CUSIP and put/call flag
+    describing_rows = np.zeros(group_count, dtype=np.int64)
+    describing_rows[groups] = rows
+    held = (values != 0) | (share_amounts != 0)
+
+    effective_accession_numbers = [chain[-1].accession_number for chain in chains]
+    accession_column = holdings_df['Accession Number']
+    missing = sorted(set(effective_accession_numbers) - set(accession_column.cat.categories))
+    if missing:
+        accession_column = accession_column.cat.add_categories(missing)
+        accession_column = accession_column.cat.reorder_categories(sorted(accession_column.cat.categories))
+    frame = holdings_df.assign(**{'Accession Number': accession_column})
+
+    resolved_df = frame.iloc[describing_rows[held]].copy()
+    resolved_df['Value (USD)'] = values[held]
+    resolved_df['Share Amount'] = share_amounts[held]
+    resolved_df['Accession Number'] = pd.Categorical(
+        [effective_accession_numbers[chain] for chain in chain_of_row[describing_rows[held]]],
+        categories=accession_column.cat.categories)
+
+    effective_df = pd.concat([frame.iloc[kept_rows], resolved_df], ignore_index=True)
+    order = np.lexsort((-effective_df['Accession Number'].cat.codes.to_numpy(),
+                        effective_df['Company Name'].cat.codes.to_numpy()))
+    return effective_df.iloc[order].reset_index(drop=True)
+
+
+def read_effective_positions(submissions: List[Submission]) -> Dict[PositionKey, Amounts]:
+    """
+    Read the effective positions of one filing from the submissions of its chain.
+
+    Returns:
+        Dict[PositionKey, Amounts]: The value in USD and share amount of every held position.
+    """
+    if not submissions:
+        return {}
+    holdings_df = resolve_effective_holdings(read_submission_holdings(submissions), submissions)
+    positions = {}
+    for company_name, cusip, put_call, value, share_amount in zip(
+            holdings_df['Company Name'], holdings_df['CUSIP'], holdings_df['Put/Call'],
+            holdings_df['Value (USD)'], holdings_df['Share Amount']):
+        key = tuple(None if pd.isna(part) else part for part in (company_name, cusip, put_call))
+        previous_value, previous_share_amount = positions.get(key, (0.0, 0.0))
+        positions[key] = (previous_value + value, previous_share_amount + share_amount)
+    return positions
+
+
+def read_positions_after(submission: Submission) -> Dict[PositionKey, Amounts]:
+    """
+    Read the effective positions of a submission's filing as of the submission: the amendments filed after it
+    are left out.
+    """
+    order = filing_order(submission)
+    filed = [period_submission for period_submission in Submission.query.filter_by(
+        cik=submission.cik, period_of_portfolio=submission.period_of_portfolio)
+        if filing_order(period_submission) <= order]
+    chain = next((chain for chain in get_filing_chains(filed)
+                  if chain[-1].accession_number == submission.accession_number), [])
+    return read_effective_positions(chain)
+
+
+def apply_amendment(positions: Dict[PositionKey, Amounts], rows: Dict[PositionKey, Amounts],
+                    amendment_type: Optional[str]) -> Dict[PositionKey, Amounts]:
+    """
+    Apply the stored rows of a submission to the positions in effect before it.
+
+    Args:
+        positions (Dict[PositionKey, Amounts]): The positions in effect before the submission.
+        rows (Dict[PositionKey, Amounts]): The stored amounts of the submission per position.
+        amendment_type (Optional[str]): NEW_HOLDINGS adds the rows to the positions, any other type sets them.
+
+    Returns:
+        Dict[PositionKey, Amounts]: The positions in effect after the submission, without closed ones.
+    """
+    effective = dict(positions)
+    for key, (value, share_amount) in rows.items():
+        if amendment_type == NEW_HOLDINGS:
+            previous_value, previous_share_amount = effective.get(key, (0.0, 0.0))
+            value, share_amount = previous_value + value, previous_share_amount + share_amount
+        effective[key] = (value, share_amount)
+    return {key: amounts for key, amounts in effective.items() if amounts != (0.0, 0.0)}
+
+
+def compute_restatement_delta(positions: Dict[PositionKey, Amounts],
+                              restated: Dict[PositionKey, Amounts]) -> Dict[PositionKey, Amounts]:
+    """
+    Get the rows a restatement stores: the positions it adds or changes, and zero amounts for the positions it
+    no longer reports. Applying them to `positions` gives `restated`.
+    """
+    delta = {key: amounts for key, amounts in restated.items() if positions.get(key) != amounts}
+    delta.update({key: (0.0, 0.0) for key in positions.keys() - restated.keys()})
+    return delta
+
+
+def get_amendment_baseline(cik: str, period_of_portfolio: str, filed_of_date: Optional[date],
+                           accession_number: str, submission_type: Optional[str]) \
+        -> Tuple[Optional[str], Dict[PositionKey, Amounts]]:
+    """
+    Get the holdings an amendment changes: the effective positions of the filing it amends, from the
+    submissions filed before it.
+
+    Args:
+        cik (str): The CIK of the fund.
+        period_of_portfolio (str): The reporting period of the amendment.
+        filed_of_date (Optional[date]): The filing date of the amendment.
+        accession_number (str): The accession number of the amendment.
+        submission_type (Optional[str]): The submission type of the amendment, e.g. 'NPORT-P/A'.
+
+    Returns:
+        Tuple[Optional[str], Dict[PositionKey, Amounts]]: The accession number of the submission the positions
+            are in effect after, and the positions. (None, {}) if the amended filing is not stored yet, in which
+            case the amendment is stored in full.
+    """
+    amendment_order = (filed_of_date or date.min, accession_number)
+    period_submissions = Submission.query.filter_by(cik=cik, period_of_portfolio=period_of_portfolio).all()
+    earlier = [submission for submission in period_submissions
+               if submission.accession_number != accession_number and filing_order(submission) < amendment_order]
+    chain = find_amended_chain(get_filing_chains(earlier), submission_type) or []
+    positions = read_effective_positions(chain)
+    if not positions:
+        return None, {}
+    return chain[-1].accession_number, positions
@@ -0,0 +1,149 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import CacheNamespace
+from .diffs import describe_positions, encode_positions
+from .frames import map_codes
+from .lazy import LazyImport
+
+pd = LazyImport('pandas')
+
+# Number of funds whose analytics are kept in the cache
+ANALYTICS_CACHE_SIZE = 256
+
+PERIOD_COLUMNS = ['Period', 'Accession Number', 'AUM (USD)', 'Positions', 'New Positions', 'Closed Positions',
+                  'Turnover', 'HHI', 'Effective Positions']
+
+POSITION_COLUMNS = ['Company Name', 'Value (USD)', 'Weight', 'Previous Weight', 'Weight Change', 'Holding Quarters']
+
+# Results keyed by the accession numbers they were computed from, joined by ANALYTICS_KEY_SEPARATOR
+ANALYTICS_KEY_SEPARATOR = '|'
+analytics_cache = CacheNamespace('analytics', max_entries=ANALYTICS_CACHE_SIZE)
+
+
+def compute_fund_analytics(holdings_df: 'pd.DataFrame', all_submissions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compute the quarter-over-quarter analytics of a fund over its whole submission history.
+
+    Per submission: AUM, number of positions, new and closed positions, one-way turnover (half the sum of
+    absolute weight changes), Herfindahl-Hirschman concentration (sum of squared weights) and the effective
+    number of positions (1 / HHI). Per position of the newest submission: weight, previous weight, weight
+    change and the number of consecutive submissions the company has been held.
+
+    Positions are matched by CUSIP and put/call flag, like the holdings comparison of the fund details page
+    (see `diffs.encode_positions`). The result is cached per set of accession numbers (see `cache.py`), so it is
+    computed once per fund and new submission; the returned frames may be shared and must not be modified.
+
+    Args:
+        holdings_df (pd.DataFrame): The holdings frame from `fetch_and_process_holdings`.
+        all_submissions (List[Dict[str, Any]]): The processed submissions, newest first.
+
+    Returns:
+        Dict[str, Any]: 'periods', a DataFrame with one row per submission (newest first), and 'positions',
+            a DataFrame with one row per position of the newest submission (largest weight first).
+    """
+    key = ANALYTICS_KEY_SEPARATOR.join(submission['accession_number'] for submission in all_submissions)
+    return analytics_cache.get_or_set(key, lambda: _compute_fund_analytics(holdings_df, all_submissions))
+
+
+def clear_analytics_cache(accession_number: Optional[str] = None) -> None:
+    """
+    Drop cached analytics, either those computed from one accession number or all of them.
+
+    Args:
+        accession_number (Optional[str]): The accession number whose holdings changed, or None to clear everything.
+    """
+    if accession_number is None:
+        analytics_cache.clear()
+        return
+    analytics_cache.delete_matching(lambda key: accession_number in key.split(ANALYTICS_KEY_SEPARATOR))
+
+
+def _compute_fund_analytics(holdings_df: 'pd.DataFrame', all_submissions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Submissions oldest first; t is the index of a submission in this order
+    chronological = all_submissions[::-1]
+    quarters = len(chronological)
+    if not quarters or holdings_df.empty:
+        return {'periods': pd.DataFrame(columns=PERIOD_COLUMNS), 'positions': pd.DataFrame(columns=POSITION_COLUMNS)}
+
+    t_of_accession = {submission['accession_number']: t for t, submission in enumerate(chronological)}
+    t_column = map_codes(holdings_df['Accession Number'], t_of_accession)
+    known = t_column >= 0
+    known_df = holdings_df if known.all() else holdings_df[known]
+    codes, company_count = encode_positions(known_df)
+    companies = describe_positions(known_df, codes, company_count)['Company Name']
+    company_count = max(company_count, 1)
+
+    # One entry per (submission, company) with the values of repeated lines summed, sorted by t and company
+    pair_keys, inverse = np.unique(t_column[known] * company_count + codes, return_inverse=True)
+    values = np.bincount(inverse, weights=known_df['Value (USD)'].to_numpy(dtype=float))
+    t = pair_keys // company_count
+    company = pair_keys % company_count
+
+    aum = np.bincount(t, weights=values, minlength=quarters)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = np.where(aum[t] > 0, values / aum[t], 0.0)
+
+    # Locate the same company in the previous and the next submission
+    previous_index, has_previous = _find_keys(pair_keys, pair_keys - company_count)
+    _, has_next = _find_keys(pair_keys, pair_keys + company_count)
+    previous_weights = np.where(has_previous, weights[previous_index], 0.0)
+    closed_after = ~has_next & (t < quarters - 1)
+
+    positions = np.bincount(t, minlength=quarters).astype(float)
+    new_positions = np.bincount(t, weights=(~has_previous).astype(float), minlength=quarters)
+    closed_positions = np.bincount(t + 1, weights=closed_after.astype(float), minlength=quarters + 1)[:quarters]
+    # Weight moved between held companies plus the weight of positions sold completely
+    moved_weight = np.bincount(t, weights=np.abs(weights - previous_weights), minlength=quarters) + \
+        np.bincount(t + 1, weights=np.where(closed_after, weights, 0.0), minlength=quarters + 1)[:quarters]
+    hhi = np.bincount(t, weights=weights ** 2, minlength=quarters)
+
+    has_history = np.zeros(quarters, dtype=bool)
+    has_history[1:] = aum[:-1] > 0
+    turnover = np.where(has_history, 0.5 * moved_weight, np.nan)
+    new_positions = np.where(has_history, new_positions, np.nan)
+    closed_positions = np.where(has_history, closed_positions, np.nan)
+    with np.errstate(divide='ignore'):
+        effective_positions = np.where(hhi > 0, 1.0 / hhi, np.nan)
+
+    periods_df = pd.DataFrame({
+        'Period': [submission['period_of_portfolio'] for submission in chronological],
+        'Accession Number': [submission['accession_number'] for submission in chronological],
+        'AUM (USD)': aum,
+        'Positions': positions.astype(int),
+        'New Positions': new_positions,
+        'Closed Positions': closed_positions,
+        'Turnover': turnover,
+        'HHI': hhi,
+        'Effective Positions': effective_positions,
+    }).iloc[::-1].reset_index(drop=True)
+
+    # Holding period: length of the run of consecutive submissions, ordered by company and then by t
+    order = np.lexsort((t, company))
+    run_starts = np.ones(len(order), dtype=bool)
+    run_starts[1:] = (company[order][1:] != company[order][:-1]) | (t[order][1:] != t[order][:-1] + 1)
+    positions_in_order = np.arange(len(order))
+    holding_quarters = np.empty(len(order), dtype=np.int64)
+    holding_quarters[order] = positions_in_order - np.maximum.accumulate(
+        np.where(run_starts, positions_in_order, 0)) + 1
+
+    newest = t == quarters - 1
+    positions_df = pd.DataFrame({
+        'Company Name': companies[company[newest]],
+        'Value (USD)': values[newest],
+        'Weight': weights[newest],
+        'Previous Weight': previous_weights[newest],
+        'Weight Change': weights[newest] - previous_weights[newest],
+        'Holding Quarters': holding_quarters[newest],
+    }).sort_values('Weight', ascending=False, kind='stable').reset_index(drop=True)
+
+    return {'periods': periods_df, 'positions': positions_df}
+
+
+def _find_keys(sorted_keys: np.ndarray, wanted: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the positions of `wanted` in `sorted_keys`, returning the (clipped) indexes and whether each was found.
+    """
+    index = np.minimum(np.searchsorted(sorted_keys, wanted), len(sorted_keys) - 1)
+    return index, sorted_keys[index] == wanted
@@ -0,0 +1,278 @@
+from io import BytesIO
+from typing import Any, Dict
+
+from flask import Blueprint, Response, jsonify, request
+from flask_login import login_required
+
+from .analytics import compute_fund_analytics
+from .database import read_replica
+from .flows import get_consensus_leaderboard
+from .lazy import LazyImport
+from .summaries import get_fund_summaries
+from .utils import fetch_and_process_holdings, build_holdings_diff_dataframe, build_monitor_dataframe
+
+pd = LazyImport('pandas')
+
+# Define the blueprint for the read API
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_MIMETYPE = 'application/vnd.apache.parquet'
+
+
+def get_response_format() -> str:
+    """
+    Determine the response format from the 'format' argument or the Accept header.
+
+    Returns:
+        str: One of 'json', 'arrow' or 'parquet'.
+    """
+    requested_format = request.args.get('format')
+    if requested_format in ('json', 'arrow', 'parquet'):
+        return requested_format
+
+    best_match = request.accept_mimetypes.best_match(['application/json', ARROW_MIMETYPE, PARQUET_MIMETYPE],
+                                                     default='application/json')
+    return {ARROW_MIMETYPE: 'arrow', PARQUET_MIMETYPE: 'parquet'}.get(best_match, 'json')
+
+
+def columnar_json(df: 'pd.DataFrame', meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a DataFrame into a column-oriented JSON payload.
+
+    Each column is sent once as a list instead of repeating the column names in every row.
+
+    Args:
+        df (pd.DataFrame): The frame to convert.
+        meta (Dict[str, Any]): Extra top-level fields, e.g. the CIK.
+
+    Returns:
+        Dict[str, Any]: The payload with 'columns', 'data' and 'rows' fields.
+    """
+    df = df.astype(object).where(df.notna(), None)
+    return {
+        **meta,
+        'columns': list(df.columns),
+        'rows': len(df),
+        'data': {column: df[column].tolist() for column in df.columns},
+    }
+
+
+def frame_response(df: 'pd.DataFrame', name: str, meta: Dict[str, Any]) -> Response:
+    """
+    Serialize a DataFrame in the requested format.
+
+    Args:
+        df (pd.DataFrame): The frame to send.
+        name (str): The base file name used for binary downloads.
+        meta (Dict[str, Any]): Extra fields for JSON responses, stored as schema metadata for Arrow and Parquet.
+
+    Returns:
+        Response: The JSON, Arrow IPC stream or Parquet response.
+    """
+    response_format = get_response_format()
+    if response_format == 'json':
+        return jsonify(columnar_json(df, meta))
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return Response('Arrow and Parquet output require pyarrow.', status=406, mimetype='text/plain')
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           **{key.encode(): str(value).encode() for key, value in meta.items()}})
+
+    if response_format == 'arrow':
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        body, mimetype, extension = sink.getvalue().to_pybytes(), ARROW_MIMETYPE, 'arrows'
+    else:
+        buffer = BytesIO()
+        pq.write_table(table, buffer, compression='zstd')
+        body, mimetype, extension = buffer.getvalue(), PARQUET_MIMETYPE, 'parquet'
+
+    return Response(body, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={name}.{extension}'})
+
+
+def not_found(cik: str) -> Response:
+    """
+    Build the error response for a CIK without stored submissions.
+    """
+    response = jsonify({'error': f'No holdings filings stored for CIK {cik}.'})
+    response.status_code = 404
+    return response
+
+
+@api.route('/consensus')
+@read_replica
+def consensus() -> Response:
+    """
+    Return the securities most bought and most sold by all tracked funds in a reporting period.
+
+    The period defaults to the latest one and is chosen with `?period=2024 Q2`; `?limit=` sets the length
+    of each list (10 by default).
+
+    Returns:
+        Response: One row per security, with a 'side' column of 'bought' or 'sold'.
+    """
+    leaderboard = get_consensus_leaderboard(limit=request.args.get('limit', default=10, type=int),
+                                            period_of_portfolio=request.args.get('period'))
+    rows = [{'side': side, **entry} for side in ('bought', 'sold') for entry in leaderboard[side]]
+    consensus_df = pd.DataFrame(rows, columns=['side', 'cusip', 'company_name', 'shares_change', 'value_change',
+                                               'buyers', 'sellers'])
+    return frame_response(consensus_df, 'consensus', {'period': leaderboard['period']})
+
+
+@api.route('/funds/<cik>/submissions')
+@read_replica
+def submissions(cik: str) -> Response:
+    """
+    Return the submission history of a fund.
+
+    Args:
+        cik (str): The CIK of the fund.
+
+    Returns:
+        Response: One row per submission, newest first.
+    """
+    fund, all_submissions, _ = fetch_and_process_holdings(cik, download_missing=False)
+    if not fund:
+        return not_found(cik)
+
+    submissions_df = pd.DataFrame(all_submissions, columns=['filed_of_date', 'period_of_portfolio', 'submission_type',
+                                                            'accession_number', 'fund_portfolio_value'])
+    submissions_df['filed_of_date'] = submissions_df['filed_of_date'].astype(str)
+    return frame_response(submissions_df, f'{cik}_submissions', {'cik': cik})
+
+
+@api.route('/funds/<cik>/summary')
+@read_replica
+def summary(cik: str) -> Response:
+    """
+    Return the fund-level time series: AUM, position count, new/closed positions, turnover and top-10
+    concentration per submission.
+
+    Args:
+        cik (str): The CIK of the fund.
+
+    Returns:
+        Response: One row per submission, newest first.
+    """
+    fund_summaries = get_fund_summaries(cik)
+    if not fund_summaries:
+        return not_found(cik)
+
+    columns = ['period_of_portfolio', 'filed_of_date', 'accession_number', 'aum', 'position_count', 'new_positions',
+               'closed_positions', 'turnover', 'top10_concentration']
+    summary_df = pd.DataFrame([[getattr(row, column) for column in columns] for row in fund_summaries],
+                              columns=columns)
+    summary_df['filed_of_date'] = summary_df['filed_of_date'].astype(str)
+    return frame_response(summary_df, f'{cik}_summary', {'cik': cik})
+
+
+@api.route('/funds/<cik>/holdings')
+@read_replica
+def holdings(cik: str) -> Response:
+    """
+    Return the holdings of every stored submission of a fund, optionally limited to one accession.
+
+    Args:
+        cik (str): The CIK of the fund.
+
+    Returns:
+        Response: One row per holding.
+    """
+    fund, _, holdings_df = fetch_and_process_holdings(cik, download_missing=False)
+    if not fund:
+        return not_found(cik)
+
+    accession_number = request.args.get('accession_number')
+    if accession_number:
+        holdings_df = holdings_df[holdings_df['Accession Number'] == accession_number]
+    return frame_response(holdings_df, f'{cik}_holdings', {'cik': cik})
+
+
+@api.route('/funds/<cik>/diffs')
+@read_replica
+def diffs(cik: str) -> Response:
+    """
+    Return the comparison of the most recent holdings with the previous submission.
+
+    Args:
+        cik (str): The CIK of the fund.
+
+    Returns:
+        Response: One row per company with its change status and amounts.
+    """
+    fund, all_submissions, holdings_df = fetch_and_process_holdings(cik, download_missing=False)
+    if not fund:
+        return not_found(cik)
+
+    diff_df = build_holdings_diff_dataframe(holdings_df, all_submissions)
+    return frame_response(diff_df, f'{cik}_diffs', {'cik': cik})
+
+
+@api.route('/funds/<cik>/analytics')
+@read_replica
+def analytics(cik: str) -> Response:
+    """
+    Return the quarter-over-quarter analytics of a fund: AUM, positions, new/closed positions, turnover and
+    Herfindahl concentration per submission.
+
+    Args:
+        cik (str): The CIK of the fund.
+
+    Returns:
+        Response: One row per submission, newest first.
+    """
+    fund, all_submissions, holdings_df = fetch_and_process_holdings(cik, download_missing=False)
+    if not fund:
+        return not_found(cik)
+
+    return frame_response(compute_fund_analytics(holdings_df, all_submissions)['periods'], f'{cik}_analytics',
+                          {'cik': cik})
+
+
+@api.route('/funds/<cik>/analytics/positions')
+@read_replica
+def analytics_positions(cik: str) -> Response:
+    """
+    Return the positions of the newest submission with their weight, weight change and holding period.
+
+    Args:
+        cik (str): The CIK of the fund.
+
+    Returns:
+        Response: One row per position, largest weight first.
+    """
+    fund, all_submissions, holdings_df = fetch_and_process_holdings(cik, download_missing=False)
+    if not fund:
+        return not_found(cik)
+
+    return frame_response(compute_fund_analytics(holdings_df, all_submissions)['positions'],
+                          f'{cik}_analytics_positions', {'cik': cik})
+
+
+@api.route('/funds/<cik>/monitor')
+@read_replica
+@login_required
+def monitor(cik: str) -> Response:
+    """
+    Return the monitor matrix of a fund: share amounts per company and submission period.
+
+    Args:
+        cik (str): The CIK of the fund.
+
+    Returns:
+        Response: One row per company and one column per period.
+    """
+    fund, all_submissions, holdings_df = fetch_and_process_holdings(cik, download_missing=False)
+    if not fund:
+        return not_found(cik)
+
+    monitor_df, _ = build_monitor_dataframe(holdings_df, all_submissions)
+    return frame_response(monitor_df, f'{cik}_monitor', {'cik': cik})
@@ -0,0 +1,507 @@
+import hashlib
+import logging
+import os
+import pickle
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Flask, current_app, has_app_context
+
+from .instrumentation import metrics
+
+logger = logging.getLogger('sLogger')
+
+metrics.describe('cache_requests_total', 'counter', 'Cache lookups by namespace and result (hit, miss).')
+metrics.describe('cache_evictions_total', 'counter', 'Cache entries evicted by namespace to stay within its limits.')
+
+# Returned by the backends when a key is missing or expired, as None is a valid cached value
+MISSING = object()
+
+# Namespaces become directory names of the file backend
+NAMESPACE_PATTERN = re.compile(r'^[a-z][a-z0-9_]*$')
+
+
+class CacheBackend(ABC):
+    """
+    Storage of `Cache` entries, grouped by namespace. Every entry has an optional expiry time (time.time()) and
+    backends track when it was last used, so namespaces can be trimmed least recently used first.
+    """
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Any:
+        """
+        Get a value and mark it as recently used, or MISSING if the key is unknown or expired.
+        """
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any, expires_at: Optional[float]) -> None:
+        """
+        Store a value, replacing the previous value of the key.
+        """
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None:
+        """
+        Remove a key if it exists.
+        """
+
+    @abstractmethod
+    def keys(self, namespace: str) -> List[str]:
+        """
+        Get the keys stored in a namespace, including expired ones that were not removed yet.
+        """
+
+    @abstractmethod
+    def clear(self, namespace: str) -> None:
+        """
+        Remove every entry of a namespace.
+        """
+
+    @abstractmethod
+    def evict(self, namespace: str, max_entries: Optional[int], max_bytes: Optional[int]) -> int:
+        """
+        Remove the least recently used entries of a namespace until it is within the limits.
+
+        Returns:
+            int: The number of removed entries.
+        """
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory used by a cached value: `sys.getsizeof` of the value and of the items of tuples, lists
+    and dictionaries. DataFrames report the size of their columns themselves.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(estimate_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    return size
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Entries kept as objects in the memory of the process, so values are returned without copying and must not
+    be modified. Sizes are estimated with `estimate_size`.
+    """
+
+    def __init__(self):
+        # Per namespace: key -> (value, expires_at, size), least recently used first
+        self._entries: Dict[str, 'OrderedDict[str, Tuple[Any, Optional[float], int]]'] = {}
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Any:
+        with self._lock:
+            entries = self._entries.get(namespace)
+            entry = entries.get(key) if entries is not None else None
+            if entry is None:
+                return MISSING
+            if entry[1] is not None and entry[1] <= time.time():
+                self._remove(namespace, key)
+                return MISSING
+            entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, namespace: str, key: str, value: Any, expires_at: Optional[float]) -> None:
+        size = estimate_size(value)
+        with self._lock:
+            self._remove(namespace, key)
+            self._entries.setdefault(namespace, OrderedDict())[key] = (value, expires_at, size)
+            self._sizes[namespace] = self._sizes.get(namespace, 0) + size
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._remove(namespace, key)
+
+    def keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            return list(self._entries.get(namespace, ()))
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            self._entries.pop(namespace, None)
+            self._sizes.pop(namespace, None)
+
+    def evict(self, namespace: str, max_entries: Optional[int], max_bytes: Optional[int]) -> int:
+        evicted = 0
+        with self._lock:
+            entries = self._entries.get(namespace)
+            while entries and ((max_entries is not None and len(entries) > max_entries) or
+                               (max_bytes is not None and self._sizes[namespace] > max_bytes)):
+                self._remove(namespace, next(iter(entries)))
+                evicted += 1
+        return evicted
+
+    def _remove(self, namespace: str, key: str) -> None:
+        entry = self._entries.get(namespace, {}).pop(key, None)
+        if entry is not None:
+            self._sizes[namespace] -= entry[2]
+
+
+class FileBackend(CacheBackend):
+    """
+    Entries pickled into one file per key under `directory/namespace`, shared by the worker processes of a
+    host. The modification time of a file is its last use.
+
+    Attributes:
+        directory (str): The root directory of the cache.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, namespace: str, key: str) -> str:
+        return os.path.join(self.directory, namespace, hashlib.sha1(key.encode()).hexdigest() + '.pickle')
+
+    def _files(self, namespace: str) -> List[str]:
+        directory = os.path.join(self.directory, namespace)
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.pickle')]
+
+    def get(self, namespace: str, key: str) -> Any:
+        path = self._path(namespace, key)
+        try:
+            with open(path, 'rb') as file:
+                # Files start with their key and expiry, so neither requires loading the value
+                stored_key, expires_at = pickle.load(file)
+                if stored_key != key:
+                    return MISSING
+                if expires_at is not None and expires_at <= time.time():
+                    self._remove(path)
+                    return MISSING
+                value = pickle.load(file)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return MISSING
+        return value
+
+    def set(self, namespace: str, key: str, value: Any, expires_at: Optional[float]) -> None:
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written next to the final path and renamed into place, so readers never see a partial file
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                pickle.dump((key, expires_at), file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except BaseException:
+            self._remove(temp_path)
+            raise
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._remove(self._path(namespace, key))
+
+    def keys(self, namespace: str) -> List[str]:
+        keys = []
+        for path in self._files(namespace):
+            try:
+                with open(path, 'rb') as file:
+                    keys.append(pickle.load(file)[0])
+            except (OSError, EOFError, pickle.UnpicklingError):
+                continue
+        return keys
+
+    def clear(self, namespace: str) -> None:
+        for path in self._files(namespace):
+            self._remove(path)
+
+    def evict(self, namespace: str, max_entries: Optional[int], max_bytes: Optional[int]) -> int:
+        files = []
+        for path in self._files(namespace):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+        files.sort()
+
+        total_bytes = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in files:
+            if (max_entries is None or len(files) - evicted <= max_entries) and \
+                    (max_bytes is None or total_bytes <= max_bytes):
+                break
+            self._remove(path)
+            total_bytes -= size
+            evicted += 1
+        return evicted
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Entries pickled into a local SQLite database, shared by the worker processes of a host. Every thread uses
+    its own connection; WAL mode lets readers proceed while another process writes.
+
+    Attributes:
+        path (str): The path of the database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS cache_entries (namespace TEXT NOT NULL, key TEXT NOT NULL, '
+                               'value BLOB NOT NULL, expires_at REAL, accessed_at REAL NOT NULL, '
+                               'size INTEGER NOT NULL, PRIMARY KEY (namespace, key))')
+            self._local.connection = connection
+        return connection
+
+    def get(self, namespace: str, key: str) -> Any:
+        connection = self._connection()
+        row = connection.execute('SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                                 (namespace, key)).fetchone()
+        if row is None:
+            return MISSING
+        if row[1] is not None and row[1] <= time.time():
+            self.delete(namespace, key)
+            return MISSING
+        connection.execute('UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                           (time.time(), namespace, key))
+        return pickle.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, expires_at: Optional[float]) -> None:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._connection().execute('INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?)',
+                                   (namespace, key, data, expires_at, time.time(), len(data)))
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._connection().execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (namespace, key))
+
+    def keys(self, namespace: str) -> List[str]:
+        return [key for key, in self._connection().execute('SELECT key FROM cache_entries WHERE namespace = ?',
+                                                           (namespace,))]
+
+    def clear(self, namespace: str) -> None:
+        self._connection().execute('DELETE FROM cache_entries WHERE namespace = ?', (namespace,))
+
+    def evict(self, namespace: str, max_entries: Optional[int], max_bytes: Optional[int]) -> int:
+        connection = self._connection()
+        count, total_bytes = connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries '
+                                                'WHERE namespace = ?', (namespace,)).fetchone()
+        if (max_entries is None or count <= max_entries) and (max_bytes is None or total_bytes <= max_bytes):
+            return 0
+
+        evicted_keys = []
+        for key, size in connection.execute('SELECT key, size FROM cache_entries WHERE namespace = ? '
+                                            'ORDER BY accessed_at', (namespace,)).fetchall():
+            if (max_entries is None or count - len(evicted_keys) <= max_entries) and \
+                    (max_bytes is None or total_bytes <= max_bytes):
+                break
+            evicted_keys.append(key)
+            total_bytes -= size
+        connection.executemany('DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                               [(namespace, key) for key in evicted_keys])
+        return len(evicted_keys)
+
+
+class Cache:
+    """
+    Namespaced cache in front of a `CacheBackend`, with expiry, size limits per namespace, hit/miss metrics and
+    single-flight computation of missing values.
+
+    Attributes:
+        backend (CacheBackend): The storage of the entries.
+        default_ttl (Optional[int]): Seconds entries live unless a namespace or call sets otherwise.
+    """
+
+    def __init__(self, backend: CacheBackend, default_ttl: Optional[int] = None):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        # Locks of the keys being computed by `get_or_set`, with the number of threads using each
+        self._flights: Dict[Tuple[str, str], List[Any]] = {}
+        self._flights_lock = threading.Lock()
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """
+        Get a cached value, or `default` if it is missing or expired.
+        """
+        try:
+            value = self.backend.get(namespace, key)
+        except Exception as e:
+            logger.warning(f'Could not read {namespace}/{key} from the cache: {e}')
+            value = MISSING
+        metrics.inc('cache_requests_total', namespace=namespace, result='miss' if value is MISSING else 'hit')
+        return default if value is MISSING else value
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[int] = None, max_entries: Optional[int] = None,
+            max_bytes: Optional[int] = None) -> None:
+        """
+        Store a value and trim its namespace to the given limits. Values that cannot be stored, e.g. because the
+        backend cannot pickle them, are logged and skipped.
+        """
+        ttl = ttl if ttl is not None else self.default_ttl
+        try:
+            self.backend.set(namespace, key, value, time.time() + ttl if ttl else None)
+            if max_entries is not None or max_bytes is not None:
+                evicted = self.backend.evict(namespace, max_entries, max_bytes)
+                if evicted:
+                    metrics.inc('cache_evictions_total', evicted, namespace=namespace)
+        except Exception as e:
+            logger.warning(f'Could not store {namespace}/{key} in the cache: {e}')
+
+    def get_or_set(self, namespace: str, key: str, creator: Callable[[], Any], ttl: Optional[int] = None,
+                   max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> Any:
+        """
+        Get a cached value, computing and storing it on a miss. Concurrent misses of the same key in a process
+        wait for the first one instead of all computing the value.
+        """
+        value = self.get(namespace, key, MISSING)
+        if value is not MISSING:
+            return value
+
+        flight_key = (namespace, key)
+        with self._flights_lock:
+            flight = self._flights.setdefault(flight_key, [threading.Lock(), 0])
+            flight[1] += 1
+        try:
+            with flight[0]:
+                # Computed by another thread while this one waited
+                value = self.backend.get(namespace, key)
+                if value is MISSING:
+                    value = creator()
+                    self.set(namespace, key, value, ttl, max_entries, max_bytes)
+                return value
+        finally:
+            with self._flights_lock:
+                flight[1] -= 1
+                if not flight[1]:
+                    del self._flights[flight_key]
+
+    def delete(self, namespace: str, key: str) -> None:
+        """
+        Remove a cached value.
+        """
+        self.backend.delete(namespace, key)
+
+    def delete_matching(self, namespace: str, predicate: Callable[[str], bool]) -> None:
+        """
+        Remove the values of a namespace whose keys match a predicate.
+        """
+        for key in self.backend.keys(namespace):
+            if predicate(key):
+                self.backend.delete(namespace, key)
+
+    def clear(self, namespace: str) -> None:
+        """
+        Remove every value of a namespace.
+        """
+        self.backend.clear(namespace)
+
+
+class CacheNamespace:
+    """
+    A namespace of the cache of the current application, with the limits that apply to it. Namespaces can be
+    created at import time; the cache is looked up on every call, so they follow the application in use.
+
+    Attributes:
+        name (str): The namespace.
+        ttl (Optional[int]): Seconds entries live, the cache default if None.
+        max_entries (Optional[int]): Number of entries kept, least recently used evicted first.
+        max_bytes (Optional[int]): Total size of the kept entries.
+    """
+
+    def __init__(self, name: str, ttl: Optional[int] = None, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        if not NAMESPACE_PATTERN.match(name):
+            raise ValueError(f'Invalid cache namespace {name!r}')
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a cached value of the namespace, or `default`.
+        """
+        return get_cache().get(self.name, key, default)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """
+        Store a value in the namespace.
+        """
+        get_cache().set(self.name, key, value, ttl if ttl is not None else self.ttl, self.max_entries, self.max_bytes)
+
+    def get_or_set(self, key: str, creator: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+        """
+        Get a cached value of the namespace, computing it once on a miss.
+        """
+        return get_cache().get_or_set(self.name, key, creator, ttl if ttl is not None else self.ttl,
+                                      self.max_entries, self.max_bytes)
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a value of the namespace.
+        """
+        get_cache().delete(self.name, key)
+
+    def delete_matching(self, predicate: Callable[[str], bool]) -> None:
+        """
+        Remove the values of the namespace whose keys match a predicate.
+        """
+        get_cache().delete_matching(self.name, predicate)
+
+    def clear(self) -> None:
+        """
+        Remove every value of the namespace.
+        """
+        get_cache().clear(self.name)
+
+
+def create_backend(config: Dict[str, Any]) -> CacheBackend:
+    """
+    Create the backend selected with CACHE_BACKEND: 'memory', 'file' (in CACHE_DIR) or 'sqlite'
+    (in CACHE_SQLITE_PATH).
+    """
+    backend = config.get('CACHE_BACKEND', 'memory')
+    if backend == 'memory':
+        return MemoryBackend()
+    if backend == 'file':
+        return FileBackend(config['CACHE_DIR'])
+    if backend == 'sqlite':
+        return SQLiteBackend(config['CACHE_SQLITE_PATH'])
+    raise ValueError(f"Unknown CACHE_BACKEND {backend!r}, expected 'memory', 'file' or 'sqlite'")
+
+
+def init_cache(app: Flask) -> None:
+    """
+    Create the cache of the application from its configuration.
+    """
+    app.extensions['cache'] = Cache(create_backend(app.config), app.config.get('CACHE_DEFAULT_TTL'))
+
+
+# Used outside of an application context, e.g. by scripts working on frames only
+_default_cache = Cache(MemoryBackend())
+
+
+def get_cache() -> Cache:
+    """
+    Get the cache of the current application, or a process-wide in-memory cache without one.
+    """
+    if has_app_context() and 'cache' in current_app.extensions:
+        return current_app.extensions['cache']
+    return _default_cache
@@ -1,9 +1,32 @@
 import os
+from typing import Optional
+
 from dotenv import load_dotenv
 
 # Load environment variables from a .env file
 load_dotenv()
 
+# Funds listed on the home page unless WELL_KNOWN_FUNDS is set, as CIK: fund name
+DEFAULT_WELL_KNOWN_FUNDS = {
+    '0001067983': 'Berkshire Hathaway',
+    '0000089043': 'Sequoia Fund',
+    '0001099281': 'Third Avenue Management LLC',
+    '0000806636': 'Longleaf Partners Funds Trust',
+    '0001070134': 'Mairs & Power Inc',
+}
+
+
+def parse_well_known_funds(value: str) -> dict:
+    """
+    Parse a comma-separated list of 'CIK:Fund Name' pairs, e.g. '0001067983:Berkshire Hathaway,0000089043:Sequoia'.
+    """
+    funds = {}
+    for item in value.split(','):
+        cik, _, fund_name = item.partition(':')
+        if cik.strip():
+            funds[cik.strip()] = fund_name.strip() or cik.strip()
+    return funds
+
 
 class Config(object):
     """
@@ -17,6 +40,30 @@ class Config(object):
         SQLALCHEMY_TRACK_MODIFICATIONS (bool): Flag to disable Flask-SQLAlchemy's event system.
         SECRET_KEY (str): Secret key for session management and cryptographic operations.
         USER_AGENT (str): User agent string for making HTTP requests.
+        RSS_FEED_CACHE_SECONDS (int): Number of seconds a fetched SEC RSS feed is reused.
+        FILING_WATCHER_INTERVAL (int): Number of seconds between polls of the filing watcher.
+        METRICS_ENABLED (bool): Expose the Prometheus metrics endpoint at /metrics.
+        METRICS_TOKEN (str): Bearer token required by /metrics; empty lets any client read it.
+        SLOW_REQUEST_THRESHOLD_MS (int): Requests slower than this are logged with their query breakdown.
+        N_PLUS_ONE_QUERY_THRESHOLD (int): Statements repeated this often in one request are flagged as N+1.
+        SEC_URL (str): Base URL of the SEC Edgar website (archives, RSS feeds).
+        SEC_DATA_URL (str): Base URL of the SEC Edgar data API (submissions index).
+        SQLALCHEMY_ENGINE_OPTIONS (dict): Options passed to the SQLAlchemy engine, e.g. the connection pool settings.
+        DB_POOL_RETRY_AFTER (int): Seconds in the Retry-After header when the connection pool is exhausted.
+        AUTO_CREATE_TABLES (bool): Create missing tables with db.create_all() at startup instead of migrations.
+        SQLALCHEMY_BINDS (dict): Additional databases; the 'replica' bind serves the reads of read-only views.
+        REPLICA_MAX_LAG_SECONDS (int): Staleness budget of the read replica; reads fall back to the primary beyond it.
+        REPLICA_LAG_CHECK_INTERVAL (int): Number of seconds a replica lag measurement is reused.
+        HOLDINGS_RETENTION_QUARTERS (int): Number of recent quarters whose holdings stay in the database.
+        HOLDINGS_ARCHIVE_DIR (str): Directory the holdings of older quarters are archived to.
+        HOLDINGS_CACHE_DIR (str): Directory of the memory-mapped per-fund holdings files; empty disables the cache.
+        WELL_KNOWN_FUNDS (dict): Funds of the home page panel, as CIK: fund name.
+        HTTP_CACHE_MAX_BYTES (int): Size of the per-process cache of rendered public pages; 0 disables it.
+        HTTP_CACHE_SHARED_MAX_AGE (int): Seconds reverse proxies may serve an anonymous public page unchecked.
+        CACHE_BACKEND (str): Storage of memoized data: 'memory', 'file' or 'sqlite'.
+        CACHE_DIR (str): Directory of the 'file' cache backend.
+        CACHE_SQLITE_PATH (str): Database file of the 'sqlite' cache backend.
+        CACHE_DEFAULT_TTL (Optional[int]): Seconds cached entries live unless their namespace sets otherwise.
     """
     # Swich between ENV: $env:FLASK_ENV="development"
     # Check ENV: echo $env:FLASK_ENV
@@ -38,6 +85,72 @@ class Config(object):
     # User agent string for making HTTP requests, fetched from 'USER_AGENT'
     USER_AGENT: str = os.environ.get('USER_AGENT')
 
+    # Number of seconds a fetched SEC RSS feed is reused before it is revalidated
+    RSS_FEED_CACHE_SECONDS: int = int(os.environ.get('RSS_FEED_CACHE_SECONDS', 30))
+
+    # Number of seconds between two polls of the filing watcher (flask watch-filings)
+    FILING_WATCHER_INTERVAL: int = int(os.environ.get('FILING_WATCHER_INTERVAL', 60))
+
+    # Expose the Prometheus metrics endpoint at /metrics. It is off by default, as it lists endpoints and traffic.
+    METRICS_ENABLED: bool = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+
+    # Token scrapers send as 'Authorization: Bearer <token>'; without one, /metrics is readable by any client
+    METRICS_TOKEN: str = os.environ.get('METRICS_TOKEN', '')
+
+    # Requests slower than this many milliseconds are logged with their query breakdown
+    SLOW_REQUEST_THRESHOLD_MS: int = int(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 1000))
+
+    # A statement executed this many times in one request is flagged as a possible N+1 query
+    N_PLUS_ONE_QUERY_THRESHOLD: int = int(os.environ.get('N_PLUS_ONE_QUERY_THRESHOLD', 10))
+
+    # SEC Edgar hosts; point them at a local stand-in for load tests
+    SEC_URL: str = os.environ.get('SEC_URL', 'https://www.sec.gov')
+    SEC_DATA_URL: str = os.environ.get('SEC_DATA_URL', 'https://data.sec.gov')
+
+    # Options passed to the SQLAlchemy engine; the defaults of SQLAlchemy are used unless overridden
+    SQLALCHEMY_ENGINE_OPTIONS: dict = {}
+
+    # Seconds clients are asked to wait before retrying when no database connection is available
+    DB_POOL_RETRY_AFTER: int = int(os.environ.get('DB_POOL_RETRY_AFTER', 5))
+
+    # The schema is managed with migrations (flask db upgrade); create_all at startup is opt-in
+    AUTO_CREATE_TABLES: bool = os.environ.get('AUTO_CREATE_TABLES', 'false').lower() == 'true'
+
+    # Optional read replica, fetched from 'REPLICA_DATABASE_URL'; without it every query uses the primary
+    SQLALCHEMY_BINDS: dict = {'replica': os.environ['REPLICA_DATABASE_URL']} if os.environ.get(
+        'REPLICA_DATABASE_URL') else {}
+
+    # Reads go to the primary while the replica is further behind than this, and for this long after a user's write
+    REPLICA_MAX_LAG_SECONDS: int = int(os.environ.get('REPLICA_MAX_LAG_SECONDS', 10))
+
+    # Number of seconds a replica lag measurement is reused before the replica is checked again
+    REPLICA_LAG_CHECK_INTERVAL: int = int(os.environ.get('REPLICA_LAG_CHECK_INTERVAL', 5))
+
+    # Holdings of older quarters are moved to Parquet files by flask archive-holdings
+    HOLDINGS_RETENTION_QUARTERS: int = int(os.environ.get('HOLDINGS_RETENTION_QUARTERS', 20))
+    HOLDINGS_ARCHIVE_DIR: str = os.environ.get('HOLDINGS_ARCHIVE_DIR', 'archive')
+
+    # Per-fund holdings frames shared by all worker processes as memory-mapped Arrow files
+    HOLDINGS_CACHE_DIR: str = os.environ.get('HOLDINGS_CACHE_DIR', 'holdings_cache')
+
+    # Funds shown with their latest figures on the home page, fetched from 'WELL_KNOWN_FUNDS'
+    WELL_KNOWN_FUNDS: dict = parse_well_known_funds(os.environ['WELL_KNOWN_FUNDS']) if os.environ.get(
+        'WELL_KNOWN_FUNDS') else DEFAULT_WELL_KNOWN_FUNDS
+
+    # Rendered public pages kept per worker process, keyed by their ETag and evicted least recently used first
+    HTTP_CACHE_MAX_BYTES: int = int(os.environ.get('HTTP_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+    # s-maxage of anonymous public pages; browsers and proxies revalidate with If-None-Match afterwards
+    HTTP_CACHE_SHARED_MAX_AGE: int = int(os.environ.get('HTTP_CACHE_SHARED_MAX_AGE', 60))
+
+    # Memoized data (pages, analytics, diffs, RSS feeds): 'memory' per worker process, or 'file' and 'sqlite',
+    # which the worker processes of a host share
+    CACHE_BACKEND: str = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_DIR: str = os.environ.get('CACHE_DIR', 'cache')
+    CACHE_SQLITE_PATH: str = os.environ.get('CACHE_SQLITE_PATH', 'cache.sqlite3')
+    CACHE_DEFAULT_TTL: Optional[int] = int(os.environ['CACHE_DEFAULT_TTL']) if os.environ.get(
+        'CACHE_DEFAULT_TTL') else None
+
 
 class DevelopmentConfig(Config):
     """
@@ -57,6 +170,11 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL')  # Dedicated PostgreSQL tests database
     WTF_CSRF_ENABLED = False  # Disable CSRF protection for easier testing
+    SQLALCHEMY_BINDS = {'replica': os.environ['TEST_REPLICA_DATABASE_URL']} if os.environ.get(
+        'TEST_REPLICA_DATABASE_URL') else {}  # Optional second database standing in for a read replica
+    HOLDINGS_CACHE_DIR = os.environ.get('TEST_HOLDINGS_CACHE_DIR', '')  # Tests share no cached holdings
+    HTTP_CACHE_MAX_BYTES = int(os.environ.get('TEST_HTTP_CACHE_MAX_BYTES', 0))  # Tests share no cached pages
+    CACHE_BACKEND = os.environ.get('TEST_CACHE_BACKEND', 'memory')  # Every test application has its own cache
     DEBUG = True
 
 
@@ -72,6 +190,21 @@ class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('PRODUCTION_DATABASE_URL')  # Production database URL
     SECRET_KEY = os.environ.get('PRODUCTION_SECRET_KEY')  # Production secret key
     USER_AGENT = os.environ.get('USER_AGENT')  # You may keep the same User-Agent
+    SQLALCHEMY_BINDS = {'replica': os.environ['PRODUCTION_REPLICA_DATABASE_URL']} if os.environ.get(
+        'PRODUCTION_REPLICA_DATABASE_URL') else {}  # Streaming replica of the production database
+
+    # Connection pool per worker process. Size it to the number of threads of a worker (gunicorn.conf.py), so
+    # that workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below the database's max_connections.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 4)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 2)),
+        # Seconds a request waits for a free connection before it is answered with 503
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        # Replace connections before the server or a proxy drops them as idle
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        # Test connections on checkout so a database restart does not surface as request errors
+        'pool_pre_ping': True,
+    }
 
 
 def get_config(env=None):
@@ -1,15 +1,215 @@
+import logging
+import time
+from functools import wraps
+from typing import Any, Callable
+
+from flask import Flask, Response, current_app, g, has_request_context, request, session as user_session
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.sql import Select
+
+from .instrumentation import metrics
+
+logger = logging.getLogger('sLogger')
+
+# Bind key of the read replica in SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+
+# Key in the user's session cookie: until this Unix time the user's reads go to the primary (read your writes)
+PRIMARY_UNTIL_KEY = 'db_primary_until'
+
+# Seconds the PostgreSQL standby is behind the primary; 0 when it has replayed everything it received
+REPLICA_LAG_SQL = """
+SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END
+"""
+
+metrics.describe('db_replica_checks_total', 'counter', 'Read replica health checks by result (ok, lagging, unavailable).')
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of replica-enabled requests to the read replica.
+
+    Only SELECT statements issued while handling a view decorated with `read_replica` are routed to the
+    'replica' bind. Everything else (writes, flushes, CLI commands, the filing watcher and every statement
+    after the request has written) uses the primary database.
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, bind: Any = None, **kwargs: Any) -> Any:
+        if bind is None and not self._flushing and isinstance(clause, Select) and use_replica():
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _pin_after_write(session: RoutingSession, flush_context: Any) -> None:
+    # Reads that follow a write in the same request must see it, so they stay on the primary
+    if has_request_context():
+        g.db_primary_pinned = True
+        g.db_wrote = True
+
 
 # Initialize the SQLAlchemy object
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def read_replica(view: Callable) -> Callable:
+    """
+    Decorator for read-only views whose queries may be answered by the read replica.
+
+    Only GET and HEAD requests are routed, so form submissions handled by the same view keep using
+    the primary database.
+
+    Args:
+        view (Callable): The view function.
+
+    Returns:
+        Callable: The wrapped view function.
+    """
+    @wraps(view)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        g.read_replica = request.method in ('GET', 'HEAD')
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def pin_to_primary() -> None:
+    """
+    Send the remaining queries of the current request to the primary database.
+
+    Used before a read decides whether to write, e.g. whether a fund still has to be downloaded, because
+    the replica may not have the newest rows yet. Does nothing outside of a request.
+    """
+    if has_request_context():
+        g.db_primary_pinned = True
+
+
+def use_replica() -> bool:
+    """
+    Decide whether a read of the current request may go to the read replica.
+
+    Returns:
+        bool: True in a replica-enabled request when a replica is configured and within the staleness budget,
+            and the user has not written recently.
+    """
+    if not has_request_context() or not g.get('read_replica') or g.get('db_primary_pinned'):
+        return False
+    if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        return False
+    # The user changed data a moment ago; the replica might not show it yet
+    if user_session.get(PRIMARY_UNTIL_KEY, 0) > time.time():
+        return False
+    if 'replica_healthy' not in g:
+        g.replica_healthy = check_replica(current_app)
+    return g.replica_healthy
+
 
+def get_replica_lag(engine: Engine) -> float:
+    """
+    Measure how many seconds the replica is behind the primary.
+
+    Replication lag can only be measured on PostgreSQL standbys; other databases, e.g. two SQLite files
+    used during development, are reported as up to date.
+
+    Args:
+        engine (Engine): The engine of the replica.
+
+    Returns:
+        float: The replication lag in seconds.
+    """
+    if engine.dialect.name != 'postgresql':
+        return 0.0
+    with engine.connect() as connection:
+        lag = connection.execute(text(REPLICA_LAG_SQL)).scalar()
+    return float(lag or 0.0)
+
+
+def check_replica(app: Flask) -> bool:
+    """
+    Tell whether the replica is reachable and within REPLICA_MAX_LAG_SECONDS of the primary.
 
-def init_db(app):
+    The result is cached for REPLICA_LAG_CHECK_INTERVAL seconds per process, so the check costs one
+    query every few seconds rather than one per request.
+
+    Args:
+        app (Flask): The Flask application.
+
+    Returns:
+        bool: True if reads may be sent to the replica.
+    """
+    state = app.extensions.setdefault('db_replica', {'checked_at': None, 'healthy': False})
+    now = time.monotonic()
+    if state['checked_at'] is not None and now - state['checked_at'] < app.config['REPLICA_LAG_CHECK_INTERVAL']:
+        return state['healthy']
+
+    try:
+        lag = get_replica_lag(db.engines[REPLICA_BIND])
+    except SQLAlchemyError as e:
+        logger.warning(f'Read replica unavailable, reading from the primary: {e}')
+        result = 'unavailable'
+    else:
+        if lag > app.config['REPLICA_MAX_LAG_SECONDS']:
+            logger.warning(f'Read replica is {lag:.1f} s behind, reading from the primary')
+            result = 'lagging'
+        else:
+            result = 'ok'
+
+    metrics.inc('db_replica_checks_total', result=result)
+    state.update(checked_at=now, healthy=result == 'ok')
+    return state['healthy']
+
+
+def remember_writes(response: Response) -> Response:
+    """
+    Keep the reads of a user who just wrote on the primary for the staleness budget.
+
+    Args:
+        response (Response): The outgoing response.
+
+    Returns:
+        Response: The unchanged response.
+    """
+    if g.get('db_wrote') and REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        user_session[PRIMARY_UNTIL_KEY] = time.time() + current_app.config['REPLICA_MAX_LAG_SECONDS']
+    return response
+
+
+def handle_pool_timeout(error: PoolTimeoutError) -> Response:
+    """
+    Answer with 503 Service Unavailable when no database connection became free within the pool timeout.
+
+    Failing fast with a Retry-After header lets clients and load balancers back off instead of piling
+    more requests onto a worker that is already waiting for connections.
+
+    Args:
+        error (PoolTimeoutError): The pool timeout raised by SQLAlchemy.
+
+    Returns:
+        Response: The 503 response.
+    """
+    logger.warning(f'Database connection pool exhausted during {request.method} {request.path}: {error}')
+    metrics.inc('db_pool_timeouts_total', endpoint=request.endpoint or 'unmatched')
+    db.session.rollback()
+
+    response = Response('The service is busy. Please try again in a few seconds.', status=503,
+                        mimetype='text/plain')
+    response.headers['Retry-After'] = str(current_app.config['DB_POOL_RETRY_AFTER'])
+    return response
+
+
+def init_db(app: Flask) -> None:
     """
     Initialize the database with the Flask application.
 
-    This function sets up the SQLAlchemy database connection within the Flask application context,
-    creating all the database tables defined in the models.
+    This function sets up the SQLAlchemy database connection within the Flask application context.
+    The schema is created and upgraded with migrations (`flask db upgrade`); tables are only created
+    at startup when AUTO_CREATE_TABLES is set, which also saves a database round trip on every boot.
+    An optional read replica is configured as the 'replica' bind in SQLALCHEMY_BINDS; its schema is
+    maintained by the database's replication.
 
     Args:
         app (Flask): The Flask application instance to initialize the database with.
@@ -17,6 +217,13 @@ def init_db(app):
     # Attach the app to the SQLAlchemy object
     db.init_app(app)
 
-    # Create database tables within the application context
-    with app.app_context():
-        db.create_all()
+    # Requests that cannot get a pooled connection in time are rejected instead of queueing further
+    app.register_error_handler(PoolTimeoutError, handle_pool_timeout)
+
+    # Users read their own writes from the primary until the replica has caught up
+    app.after_request(remember_writes)
+
+    # Create missing database tables within the application context
+    if app.config.get('AUTO_CREATE_TABLES'):
+        with app.app_context():
+            db.create_all()
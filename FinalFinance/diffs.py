@@ -0,0 +1,189 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .frames import HOLDINGS_COLUMNS, category_codes, map_codes
+from .lazy import LazyImport
+
+pd = LazyImport('pandas')
+
+DIFF_COLUMNS = HOLDINGS_COLUMNS + ['Previous Share Amount', 'New Company', 'Change Amount', 'Change Percentage',
+                                   'Change Status']
+
+# Placeholder CUSIP of filings that do not identify the security
+UNKNOWN_CUSIP = '000000000'
+
+
+def position_label(company_name: str, put_call: Optional[str]) -> str:
+    """
+    Get the display name of a position, marking options so they are told apart from the shares of the issuer.
+    """
+    return f'{company_name} ({put_call})' if put_call else company_name
+
+
+def position_key(company_name: Optional[str], cusip: Optional[str],
+                 put_call: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Get the position a holdings line belongs to, as `encode_positions` tells positions apart: its CUSIP, or its
+    company name if it has no usable CUSIP, together with its put/call flag.
+    """
+    if cusip and len(cusip) == 9 and cusip != UNKNOWN_CUSIP:
+        return cusip, None, put_call
+    return None, company_name, put_call
+
+
+def encode_positions(holdings_df: 'pd.DataFrame') -> Tuple[np.ndarray, int]:
+    """
+    Give every holdings row the integer code of the position it belongs to.
+
+    A position is a CUSIP, which also tells share classes of one issuer apart, together with the put/call flag
+    of option lines. Rows without a usable CUSIP fall back to the company name. Codes are assigned in order of
+    first appearance, so the first row of every position is the one that describes it.
+
+    Args:
+        holdings_df (pd.DataFrame): Holdings with the columns of `fetch_and_process_holdings`. Frames without
+            the 'CUSIP' and 'Put/Call' columns are matched by company name only.
+
+    Returns:
+        Tuple[np.ndarray, int]: The position code of every row and the number of positions.
+    """
+    name_codes, _ = category_codes(holdings_df['Company Name'])
+    keys = name_codes
+
+    if 'CUSIP' in holdings_df:
+        cusip_codes, cusips = category_codes(holdings_df['CUSIP'])
+        # Checked once per distinct CUSIP; the extra last entry is what code -1 (no CUSIP) picks
+        valid = (cusips.str.len() == 9) & (cusips != UNKNOWN_CUSIP)
+        valid_cusips = np.append(np.asarray(valid, dtype=bool), False)
+        # Names follow the CUSIPs; rows without a name (code -1) get the key right after the last CUSIP
+        keys = np.where(valid_cusips[cusip_codes], cusip_codes, len(cusips) + 1 + keys)
+
+    if 'Put/Call' in holdings_df:
+        # -1 (no option) becomes 0
+        option_codes, options = category_codes(holdings_df['Put/Call'])
+        keys = keys * (len(options) + 1) + option_codes + 1
+
+    codes, uniques = pd.factorize(keys)
+    return codes, len(uniques)
+
+
+def describe_positions(holdings_df: 'pd.DataFrame', codes: np.ndarray, count: int) -> Dict[str, np.ndarray]:
+    """
+    Get the label, CUSIP and put/call flag of every position from its first row.
+    """
+    first_rows = holdings_df.iloc[np.unique(codes, return_index=True)[1]]
+    company_names = first_rows['Company Name'].to_numpy(dtype=object)
+    cusips = first_rows['CUSIP'].to_numpy(dtype=object) if 'CUSIP' in holdings_df \
+        else np.full(count, None, dtype=object)
+    put_calls = first_rows['Put/Call'].to_numpy(dtype=object) if 'Put/Call' in holdings_df \
+        else np.full(count, None, dtype=object)
+    put_calls = np.array([put_call if isinstance(put_call, str) and put_call else None for put_call in put_calls],
+                         dtype=object)
+    labels = np.array([position_label(company_name, put_call)
+                       for company_name, put_call in zip(company_names, put_calls)], dtype=object)
+    return {'Company Name': labels, 'CUSIP': cusips, 'Put/Call': put_calls}
+
+
+def diff_positions(holdings_df: 'pd.DataFrame', current_accession: str,
+                   previous_accession: Optional[str]) -> 'pd.DataFrame':
+    """
+    Compare the positions of two submissions.
+
+    Lines of the same position are summed before the comparison, so every position appears exactly once:
+    first those held in the current submission, then the closed ones, each ordered by name, CUSIP and put/call.
+
+    Args:
+        holdings_df (pd.DataFrame): Holdings with the columns of `fetch_and_process_holdings`.
+        current_accession (str): The accession number of the newer submission.
+        previous_accession (Optional[str]): The accession number of the older submission, if there is one.
+
+    Returns:
+        pd.DataFrame: One row per position with the `DIFF_COLUMNS`.
+    """
+    submission = map_codes(holdings_df['Accession Number'], {current_accession: 0, previous_accession: 1})
+    current_rows = np.flatnonzero(submission == 0)
+    previous_rows = np.flatnonzero(submission == 1)
+
+    # Current rows first, so positions are described by their newest filing
+    frame = holdings_df.iloc[np.concatenate([current_rows, previous_rows])]
+    codes, count = encode_positions(frame)
+    is_current = np.arange(len(frame)) < len(current_rows)
+    values = frame['Value (USD)'].to_numpy(dtype=float)
+    shares = frame['Share Amount'].to_numpy(dtype=float)
+
+    def total(weights: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        return np.bincount(codes[rows], weights=weights[rows], minlength=count)
+
+    in_current = np.bincount(codes[is_current], minlength=count) > 0
+    in_previous = np.bincount(codes[~is_current], minlength=count) > 0
+    current_shares = total(shares, is_current)
+    previous_shares = total(shares, ~is_current)
+    current_values = total(values, is_current)
+    previous_values = total(values, ~is_current)
+
+    share_amount = np.where(in_current, current_shares, 0.0)
+    change_amount = share_amount - previous_shares
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_percentage = np.where(previous_shares != 0, change_amount / previous_shares * 100,
+                                     np.where(share_amount > 0, 100.0, 0.0))
+    change_percentage = np.where(in_current, change_percentage, -100.0)
+
+    change_status = np.full(count, 'No Change', dtype=object)
+    change_status[share_amount > previous_shares] = 'Increased'
+    change_status[share_amount < previous_shares] = 'Decreased'
+    change_status[~in_previous] = 'New Investment'
+    change_status[~in_current] = 'Position Closed'
+
+    diff_df = pd.DataFrame({
+        **describe_positions(frame, codes, count),
+        # Closed positions keep the value and accession number of the filing they were last reported in
+        'Value (USD)': np.where(in_current, current_values, previous_values).astype(np.int64),
+        'Share Amount': share_amount.astype(np.int64),
+        'Accession Number': np.where(in_current, current_accession, previous_accession).astype(object),
+        'Previous Share Amount': previous_shares.astype(np.int64),
+        'New Company': ~in_previous,
+        'Change Amount': change_amount.astype(np.int64),
+        'Change Percentage': np.round(change_percentage, 1),
+        'Change Status': change_status,
+    })[DIFF_COLUMNS]
+
+    sort_columns = ['Company Name', 'CUSIP', 'Put/Call']
+    return pd.concat([diff_df[in_current].sort_values(sort_columns, kind='stable'),
+                      diff_df[~in_current].sort_values(sort_columns, kind='stable')], ignore_index=True)
+
+
+def monitor_matrix(holdings_df: 'pd.DataFrame', monitor_columns: List[Tuple[str, str]]) -> 'pd.DataFrame':
+    """
+    Build the share amounts of every position per submission.
+
+    Args:
+        holdings_df (pd.DataFrame): Holdings with the columns of `fetch_and_process_holdings`.
+        monitor_columns (List[Tuple[str, str]]): Pairs of accession number and column name, as returned by
+            `get_monitor_columns`.
+
+    Returns:
+        pd.DataFrame: One row per position, ordered by name, CUSIP and put/call, with the 'Company Name' and
+            one share amount column per submission in the order of `monitor_columns`.
+    """
+    column_names = [column_name for _, column_name in monitor_columns]
+    column_index = {accession_number: index for index, (accession_number, _) in enumerate(monitor_columns)}
+    columns = map_codes(holdings_df['Accession Number'], column_index)
+    known = columns >= 0
+
+    # Normally every row belongs to a column, and the frame is used as it is instead of being copied
+    frame = holdings_df if known.all() else holdings_df[known]
+    columns = columns[known]
+    if frame.empty:
+        return pd.DataFrame(columns=['Company Name'] + column_names)
+
+    codes, count = encode_positions(frame)
+    cells = np.bincount(codes * len(column_names) + columns,
+                        weights=frame['Share Amount'].to_numpy(dtype=float),
+                        minlength=count * len(column_names)).reshape(count, len(column_names))
+
+    positions = describe_positions(frame, codes, count)
+    matrix_df = pd.DataFrame(cells.astype(np.int64), columns=column_names)
+    matrix_df.insert(0, 'Company Name', positions['Company Name'])
+    order = pd.DataFrame(positions).sort_values(['Company Name', 'CUSIP', 'Put/Call'], kind='stable').index
+    return matrix_df.iloc[order].reset_index(drop=True)
+
@@ -0,0 +1,220 @@
+import csv
+import tempfile
+from collections import defaultdict
+from io import StringIO
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from flask import Response, send_file, stream_with_context
+
+from .amendments import apply_amendment
+from .database import db
+from .diffs import position_key, position_label
+from .lazy import LazyImport
+from .models import FundHoldings, Submission
+from .utils import get_monitor_columns
+
+Workbook = LazyImport('openpyxl', 'Workbook')
+
+# Number of rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+# Number of CSV rows buffered before a chunk is sent to the client
+CSV_ROWS_PER_CHUNK = 500
+
+SUBMISSION_HOLDINGS_HEADER = ['Company Name', 'Value (USD)', 'Share Amount', 'CUSIP', 'Accession Number',
+                              'Period']
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+    """
+    Serialize rows to CSV chunk by chunk.
+
+    Only one chunk of rows is held in memory at a time, so the output can be streamed as it is produced.
+
+    Args:
+        header (Sequence[str]): The header row.
+        rows (Iterable[Sequence[Any]]): The data rows.
+
+    Yields:
+        str: CSV text chunks.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    for number, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if number % CSV_ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+
+def write_xlsx(header: Sequence[str], rows: Iterable[Sequence[Any]], sheet_title: str) -> Any:
+    """
+    Write rows to an XLSX workbook in write-only mode.
+
+    Write-only worksheets flush every appended row to a temporary file, so memory use does not grow with the
+    number of rows. The finished workbook is kept in a spooled temporary file that moves to disk when large.
+
+    Args:
+        header (Sequence[str]): The header row.
+        rows (Iterable[Sequence[Any]]): The data rows.
+        sheet_title (str): The worksheet title.
+
+    Returns:
+        Any: A file object positioned at the start of the workbook.
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=sheet_title[:31])
+    worksheet.append(list(header))
+    for row in rows:
+        worksheet.append(list(row))
+
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def iter_submission_holdings_rows(submission: Submission) -> Iterator[Sequence[Any]]:
+    """
+    Stream the holdings of a submission from a server-side cursor.
+
+    Args:
+        submission (Submission): The submission.
+
+    Yields:
+        Sequence[Any]: One row per holding, in the order of SUBMISSION_HOLDINGS_HEADER.
+    """
+    query = db.session.query(FundHoldings.company_name, FundHoldings.value_usd, FundHoldings.share_amount,
+                             FundHoldings.cusip, FundHoldings.accession_number, FundHoldings.period_of_portfolio) \
+        .filter(FundHoldings.accession_number == submission.accession_number,
+                FundHoldings.period_of_portfolio == submission.period_of_portfolio) \
+        .order_by(FundHoldings.company_name, FundHoldings.id) \
+        .yield_per(EXPORT_BATCH_SIZE)
+    for row in query:
+        yield tuple(row)
+
+
+def get_monitor_export_header(all_submissions: List[Dict[str, Any]]) -> List[str]:
+    """
+    Get the header of the monitor matrix export, oldest period first as on the monitor page.
+
+    Args:
+        all_submissions (List[Dict[str, Any]]): The processed submissions, newest first.
+
+    Returns:
+        List[str]: The header row: the position's name, its CUSIP and one column per submission.
+    """
+    return ['Company Name', 'CUSIP'] + [column_name for _, column_name in get_monitor_columns(all_submissions)][::-1]
+
+
+def iter_monitor_rows(all_submissions: List[Dict[str, Any]],
+                      chains: Optional[List[List[Submission]]] = None) -> Iterator[List[Any]]:
+    """
+    Stream the monitor matrix row by row from a server-side cursor.
+
+    Rows are the positions of the monitor page (see `diffs.encode_positions`): a CUSIP together with the
+    put/call flag of option lines, or the company name for holdings without a usable CUSIP. Holdings are read
+    ordered by CUSIP, put/call and company name, so the lines of a position arrive together and its row is
+    emitted as soon as the next position starts. Holdings without a usable CUSIP are few; they are collected
+    and emitted last. Share amounts listed several times for the same position and submission are summed.
+
+    Args:
+        all_submissions (List[Dict[str, Any]]): The processed submissions, newest first.
+        chains (Optional[List[List[Submission]]]): The filing chains of the fund (see
+            `amendments.get_filing_chains`). The column of an amended filing shows its effective holdings.
+
+    Yields:
+        List[Any]: One row per position, in the order of `get_monitor_export_header`. The name is the one of
+            the newest submission holding the position, marked with the put/call flag of option lines.
+    """
+    monitor_columns = get_monitor_columns(all_submissions)[::-1]
+    column_index = {accession_number: index for index, (accession_number, _) in enumerate(monitor_columns)}
+    if not column_index:
+        return
+
+    # The submissions of amended columns, in filing order
+    amended_columns = {chain[-1].accession_number: chain for chain in chains or []
+                       if len(chain) > 1 and chain[-1].accession_number in column_index}
+    # The column every read submission contributes to
+    row_columns = dict(column_index)
+    for accession_number, chain in amended_columns.items():
+        for submission in chain[:-1]:
+            row_columns[submission.accession_number] = column_index[accession_number]
+
+    # The period predicate lets PostgreSQL prune the partitions of other periods
+    periods = [period for period, in db.session.query(Submission.period_of_portfolio)
+               .filter(Submission.accession_number.in_(list(row_columns))).distinct()]
+    query = db.session.query(FundHoldings.company_name, FundHoldings.accession_number, FundHoldings.share_amount,
+                             FundHoldings.value_usd, FundHoldings.cusip, FundHoldings.put_call) \
+        .filter(FundHoldings.accession_number.in_(list(row_columns)),
+                FundHoldings.period_of_portfolio.in_(periods)) \
+        .order_by(FundHoldings.cusip, FundHoldings.put_call, FundHoldings.company_name) \
+        .yield_per(EXPORT_BATCH_SIZE)
+
+    def matrix_row(position_rows: List[Any]) -> Optional[List[Any]]:
+        share_amounts = [0] * len(monitor_columns)
+        amended_rows = defaultdict(lambda: defaultdict(lambda: (0.0, 0.0)))
+        for row in position_rows:
+            if row.accession_number not in amended_columns and row.accession_number in column_index:
+                share_amounts[column_index[row.accession_number]] += int(row.share_amount or 0)
+                continue
+            key = (row.company_name, row.cusip, row.put_call)
+            value, share_amount = amended_rows[row.accession_number][key]
+            amended_rows[row.accession_number][key] = (value + (row.value_usd or 0.0),
+                                                       share_amount + (row.share_amount or 0.0))
+        for accession_number, chain in amended_columns.items():
+            positions = {}
+            for submission in chain:
+                positions = apply_amendment(positions, amended_rows.get(submission.accession_number, {}),
+                                            submission.amendment_type)
+            share_amounts[column_index[accession_number]] += int(sum(amount for _, amount in positions.values()))
+        # Positions that were all closed by amendments have no row
+        if not any(share_amounts) and amended_columns:
+            return None
+        newest = max(position_rows, key=lambda row: row_columns[row.accession_number])
+        return [position_label(newest.company_name, newest.put_call), newest.cusip] + share_amounts
+
+    unidentified = defaultdict(list)
+    for key, position_rows in groupby(query, key=lambda row: position_key(row.company_name, row.cusip, row.put_call)):
+        if key[0] is None:
+            unidentified[key].extend(position_rows)
+            continue
+        row = matrix_row(list(position_rows))
+        if row:
+            yield row
+    for position_rows in unidentified.values():
+        row = matrix_row(position_rows)
+        if row:
+            yield row
+
+
+def export_response(header: Sequence[str], rows: Iterable[Sequence[Any]], file_format: str,
+                    filename: str) -> Response:
+    """
+    Build a download response for streamed rows.
+
+    CSV is streamed to the client while the rows are read. XLSX is a zip archive that can only be sent once
+    it is complete, so it is written with the constant-memory writer first and then sent in chunks.
+
+    Args:
+        header (Sequence[str]): The header row.
+        rows (Iterable[Sequence[Any]]): The data rows.
+        file_format (str): Either 'csv' or 'xlsx'.
+        filename (str): The download file name without extension.
+
+    Returns:
+        Response: The file download response.
+    """
+    if file_format == 'csv':
+        return Response(stream_with_context(iter_csv(header, rows)), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename={filename}.csv'})
+
+    output = write_xlsx(header, rows, filename)
+    return send_file(output, as_attachment=True, download_name=f'{filename}.xlsx',
+                     mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
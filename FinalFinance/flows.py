@@ -0,0 +1,236 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, func, insert
+
+from .amendments import get_effective_periods, is_stored_in_full, read_positions_after
+from .database import db
+from .models import FundHoldings, SecurityFlow, Submission
+
+logger = logging.getLogger('sLogger')
+
+# Company name, share amount and value in USD of a security in one submission
+Position = Tuple[str, float, float]
+
+
+def is_valid_cusip(cusip: Optional[str]) -> bool:
+    """
+    Tell whether a CUSIP identifies a security; filings use placeholders such as 'N/A' or zeros when it is unknown.
+    """
+    return bool(cusip) and len(cusip) == 9 and cusip != '000000000'
+
+
+def get_period_submissions(cik: str) -> List[List[Submission]]:
+    """
+    Get the submissions with the effective holdings of every reporting period of a fund, oldest period first.
+    A period has one submission per original filing, e.g. one per series of a trust, in filing order.
+    Amendments replace the submission of the filing they amend.
+    """
+    periods = get_effective_periods(Submission.query.filter_by(cik=cik).all())
+    return [periods[period] for period in sorted(periods)]
+
+
+def get_cusip_positions(submission: Submission) -> Dict[str, Position]:
+    """
+    Get the positions of a submission summed per CUSIP. Option lines are left out, as their share amount is
+    the notional of the underlying security rather than shares bought or sold.
+
+    Args:
+        submission (Submission): The submission.
+
+    Returns:
+        Dict[str, Position]: The company name, share amount and value per CUSIP.
+    """
+    if not is_stored_in_full(submission):
+        positions = {}
+        for (company_name, cusip, put_call), (value, shares) in read_positions_after(submission).items():
+            if put_call is None and is_valid_cusip(cusip):
+                previous_name, previous_shares, previous_value = positions.get(cusip, (company_name, 0.0, 0.0))
+                positions[cusip] = (max(previous_name or '', company_name or ''), previous_shares + shares,
+                                    previous_value + value)
+        return positions
+
+    rows = db.session.query(FundHoldings.cusip, func.max(FundHoldings.company_name),
+                            func.sum(FundHoldings.share_amount), func.sum(FundHoldings.value_usd)) \
+        .filter(FundHoldings.period_of_portfolio == submission.period_of_portfolio,
+                FundHoldings.accession_number == submission.accession_number,
+                FundHoldings.put_call.is_(None)) \
+        .group_by(FundHoldings.cusip).all()
+    return {cusip: (company_name, shares or 0.0, value or 0.0) for cusip, company_name, shares, value in rows
+            if is_valid_cusip(cusip)}
+
+
+def get_period_positions(submissions: List[Submission]) -> Dict[str, Position]:
+    """
+    Get the positions of a period summed per CUSIP over its submissions, see `get_cusip_positions`.
+    """
+    positions = {}
+    for submission in submissions:
+        for cusip, (company_name, shares, value) in get_cusip_positions(submission).items():
+            previous_name, previous_shares, previous_value = positions.get(cusip, (company_name, 0.0, 0.0))
+            positions[cusip] = (max(previous_name or '', company_name or ''), previous_shares + shares,
+                                previous_value + value)
+    return positions
+
+
+def compute_security_flows(positions: Dict[str, Position], previous_positions: Dict[str, Position]) \
+        -> List[Dict[str, Any]]:
+    """
+    Compare the positions of two consecutive periods of a fund.
+
+    The dollar flow is the share change valued at the reported price per share (of the newer period, or of the
+    older one for closed positions), so price moves of an unchanged position do not count as buying.
+
+    Args:
+        positions (Dict[str, Position]): The positions of the newer period.
+        previous_positions (Dict[str, Position]): The positions of the older period.
+
+    Returns:
+        List[Dict[str, Any]]: One flow per security whose share amount changed.
+    """
+    flows = []
+    for cusip in positions.keys() | previous_positions.keys():
+        company_name, shares, value = positions.get(cusip) or (previous_positions[cusip][0], 0.0, 0.0)
+        _, previous_shares, previous_value = previous_positions.get(cusip) or (company_name, 0.0, 0.0)
+        shares_change = shares - previous_shares
+        if not shares_change:
+            continue
+
+        if shares:
+            price = value / shares
+        else:
+            price = previous_value / previous_shares if previous_shares else 0.0
+
+        if cusip not in previous_positions:
+            change_status = 'New'
+        elif cusip not in positions:
+            change_status = 'Closed'
+        else:
+            change_status = 'Increased' if shares_change > 0 else 'Decreased'
+
+        flows.append({'cusip': cusip, 'company_name': company_name, 'shares_change': shares_change,
+                      'value_change': shares_change * price, 'change_status': change_status})
+    return flows
+
+
+def store_security_flows(submission: Submission, previous_submission: Submission,
+                         positions: Dict[str, Position], previous_positions: Dict[str, Position]) -> int:
+    """
+    Replace the stored flows of a fund's period. Periods whose holdings are no longer stored, e.g. archived
+    ones, keep their flows.
+
+    Returns:
+        int: The number of stored flows.
+    """
+    if not positions or not previous_positions:
+        return 0
+
+    db.session.query(SecurityFlow).filter_by(cik=submission.cik, period_of_portfolio=submission.period_of_portfolio) \
+        .delete(synchronize_session=False)
+    flows = compute_security_flows(positions, previous_positions)
+    if flows:
+        db.session.execute(insert(SecurityFlow), [
+            {**flow, 'cik': submission.cik, 'period_of_portfolio': submission.period_of_portfolio,
+             'accession_number': submission.accession_number,
+             'previous_accession_number': previous_submission.accession_number}
+            for flow in flows])
+    return len(flows)
+
+
+def refresh_security_flows(cik: str, period_of_portfolio: str) -> None:
+    """
+    Update the flows affected by an ingested submission: those of its period and of the following period,
+    which is measured against it.
+
+    Args:
+        cik (str): The CIK of the fund.
+        period_of_portfolio (str): The reporting period of the ingested submission.
+    """
+    periods = get_period_submissions(cik)
+    index = next((i for i, submissions in enumerate(periods)
+                  if submissions[0].period_of_portfolio == period_of_portfolio), None)
+    if index is None:
+        return
+
+    positions_cache: Dict[int, Dict[str, Position]] = {}
+
+    def positions_of(period_index: int) -> Dict[str, Position]:
+        if period_index not in positions_cache:
+            positions_cache[period_index] = get_period_positions(periods[period_index])
+        return positions_cache[period_index]
+
+    # Flows are labeled with the latest filed submission of each period
+    for current in range(max(index, 1), min(index + 2, len(periods))):
+        store_security_flows(periods[current][-1], periods[current - 1][-1], positions_of(current),
+                             positions_of(current - 1))
+    db.session.commit()
+
+
+def rebuild_security_flows(cik: Optional[str] = None) -> int:
+    """
+    Recompute the flows of every period of one fund or of all funds.
+
+    Args:
+        cik (Optional[str]): The CIK of the fund, or None for all funds.
+
+    Returns:
+        int: The number of stored flows.
+    """
+    ciks = [cik] if cik else [row[0] for row in db.session.query(Submission.cik).distinct()]
+    count = 0
+    for fund_cik in ciks:
+        previous_submission, previous_positions = None, {}
+        for submissions in get_period_submissions(fund_cik):
+            submission, positions = submissions[-1], get_period_positions(submissions)
+            if previous_submission:
+                count += store_security_flows(submission, previous_submission, positions, previous_positions)
+            previous_submission, previous_positions = submission, positions
+        db.session.commit()
+    return count
+
+
+def get_consensus_leaderboard(limit: int = 10, period_of_portfolio: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Rank securities by the net dollars all tracked funds added or removed in a reporting period.
+
+    Args:
+        limit (int): Number of securities in each list.
+        period_of_portfolio (Optional[str]): The reporting period, the latest one with flows by default.
+
+    Returns:
+        Dict[str, Any]: The 'period' and the 'bought' and 'sold' lists, each entry with the CUSIP, company name,
+            net share and dollar change and the number of buying and selling funds.
+    """
+    period_of_portfolio = period_of_portfolio or db.session.query(func.max(SecurityFlow.period_of_portfolio)).scalar()
+    leaderboard = {'period': period_of_portfolio, 'bought': [], 'sold': []}
+    if not period_of_portfolio:
+        return leaderboard
+
+    value_change = func.sum(SecurityFlow.value_change)
+    query = db.session.query(SecurityFlow.cusip,
+                             func.max(SecurityFlow.company_name).label('company_name'),
+                             func.sum(SecurityFlow.shares_change).label('shares_change'),
+                             value_change.label('value_change'),
+                             func.sum(case((SecurityFlow.shares_change > 0, 1), else_=0)).label('buyers'),
+                             func.sum(case((SecurityFlow.shares_change < 0, 1), else_=0)).label('sellers')) \
+        .filter(SecurityFlow.period_of_portfolio == period_of_portfolio) \
+        .group_by(SecurityFlow.cusip)
+
+    leaderboard['bought'] = [row._asdict() for row in
+                             query.having(value_change > 0).order_by(value_change.desc()).limit(limit)]
+    leaderboard['sold'] = [row._asdict() for row in
+                           query.having(value_change < 0).order_by(value_change.asc()).limit(limit)]
+    return leaderboard
+
+
+@click.command('rebuild-security-flows')
+@click.option('--cik', default=None, help='Only rebuild the flows of this fund.')
+@with_appcontext
+def rebuild_security_flows_command(cik: Optional[str]) -> None:
+    """
+    Recompute the per-fund security flows behind the consensus leaderboard from the stored holdings.
+    """
+    count = rebuild_security_flows(cik)
+    click.echo(f'Stored {count} security flows.')
@@ -0,0 +1,138 @@
+from array import array
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Select, select
+
+from .database import db
+from .lazy import LazyImport
+from .models import FundHoldings, Submission
+
+pd = LazyImport('pandas')
+
+HOLDINGS_COLUMNS = ['Company Name', 'Value (USD)', 'Share Amount', 'Accession Number', 'CUSIP', 'Put/Call']
+
+# Columns stored as categoricals: few distinct values repeated over many rows
+CATEGORICAL_COLUMNS = ['Company Name', 'Accession Number', 'CUSIP', 'Put/Call']
+
+# Rows fetched from the database cursor at a time
+HOLDINGS_BATCH_SIZE = 10000
+
+
+class CategoryEncoder:
+    """
+    Dictionary-encode a column of strings while it is read, so each distinct value is kept in memory once.
+
+    Attributes:
+        codes (array): The code of every value added, -1 for None.
+        index (Dict[Hashable, int]): The code of every distinct value, in order of first appearance.
+    """
+
+    def __init__(self):
+        self.codes = array('q')
+        self.index: Dict[Hashable, int] = {}
+
+    def add(self, value: Optional[Hashable]) -> None:
+        """
+        Append a value to the column.
+        """
+        if value is None:
+            self.codes.append(-1)
+            return
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.index)
+        self.codes.append(code)
+
+    def categorical(self) -> 'pd.Categorical':
+        """
+        Get the column as a categorical whose categories are sorted, so sorting by codes sorts by value.
+        """
+        values = list(self.index)
+        order = sorted(range(len(values)), key=values.__getitem__)
+        # The sorted position of every code, with -1 (missing) kept as -1
+        rank = np.full(len(values) + 1, -1, dtype=np.int64)
+        rank[order] = np.arange(len(values))
+        codes = rank[np.frombuffer(self.codes, dtype=np.int64)] if self.codes else np.empty(0, dtype=np.int64)
+        return pd.Categorical.from_codes(codes, categories=[values[i] for i in order])
+
+
+def read_holdings_frame(statement: Select) -> 'pd.DataFrame':
+    """
+    Read holdings into a compact DataFrame.
+
+    Rows are streamed from the cursor in batches and encoded on the fly: the string columns become categoricals
+    and the numbers float64 arrays, so neither ORM objects nor per-row Python strings are kept for the whole
+    result. The frame is ordered by company name and then by accession number, newest first.
+
+    Args:
+        statement (Select): A query returning the company name, value in USD, share amount, accession number,
+            CUSIP and put/call flag of every holding, in this order.
+
+    Returns:
+        pd.DataFrame: The holdings with the `HOLDINGS_COLUMNS`.
+    """
+    encoders = {column: CategoryEncoder() for column in CATEGORICAL_COLUMNS}
+    values, share_amounts = array('d'), array('d')
+
+    result = db.session.execute(statement.execution_options(yield_per=HOLDINGS_BATCH_SIZE))
+    for company_name, value_usd, share_amount, accession_number, cusip, put_call in result:
+        encoders['Company Name'].add(company_name)
+        values.append(value_usd or 0.0)
+        share_amounts.append(share_amount or 0.0)
+        encoders['Accession Number'].add(accession_number)
+        encoders['CUSIP'].add(cusip)
+        encoders['Put/Call'].add(put_call)
+
+    columns: Dict[str, Any] = {column: encoder.categorical() for column, encoder in encoders.items()}
+    columns['Value (USD)'] = np.frombuffer(values, dtype=np.float64) if values else np.empty(0)
+    columns['Share Amount'] = np.frombuffer(share_amounts, dtype=np.float64) if share_amounts else np.empty(0)
+
+    order = np.lexsort((-columns['Accession Number'].codes, columns['Company Name'].codes))
+    return pd.DataFrame({column: columns[column].take(order) for column in HOLDINGS_COLUMNS})
+
+
+def read_submission_holdings(submissions: List[Submission]) -> 'pd.DataFrame':
+    """
+    Read the holdings of the given submissions with `read_holdings_frame`.
+    """
+    accession_numbers = [submission.accession_number for submission in submissions]
+    # Constraining the periods as well lets PostgreSQL skip the partitions of other quarters
+    periods = {submission.period_of_portfolio for submission in submissions}
+    return read_holdings_frame(
+        select(FundHoldings.company_name, FundHoldings.value_usd, FundHoldings.share_amount,
+               FundHoldings.accession_number, FundHoldings.cusip, FundHoldings.put_call)
+        .where(FundHoldings.period_of_portfolio.in_(periods), FundHoldings.accession_number.in_(accession_numbers)))
+
+
+def compact_holdings_frame(holdings_df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """
+    Convert a holdings frame with string columns into the compact representation of `read_holdings_frame`.
+    """
+    return holdings_df.astype({column: 'category' for column in CATEGORICAL_COLUMNS if column in holdings_df})
+
+
+def category_codes(series: 'pd.Series') -> Tuple[np.ndarray, 'pd.Index']:
+    """
+    Get integer codes and the distinct values of a column, reusing the codes of categorical columns.
+
+    Returns:
+        Tuple[np.ndarray, pd.Index]: The code of every row (-1 for missing values) and the values of the codes.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(dtype=np.int64), series.cat.categories
+    codes, uniques = pd.factorize(series.to_numpy(dtype=object))
+    return codes.astype(np.int64), pd.Index(uniques, dtype=object)
+
+
+def map_codes(series: 'pd.Series', mapping: Dict[Hashable, int]) -> np.ndarray:
+    """
+    Map the values of a column to integers through their codes, looking up every distinct value once.
+
+    Returns:
+        np.ndarray: The mapped value of every row, -1 for values missing from the mapping.
+    """
+    codes, uniques = category_codes(series)
+    # The extra last entry is what code -1 (a missing value) picks
+    mapped = np.array([mapping.get(value, -1) for value in uniques] + [-1], dtype=np.int64)
+    return mapped[codes]
@@ -0,0 +1,188 @@
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from flask import current_app, has_app_context
+
+from .frames import read_submission_holdings
+from .instrumentation import metrics
+from .lazy import LazyImport
+from .models import Submission
+
+pd = LazyImport('pandas')
+
+logger = logging.getLogger('sLogger')
+
+metrics.describe('holdings_cache_requests_total', 'counter', 'Holdings cache lookups by result (hit, miss, stale).')
+
+# Number of mapped holdings frames a worker process keeps converted, least recently used first
+MAPPED_FRAMES_SIZE = 64
+
+# Converted frames keyed by file path, with the identity of the file and its high-water mark
+_mapped_frames: 'OrderedDict[str, Tuple[Tuple[int, int], str, pd.DataFrame]]' = OrderedDict()
+_mapped_frames_lock = threading.Lock()
+
+
+def get_cache_dir() -> Optional[str]:
+    """
+    Get the directory of the holdings cache, or None if the cache is disabled or pyarrow is not installed.
+    """
+    directory = current_app.config.get('HOLDINGS_CACHE_DIR') if has_app_context() else None
+    if not directory:
+        return None
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    return directory
+
+
+def get_cache_path(directory: str, cik: str) -> Optional[str]:
+    """
+    Get the cache file of a fund, or None if the CIK cannot be a file name.
+    """
+    return os.path.join(directory, f'{cik}.arrow') if cik and cik.isdigit() else None
+
+
+def get_high_water_mark(submissions: List[Submission]) -> str:
+    """
+    Identify the stored filings of a fund by its highest accession number and its number of submissions, so
+    newly ingested filings, including older ones that arrive late, invalidate the cached holdings.
+    """
+    if not submissions:
+        return ''
+    return f'{max(submission.accession_number for submission in submissions)}/{len(submissions)}'
+
+
+def write_cached_holdings(cik: str, submissions: List[Submission], holdings_df: 'pd.DataFrame') -> Optional[str]:
+    """
+    Store the holdings frame of a fund as an uncompressed Arrow IPC (Feather v2) file.
+
+    The file is written next to its final path and renamed into place, so readers see either the old or the
+    new file and processes still mapping the old one keep a valid mapping.
+
+    Args:
+        cik (str): The CIK of the fund.
+        submissions (List[Submission]): The submissions the holdings belong to.
+        holdings_df (pd.DataFrame): The holdings frame from `read_submission_holdings`.
+
+    Returns:
+        Optional[str]: The path of the file, or None if the cache is disabled or the file could not be written.
+    """
+    directory = get_cache_dir()
+    path = get_cache_path(directory, cik) if directory else None
+    if not path:
+        return None
+
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(holdings_df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           b'high_water_mark': get_high_water_mark(submissions).encode()})
+    try:
+        os.makedirs(directory, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=directory, prefix=f'{cik}.', suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file, pa.ipc.new_file(file, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    except OSError as e:
+        logger.warning(f'Could not write the holdings cache of CIK {cik}: {e}')
+        return None
+    return path
+
+
+def read_cached_holdings(cik: str, submissions: List[Submission]) -> Optional['pd.DataFrame']:
+    """
+    Get the cached holdings frame of a fund if it is as recent as the given submissions.
+
+    The file is memory-mapped, so the pages are shared by every worker process through the OS page cache and
+    the numeric columns are used without copying. Each process keeps its converted frames for as long as the
+    file is unchanged. The returned frame is shared and must not be modified.
+
+    Args:
+        cik (str): The CIK of the fund.
+        submissions (List[Submission]): The stored submissions of the fund.
+
+    Returns:
+        Optional[pd.DataFrame]: The holdings, or None if the cache is disabled, missing or stale.
+    """
+    directory = get_cache_dir()
+    path = get_cache_path(directory, cik) if directory else None
+    if not path:
+        return None
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        metrics.inc('holdings_cache_requests_total', result='miss')
+        return None
+    file_id = (stat.st_ino, stat.st_mtime_ns)
+
+    with _mapped_frames_lock:
+        cached = _mapped_frames.get(path)
+        if cached is not None and cached[0] == file_id:
+            _mapped_frames.move_to_end(path)
+
+    if cached is None or cached[0] != file_id:
+        import pyarrow as pa
+
+        try:
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning(f'Could not read the holdings cache of CIK {cik}: {e}')
+            metrics.inc('holdings_cache_requests_total', result='miss')
+            return None
+        high_water_mark = (table.schema.metadata or {}).get(b'high_water_mark', b'').decode()
+        cached = (file_id, high_water_mark, table.to_pandas(split_blocks=True))
+        with _mapped_frames_lock:
+            _mapped_frames[path] = cached
+            while len(_mapped_frames) > MAPPED_FRAMES_SIZE:
+                _mapped_frames.popitem(last=False)
+
+    if cached[1] != get_high_water_mark(submissions):
+        metrics.inc('holdings_cache_requests_total', result='stale')
+        return None
+    metrics.inc('holdings_cache_requests_total', result='hit')
+    return cached[2]
+
+
+def refresh_holdings_cache(cik: str) -> None:
+    """
+    Rewrite the cached holdings of a fund after one of its filings was ingested. Funds that are not cached
+    yet are left to be cached by their first read, so bulk ingestion does not write a file per fund.
+
+    Args:
+        cik (str): The CIK of the fund.
+    """
+    directory = get_cache_dir()
+    path = get_cache_path(directory, cik) if directory else None
+    if not path or not os.path.exists(path):
+        return
+
+    submissions = Submission.query.filter_by(cik=cik).all()
+    write_cached_holdings(cik, submissions, read_submission_holdings(submissions))
+
+
+def clear_holdings_cache() -> None:
+    """
+    Remove every cached holdings file, e.g. after holdings were archived without new submissions.
+    """
+    with _mapped_frames_lock:
+        _mapped_frames.clear()
+
+    directory = get_cache_dir()
+    if not directory or not os.path.isdir(directory):
+        return
+    for file_name in os.listdir(directory):
+        if file_name.endswith('.arrow'):
+            try:
+                os.remove(os.path.join(directory, file_name))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,173 @@
+import hashlib
+from datetime import date
+from functools import wraps
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from flask import Response, current_app, make_response, request, session
+from flask.globals import request_ctx
+from flask_login import current_user
+from sqlalchemy import func
+
+from .cache import CacheNamespace
+from .database import db
+from .instrumentation import metrics
+from .models import FundData, FundSummary, Submission
+from .snapshots import get_panel_state, get_snapshot_version
+from .utils import get_rss_feed_version, revalidate_rss_feeds
+
+metrics.describe('http_cache_requests_total', 'counter',
+                 'Cacheable page requests by result (not_modified, hit, miss, bypass).')
+
+
+def get_page_cache() -> Optional[CacheNamespace]:
+    """
+    Get the namespace of rendered pages, bounded by HTTP_CACHE_MAX_BYTES, or None if that disables it.
+    """
+    max_bytes = current_app.config.get('HTTP_CACHE_MAX_BYTES', 0)
+    if max_bytes <= 0:
+        return None
+    return CacheNamespace('pages', max_bytes=max_bytes)
+
+
+def get_submissions_version(cik: Optional[str] = None) -> Tuple[Any, ...]:
+    """
+    Identify the stored submissions of a fund, or of all funds, by the latest accession number and their number.
+    Every ingested filing changes it.
+    """
+    query = db.session.query(func.max(Submission.accession_number), func.count(Submission.id))
+    if cik:
+        query = query.filter(Submission.cik == cik)
+    return tuple(query.one())
+
+
+def get_fund_version(cik: str) -> Tuple[Any, ...]:
+    """
+    Identify the data shown on the details page of a fund: its submissions and the last update of its summaries.
+    """
+    summaries_updated_at = db.session.query(func.max(FundSummary.updated_at)).filter(FundSummary.cik == cik).scalar()
+    return get_submissions_version(cik) + (summaries_updated_at,)
+
+
+def get_funds_version() -> Tuple[Any, ...]:
+    """
+    Identify the searchable funds by their number.
+    """
+    return (db.session.query(func.count(FundData.id)).scalar(),)
+
+
+def compute_etag(*parts: Hashable) -> str:
+    """
+    Hash the parts a page depends on into an ETag.
+    """
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def get_cache_control() -> str:
+    """
+    Get the Cache-Control header of a cacheable page. Pages of logged-in users show their name and must only be
+    kept by their browser; anonymous pages may be shared by reverse proxies for HTTP_CACHE_SHARED_MAX_AGE seconds.
+    Browsers always revalidate, which costs a 304 while the data is unchanged.
+    """
+    if current_user.is_authenticated:
+        return 'private, no-cache'
+    return f"public, max-age=0, s-maxage={current_app.config['HTTP_CACHE_SHARED_MAX_AGE']}"
+
+
+def finish_cached_response(response: Response, etag: str) -> Response:
+    """
+    Add the validator and caching headers to a page response.
+    """
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = get_cache_control()
+    # Login and flashed messages live in the session cookie
+    response.vary.add('Cookie')
+    return response
+
+
+def cached_page(version: Callable[..., Optional[Tuple[Hashable, ...]]]) -> Callable:
+    """
+    Decorator answering GET requests of a public page from the data version it depends on.
+
+    The ETag is computed from the page URL, the logged-in user and `version`, called with the view arguments.
+    Requests whose If-None-Match matches are answered with 304 without running the view, and a rendered page
+    with a known ETag is served from the page cache. Requests with pending flashed messages and responses that
+    flash, change the session or are streamed are neither answered from nor stored in the cache.
+
+    Args:
+        version (Callable[..., Optional[Tuple[Hashable, ...]]]): Computes the version of the data the page
+            shows with a few cheap reads, or returns None when the page must not be cached.
+
+    Returns:
+        Callable: The decorated view.
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            data_version = version(*args, **kwargs) if request.method in ('GET', 'HEAD') \
+                and '_flashes' not in session else None
+            if data_version is None:
+                metrics.inc('http_cache_requests_total', result='bypass')
+                return view(*args, **kwargs)
+
+            user_key = current_user.get_id() if current_user.is_authenticated else None
+            etag = compute_etag(request.full_path, user_key, data_version)
+            if etag in request.if_none_match:
+                metrics.inc('http_cache_requests_total', result='not_modified')
+                return finish_cached_response(Response(status=304), etag)
+
+            page_cache = get_page_cache()
+            page = page_cache.get(etag) if page_cache is not None else None
+            if page is not None:
+                metrics.inc('http_cache_requests_total', result='hit')
+                return finish_cached_response(Response(page[0], mimetype=page[1]), etag)
+
+            metrics.inc('http_cache_requests_total', result='miss')
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed or session.modified or request_ctx.flashes:
+                return response
+            if page_cache is not None:
+                page_cache.set(etag, (response.get_data(), response.mimetype))
+            return finish_cached_response(response, etag)
+        return wrapper
+    return decorator
+
+
+def today_version() -> Tuple[Hashable, ...]:
+    """
+    Version of pages that only change with the date, such as the year in the footer.
+    """
+    return (date.today().isoformat(),)
+
+
+def home_version() -> Optional[Tuple[Hashable, ...]]:
+    """
+    Version of the home page: the date (plot and footer), the stored submissions (consensus leaderboard), the
+    well-known funds panel and the RSS feeds. Stale feeds are revalidated in the background even when the page
+    is answered from the cache. The page is not cached while the panel is being re-rendered.
+    """
+    funds = current_app.config['WELL_KNOWN_FUNDS']
+    snapshot_version = get_snapshot_version(list(funds))
+    panel_version = get_panel_state(current_app._get_current_object())['version']
+    if panel_version is not None and panel_version != snapshot_version:
+        return None
+
+    revalidate_rss_feeds(max_age=current_app.config['RSS_FEED_CACHE_SECONDS'])
+    return today_version() + (get_submissions_version(), snapshot_version, tuple(get_rss_feed_version()))
+
+
+def fund_search_version() -> Tuple[Hashable, ...]:
+    """
+    Version of the fund search results.
+    """
+    return today_version() + get_funds_version()
+
+
+def fund_details_version(cik: str) -> Optional[Tuple[Hashable, ...]]:
+    """
+    Version of the details page of a fund. Funds without stored submissions are downloaded by the page and
+    not cached.
+    """
+    fund_version = get_fund_version(cik)
+    if not fund_version[1]:
+        return None
+    return today_version() + fund_version
@@ -0,0 +1,74 @@
+import logging
+import uuid
+from typing import Dict, Iterable, Optional, Set
+
+from .database import db
+from .models import FundData, Submission
+
+logger = logging.getLogger('sLogger')
+
+# CIKs per preload query, well below the bound parameter limits of SQLite and PostgreSQL
+PRELOAD_BATCH_SIZE = 500
+
+
+class IngestionContext:
+    """
+    Lookups shared by the filings of one ingestion batch.
+
+    The FundData id and the stored accession numbers of a fund are read with one query per batch of CIKs, the
+    first time a filing of the fund is ingested or when `preload` is called, so re-ingesting thousands of filings
+    does not query them again for every file. The context assumes it is the only writer of the funds' submissions
+    while the batch runs and must be used within one database session.
+    """
+
+    def __init__(self, ciks: Iterable[str] = ()) -> None:
+        """
+        Args:
+            ciks (Iterable[str]): CIKs whose filings the batch will ingest.
+        """
+        self.fund_ids: Dict[str, Optional[uuid.UUID]] = {}
+        self.submission_ids: Dict[str, uuid.UUID] = {}
+        self.loaded_ciks: Set[str] = set()
+        self.preload(ciks)
+
+    def preload(self, ciks: Iterable[str]) -> None:
+        """
+        Read the FundData ids and stored submissions of funds that are not loaded yet.
+
+        Args:
+            ciks (Iterable[str]): The CIKs of the funds.
+        """
+        ciks = sorted(set(ciks) - self.loaded_ciks)
+        for start in range(0, len(ciks), PRELOAD_BATCH_SIZE):
+            batch = ciks[start:start + PRELOAD_BATCH_SIZE]
+            for cik in batch:
+                self.fund_ids[cik] = None
+            # Like `filter_by(...).first()`, the first row wins when a CIK or accession number is stored twice
+            for fund_id, cik in db.session.query(FundData.id, FundData.cik).filter(FundData.cik.in_(batch)):
+                self.fund_ids[cik] = self.fund_ids[cik] or fund_id
+            for submission_id, accession_number in db.session.query(Submission.id, Submission.accession_number) \
+                    .filter(Submission.cik.in_(batch)):
+                self.submission_ids.setdefault(accession_number, submission_id)
+            self.loaded_ciks.update(batch)
+        if ciks:
+            logger.debug(f'Preloaded the funds and submissions of {len(ciks)} CIKs for ingestion.')
+
+    def get_fund_id(self, cik: str) -> Optional[uuid.UUID]:
+        """
+        Get the id of the FundData of a CIK, or None if the fund is unknown.
+        """
+        self.preload([cik])
+        return self.fund_ids[cik]
+
+    def get_submission_id(self, cik: str, accession_number: str) -> Optional[uuid.UUID]:
+        """
+        Get the id of the stored submission of a fund with an accession number, or None if it is not stored.
+        """
+        self.preload([cik])
+        return self.submission_ids.get(accession_number)
+
+    def add_submission(self, accession_number: str, submission_id: uuid.UUID) -> None:
+        """
+        Record a submission stored by the batch.
+        """
+        self.submission_ids.setdefault(accession_number, submission_id)
@@ -0,0 +1,280 @@
+import hmac
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from flask import Flask, Response, abort, before_render_template, g, has_request_context, request, \
+    template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('sLogger')
+
+# Upper bounds (in seconds) of the latency histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process store of counters and histograms, rendered in the Prometheus text format.
+
+    Every worker process keeps its own registry, so the scraper should collect each worker separately.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[LabelSet, float]] = defaultdict(lambda: defaultdict(float))
+        self._histograms: Dict[str, Dict[LabelSet, List[float]]] = defaultdict(dict)
+
+    def describe(self, name: str, metric_type: str, description: str) -> None:
+        """
+        Register the type and help text of a metric.
+        """
+        self._help[name] = (metric_type, description)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        """
+        Increase a counter.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._counters[name][key] += amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Record a value in a histogram.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            # Bucket counts followed by the sum and the total count
+            values = self._histograms[name].setdefault(key, [0.0] * (len(DURATION_BUCKETS) + 2))
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    values[index] += 1
+            values[-2] += value
+            values[-1] += 1
+
+    def reset(self) -> None:
+        """
+        Remove all recorded values.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _format_labels(labels: LabelSet) -> str:
+        if not labels:
+            return ''
+        escaped = [f'{key}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+                   for key, value in labels]
+        return '{' + ','.join(escaped) + '}'
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric_type, description = self._help.get(name, ('counter', name))
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} {metric_type}']
+                for labels, value in sorted(series.items()):
+                    lines.append(f'{name}{self._format_labels(labels)} {value:g}')
+
+            for name, series in sorted(self._histograms.items()):
+                _, description = self._help.get(name, ('histogram', name))
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+                for labels, values in sorted(series.items()):
+                    for bound, count in zip(DURATION_BUCKETS, values):
+                        bucket_labels = labels + (('le', f'{bound:g}'),)
+                        lines.append(f'{name}_bucket{self._format_labels(bucket_labels)} {count:g}')
+                    lines.append(f'{name}_bucket{self._format_labels(labels + (("le", "+Inf"),))} {values[-1]:g}')
+                    lines.append(f'{name}_sum{self._format_labels(labels)} {values[-2]:.6f}')
+                    lines.append(f'{name}_count{self._format_labels(labels)} {values[-1]:g}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide metrics registry
+metrics = MetricsRegistry()
+metrics.describe('http_requests_total', 'counter', 'Handled HTTP requests.')
+metrics.describe('http_request_duration_seconds', 'histogram', 'Time spent handling HTTP requests.')
+metrics.describe('db_queries_total', 'counter', 'Executed SQL statements.')
+metrics.describe('db_query_duration_seconds', 'histogram', 'Time spent executing SQL statements.')
+metrics.describe('span_duration_seconds', 'histogram', 'Time spent in instrumented phases (http, parse, render).')
+metrics.describe('slow_requests_total', 'counter', 'Requests slower than SLOW_REQUEST_THRESHOLD_MS.')
+metrics.describe('n_plus_one_queries_total', 'counter',
+                 'Statements executed N_PLUS_ONE_QUERY_THRESHOLD times or more in one request.')
+metrics.describe('db_pool_timeouts_total', 'counter', 'Requests rejected because the connection pool was exhausted.')
+
+
+def current_endpoint() -> str:
+    """
+    Get the endpoint name used as metric label for the current request.
+    """
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'background'
+
+
+def record_span(name: str, duration: float) -> None:
+    """
+    Record the duration of a phase for the metrics and the current request's timing breakdown.
+    """
+    metrics.observe('span_duration_seconds', duration, span=name)
+    if has_request_context() and 'spans' in g:
+        g.spans[name] += duration
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a block of code as one phase of the current request, e.g. span('http') around an SEC request.
+
+    Args:
+        name (str): The phase name.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault('query_start_times', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    start_times = conn.info.get('query_start_times')
+    if not start_times:
+        return
+    duration = time.perf_counter() - start_times.pop()
+    endpoint = current_endpoint()
+    metrics.inc('db_queries_total', endpoint=endpoint)
+    metrics.observe('db_query_duration_seconds', duration, endpoint=endpoint)
+    if has_request_context() and 'query_log' in g:
+        g.query_log.append((statement, duration))
+
+
+def _handle_error(exception_context) -> None:
+    # A failed statement never reaches after_cursor_execute, so its start time is dropped here
+    connection = exception_context.connection
+    if connection is not None and not connection.closed and connection.info.get('query_start_times'):
+        connection.info['query_start_times'].pop()
+
+
+def summarize_queries(query_log: List[Tuple[str, float]], limit: int = 5) -> List[Tuple[str, int, float]]:
+    """
+    Group the statements of a request and order them by total time.
+
+    Args:
+        query_log (List[Tuple[str, float]]): Executed statements with their duration.
+        limit (int): Number of statements to return.
+
+    Returns:
+        List[Tuple[str, int, float]]: Statement, execution count and total seconds of the most expensive statements.
+    """
+    grouped: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+    for statement, duration in query_log:
+        grouped[statement][0] += 1
+        grouped[statement][1] += duration
+    summary = [(statement, int(count), total) for statement, (count, total) in grouped.items()]
+    summary.sort(key=lambda item: item[2], reverse=True)
+    return summary[:limit]
+
+
+def init_instrumentation(app: Flask) -> None:
+    """
+    Attach request timing, SQL query counting and the /metrics endpoint to the application.
+
+    Each response gets a Server-Timing header with the time spent in the database, outbound HTTP, parsing and
+    template rendering. Requests slower than SLOW_REQUEST_THRESHOLD_MS are logged with their query breakdown.
+    Statements repeated N_PLUS_ONE_QUERY_THRESHOLD times or more in any request are logged and counted as
+    possible N+1 queries. /metrics is only served when METRICS_ENABLED is set, and requires METRICS_TOKEN if
+    one is configured.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+    @app.before_request
+    def start_request_timer() -> None:
+        g.request_started = time.perf_counter()
+        g.query_log = []
+        g.spans = defaultdict(float)
+
+    def start_render(sender, template, context, **extra) -> None:
+        if has_request_context():
+            g.render_started = time.perf_counter()
+
+    def finish_render(sender, template, context, **extra) -> None:
+        if has_request_context() and 'render_started' in g:
+            record_span('render', time.perf_counter() - g.pop('render_started'))
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(finish_render, app, weak=False)
+
+    @app.after_request
+    def record_request(response: Response) -> Response:
+        if 'request_started' not in g:
+            return response
+
+        started, query_log, spans = g.request_started, g.query_log, g.spans
+        endpoint, method = current_endpoint(), request.method
+        path = request.full_path.rstrip('?')
+
+        db_time = sum(duration for _, duration in query_log)
+        timings = [f'db;dur={db_time * 1000:.1f};desc="{len(query_log)} queries"']
+        timings += [f'{name};dur={duration * 1000:.1f}' for name, duration in spans.items()]
+        timings.append(f'total;dur={(time.perf_counter() - started) * 1000:.1f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+
+        # Streamed responses are still being generated here, so the totals are recorded when the response closes
+        def finish_request() -> None:
+            duration = time.perf_counter() - started
+            metrics.inc('http_requests_total', endpoint=endpoint, method=method, status=str(response.status_code))
+            metrics.observe('http_request_duration_seconds', duration, endpoint=endpoint)
+
+            query_counts = Counter(statement for statement, _ in query_log)
+            for statement, count in query_counts.items():
+                if count >= app.config['N_PLUS_ONE_QUERY_THRESHOLD']:
+                    metrics.inc('n_plus_one_queries_total', endpoint=endpoint)
+                    logger.warning(f"Possible N+1 query in {method} {path}, executed {count}x: "
+                                   f"{' '.join(statement.split())[:300]}")
+
+            if duration * 1000 < app.config['SLOW_REQUEST_THRESHOLD_MS']:
+                return
+            metrics.inc('slow_requests_total', endpoint=endpoint)
+            breakdown = ', '.join(f'{name}={seconds * 1000:.1f}ms' for name, seconds in spans.items())
+            logger.warning(f"Slow request {method} {path} took {duration * 1000:.1f}ms "
+                           f"({len(query_log)} queries, {sum(d for _, d in query_log) * 1000:.1f}ms in db"
+                           f"{', ' + breakdown if breakdown else ''})")
+            for statement, count, total in summarize_queries(query_log):
+                flag = ' [possible N+1]' if count >= app.config['N_PLUS_ONE_QUERY_THRESHOLD'] else ''
+                logger.warning(f"  {count}x {total * 1000:.1f}ms{flag}: {' '.join(statement.split())[:300]}")
+
+        response.call_on_close(finish_request)
+        return response
+
+    @app.route('/metrics')
+    def prometheus_metrics() -> Response:
+        """
+        Expose the collected metrics in the Prometheus text format.
+        """
+        if not app.config['METRICS_ENABLED']:
+            abort(404)
+        token = app.config['METRICS_TOKEN']
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(401)
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,45 @@
+import importlib
+import threading
+from typing import Any, Optional
+
+
+class LazyImport:
+    """
+    Stand-in for a module or module attribute that is imported on first use.
+
+    Heavy dependencies (pandas, matplotlib, yfinance, ...) are only needed by a few routes, so deferring
+    their import keeps application startup and `create_app('testing')` fast. The proxy forwards attribute
+    access and calls, e.g. `pd = LazyImport('pandas')` followed by `pd.DataFrame(...)`, or
+    `Ticker = LazyImport('yfinance', 'Ticker')` followed by `Ticker('SPY')`.
+
+    Attributes:
+        module_name (str): The module to import.
+        attribute (Optional[str]): The attribute of the module to return instead of the module itself.
+    """
+
+    def __init__(self, module_name: str, attribute: Optional[str] = None):
+        self.module_name = module_name
+        self.attribute = attribute
+        self._target = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        """
+        Import the module (once) and return the module or its attribute.
+        """
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    target = importlib.import_module(self.module_name)
+                    self._target = getattr(target, self.attribute) if self.attribute else target
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load(), name)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        target = f'{self.module_name}.{self.attribute}' if self.attribute else self.module_name
+        return f'<LazyImport {target}{" (loaded)" if self._target is not None else ""}>'
@@ -1,9 +1,10 @@
 from .database import db
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import DDL, event
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
-from datetime import date
+from datetime import date, datetime
 
 
 class FundData(db.Model):
@@ -43,6 +44,9 @@ class Submission(db.Model):
         fund_data (relationship): Relationship to the FundData model.
         fund_portfolio_value (float): Value of the fund's portfolio.
         fund_owns_companies (int): Number of companies the fund owns.
+        amendment_type (str): 'RESTATEMENT' or 'NEW HOLDINGS' for amendments, None for original filings.
+        base_accession_number (str): Accession number of the submission whose holdings an amendment's stored
+            rows change, None when the holdings are stored in full.
     """
     __tablename__ = 'submission'
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -56,10 +60,15 @@ class Submission(db.Model):
     fund_data = db.relationship('FundData', back_populates='submissions')
     fund_portfolio_value = db.Column(db.Float, nullable=True)
     fund_owns_companies = db.Column(db.Integer, nullable=True)
+    amendment_type = db.Column(db.String(20), nullable=True)
+    base_accession_number = db.Column(db.String(20), nullable=True)
+    # Serves the per-fund lookups and their filing date windows
+    __table_args__ = (db.Index('ix_submission_cik_filed_of_date', 'cik', 'filed_of_date'),)
 
     def __init__(self, cik: str, company_name: str, submission_type: str, filed_of_date: date, accession_number: str,
                  period_of_portfolio: str,
-                 fund_data_id: UUID, fund_portfolio_value: float = None, fund_owns_companies: int = None):
+                 fund_data_id: UUID, fund_portfolio_value: float = None, fund_owns_companies: int = None,
+                 amendment_type: str = None, base_accession_number: str = None):
         self.cik = cik
         self.company_name = company_name
         self.submission_type = submission_type
@@ -69,6 +78,8 @@ class Submission(db.Model):
         self.fund_data_id = fund_data_id
         self.fund_portfolio_value = fund_portfolio_value
         self.fund_owns_companies = fund_owns_companies
+        self.amendment_type = amendment_type
+        self.base_accession_number = base_accession_number
 
 
 class FundHoldings(db.Model):
@@ -81,11 +92,18 @@ class FundHoldings(db.Model):
         value_usd (float): Value in USD.
         share_amount (float): Amount of shares.
         cusip (str): Committee on Uniform Securities Identification Procedures number.
+        put_call (str): 'Put' or 'Call' for option positions, None for the securities themselves.
+        asset_category (str): N-PORT asset category, e.g. 'EC' for common equity, None for 13F holdings.
+        issuer_lei (str): Legal Entity Identifier of the issuer, if an N-PORT filing reports it.
+        pct_of_net_assets (float): N-PORT value of the position as a percentage of the fund's net assets.
         cik (str): Central Index Key.
         accession_number (str): Accession number.
-        period_of_portfolio (str): Period of the portfolio.
+        period_of_portfolio (str): Period of the portfolio, the partition key of the table.
         fund_data_id (UUID): Foreign key linking to FundData.
         fund_data (relationship): Relationship to the FundData model.
+
+    On PostgreSQL the table is partitioned by list of `period_of_portfolio`, one partition per quarter
+    (see `partitions.py`), so the period is part of the primary key.
     """
     __tablename__ = 'fund_holdings'
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -93,11 +111,89 @@ class FundHoldings(db.Model):
     value_usd = db.Column(db.Float, nullable=False)
     share_amount = db.Column(db.Float, nullable=False)
     cusip = db.Column(db.String(9), nullable=False)
+    put_call = db.Column(db.String(4), nullable=True)
+    asset_category = db.Column(db.String(10), nullable=True)
+    issuer_lei = db.Column(db.String(20), nullable=True)
+    pct_of_net_assets = db.Column(db.Float, nullable=True)
     cik = db.Column(db.String(10), nullable=False)
-    accession_number = db.Column(db.String(20), nullable=False)
-    period_of_portfolio = db.Column(db.String(50), nullable=False)
+    accession_number = db.Column(db.String(20), nullable=False, index=True)
+    period_of_portfolio = db.Column(db.String(50), primary_key=True)
     fund_data_id = db.Column(UUID(as_uuid=True), db.ForeignKey('fund_data.id'), nullable=False)
     fund_data = db.relationship('FundData', back_populates='fund_holdings')
+    __table_args__ = {'postgresql_partition_by': 'LIST (period_of_portfolio)'}
+
+
+# Rows of periods without a partition of their own land in the default partition
+event.listen(FundHoldings.__table__, 'after_create',
+             DDL('CREATE TABLE fund_holdings_default PARTITION OF fund_holdings DEFAULT').execute_if(
+                 dialect='postgresql'))
+
+
+class FundSummary(db.Model):
+    """
+    Model representing the fund-level figures of one submission, maintained on ingest (see `summaries.py`).
+
+    Attributes:
+        id (UUID): Primary key, unique identifier for each summary.
+        cik (str): Central Index Key of the fund.
+        accession_number (str): Accession number of the summarized submission.
+        period_of_portfolio (str): Period of the portfolio.
+        filed_of_date (date): Date when the submission was filed.
+        fund_data_id (UUID): Foreign key linking to FundData.
+        aum (float): Total value of the holdings in USD.
+        position_count (int): Number of positions.
+        new_positions (int): Positions not held in the previous submission.
+        closed_positions (int): Positions of the previous submission that were sold completely.
+        turnover (float): One-way turnover against the previous submission, half the sum of absolute weight changes.
+        top10_concentration (float): Share of the ten largest positions in the total value.
+        updated_at (datetime): When the summary was last computed.
+    """
+    __tablename__ = 'fund_summary'
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    cik = db.Column(db.String(10), nullable=False, index=True)
+    accession_number = db.Column(db.String(20), nullable=False, unique=True)
+    period_of_portfolio = db.Column(db.String(50), nullable=False)
+    filed_of_date = db.Column(db.Date, nullable=False)
+    fund_data_id = db.Column(UUID(as_uuid=True), db.ForeignKey('fund_data.id'))
+    aum = db.Column(db.Float, nullable=False, default=0.0)
+    position_count = db.Column(db.Integer, nullable=False, default=0)
+    new_positions = db.Column(db.Integer, nullable=True)
+    closed_positions = db.Column(db.Integer, nullable=True)
+    turnover = db.Column(db.Float, nullable=True)
+    top10_concentration = db.Column(db.Float, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SecurityFlow(db.Model):
+    """
+    Model representing how much of one security a fund bought or sold in a reporting period, compared with its
+    previous period. Maintained on ingest (see `flows.py`) and summed across funds for the consensus leaderboard.
+
+    Attributes:
+        id (UUID): Primary key, unique identifier for each flow.
+        cik (str): Central Index Key of the fund.
+        period_of_portfolio (str): The reporting period of the change.
+        accession_number (str): Accession number of the period's newest submission.
+        previous_accession_number (str): Accession number the change is measured against.
+        cusip (str): CUSIP of the security.
+        company_name (str): Name of the issuer.
+        shares_change (float): Shares added (positive) or removed (negative).
+        value_change (float): Estimated dollars added or removed, the share change valued at the reported price.
+        change_status (str): 'New', 'Increased', 'Decreased' or 'Closed'.
+    """
+    __tablename__ = 'security_flow'
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    cik = db.Column(db.String(10), nullable=False)
+    period_of_portfolio = db.Column(db.String(50), nullable=False)
+    accession_number = db.Column(db.String(20), nullable=False)
+    previous_accession_number = db.Column(db.String(20), nullable=False)
+    cusip = db.Column(db.String(9), nullable=False)
+    company_name = db.Column(db.String(200), nullable=False)
+    shares_change = db.Column(db.Float, nullable=False)
+    value_change = db.Column(db.Float, nullable=False)
+    change_status = db.Column(db.String(20), nullable=False)
+    __table_args__ = (db.UniqueConstraint('cik', 'period_of_portfolio', 'cusip', name='unique_security_flow'),
+                      db.Index('ix_security_flow_period_cusip', 'period_of_portfolio', 'cusip'))
 
 
 class AddFundToFavorites(db.Model):
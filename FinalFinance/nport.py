@@ -0,0 +1,151 @@
+import logging
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+from .lazy import LazyImport
+
+etree = LazyImport('lxml.etree')
+
+logger = logging.getLogger('sLogger')
+
+# Start of the investments section of an N-PORT primary document, with or without a namespace prefix
+INVESTMENTS_START = re.compile(r'<((?:[\w.-]+:)?)invstOrSecs[\s>]')
+
+# Namespace declarations before the section. They are made on the root element of the document, which is not
+# parsed, so the section is wrapped in an element declaring them again.
+NAMESPACE_DECLARATION = re.compile(r'\sxmlns(?::([\w.-]+))?=("[^"]*"|\'[^\']*\')')
+
+# Characters fed to the pull parser at a time
+FEED_SIZE = 1024 * 1024
+
+# Child elements of an <invstOrSec> and the FundHoldings columns they are stored in
+TEXT_FIELDS = {
+    'name': 'company_name',
+    'lei': 'issuer_lei',
+    'cusip': 'cusip',
+    'assetCat': 'asset_category',
+}
+NUMBER_FIELDS = {
+    'valUSD': 'value_usd',
+    'balance': 'share_amount',
+    'pctVal': 'pct_of_net_assets',
+}
+
+# Placeholders filers use for unknown identifiers
+MISSING_VALUES = {'', 'N/A', 'NA', 'NONE'}
+
+
+def local_name(tag: str) -> str:
+    """
+    Get the name of an element without its namespace, e.g. 'invstOrSec' for
+    '{http://www.sec.gov/edgar/nport}invstOrSec'.
+    """
+    return tag.rpartition('}')[2]
+
+
+def read_position(element: 'etree._Element') -> Dict[str, Any]:
+    """
+    Read one <invstOrSec> element.
+
+    Only its direct children are read, so the names and amounts nested in derivative and securities lending
+    details are not mistaken for those of the position.
+
+    Args:
+        element (etree._Element): The <invstOrSec> element.
+
+    Returns:
+        Dict[str, Any]: The values of the FundHoldings columns: company_name, cusip, value_usd, share_amount,
+            put_call (always None), asset_category, issuer_lei and pct_of_net_assets.
+
+    Raises:
+        ValueError: If an amount is not a number.
+    """
+    position = {'company_name': None, 'cusip': None, 'value_usd': 0.0, 'share_amount': 0.0, 'put_call': None,
+                'asset_category': None, 'issuer_lei': None, 'pct_of_net_assets': None}
+    for child in element:
+        # Comments and processing instructions have no tag name
+        if not isinstance(child.tag, str):
+            continue
+        name = local_name(child.tag)
+        text = (child.text or '').strip()
+        if name in TEXT_FIELDS:
+            position[TEXT_FIELDS[name]] = text or None
+        elif name in NUMBER_FIELDS and text:
+            position[NUMBER_FIELDS[name]] = float(text)
+        elif name == 'assetConditional':
+            # Categories without a code of their own, e.g. <assetConditional assetCat="OTHER" desc="..."/>
+            position['asset_category'] = child.get('assetCat') or position['asset_category']
+    if position['issuer_lei'] and position['issuer_lei'].upper() in MISSING_VALUES:
+        position['issuer_lei'] = None
+    return position
+
+
+def iter_section_positions(section: str, declarations: str = '') -> Iterator[Dict[str, Any]]:
+    """
+    Stream the positions of an investments section with a pull parser. Every position is released once it has
+    been read, so the memory used does not grow with the number of positions.
+
+    Args:
+        section (str): The <invstOrSecs> element, as text.
+        declarations (str): The namespace declarations in effect for the section, e.g.
+            ' xmlns="http://www.sec.gov/edgar/nport"'.
+
+    Yields:
+        Dict[str, Any]: The positions, see `read_position`. Positions with amounts that are not numbers are
+            logged and skipped.
+
+    Raises:
+        etree.XMLSyntaxError: If the section is not well-formed XML.
+    """
+    parser = etree.XMLPullParser(events=('end',), tag='{*}invstOrSec')
+    parser.feed(f'<nport{declarations}>')
+    for start in range(0, len(section) + 1, FEED_SIZE):
+        if start < len(section):
+            parser.feed(section[start:start + FEED_SIZE])
+        else:
+            parser.feed('</nport>')
+            parser.close()
+        for _, element in parser.read_events():
+            try:
+                yield read_position(element)
+            except ValueError as e:
+                logger.warning(f'Skipping N-PORT position: {e}')
+            # Read positions are removed from the tree
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+
+def parse_nport_positions(data: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Read the positions of an N-PORT filing without parsing the rest of the document.
+
+    The <invstOrSecs> section is located in the submission text and streamed with lxml's pull parser, which
+    only builds the <invstOrSec> elements. Namespaces are ignored, so the section is read whether the document
+    declares the N-PORT namespace as its default namespace or binds it to a prefix.
+
+    Args:
+        data (str): The complete submission text.
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: The positions, see `read_position`, or None if the filing has no
+            investments section or the section is not well-formed XML, in which case it has to be parsed
+            leniently.
+    """
+    match = INVESTMENTS_START.search(data)
+    if not match:
+        return None
+    end = data.find(f'</{match.group(1)}invstOrSecs>', match.start())
+    if end < 0:
+        return None
+
+    section = data[match.start():end + len(match.group(1)) + len('</invstOrSecs>')]
+    # One declaration per prefix; the namespaces themselves are ignored when the positions are read
+    namespaces = dict(NAMESPACE_DECLARATION.findall(data, 0, match.start()))
+    declarations = ''.join(f" xmlns:{prefix}={uri}" if prefix else f" xmlns={uri}"
+                           for prefix, uri in namespaces.items())
+    try:
+        return list(iter_section_positions(section, declarations))
+    except etree.XMLSyntaxError as e:
+        logger.warning(f'Could not stream the N-PORT investments section, parsing the whole filing: {e}')
+        return None
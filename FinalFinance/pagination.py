@@ -0,0 +1,203 @@
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from flask import Request
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque, URL-safe cursor.
+
+    Args:
+        values (Sequence[Any]): The sort key values of the last row.
+
+    Returns:
+        str: The encoded cursor.
+    """
+    values = [value.item() if hasattr(value, 'item') else value for value in values]
+    payload = json.dumps([str(value) if value is not None and not isinstance(value, (int, float, str)) else value
+                          for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[List[Any]]:
+    """
+    Decode a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (Optional[str]): The encoded cursor.
+
+    Returns:
+        Optional[List[Any]]: The sort key values, or None if the cursor is missing or malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def get_page_args(request: Request, sort_fields: Sequence[str], default_sort: str) -> Dict[str, Any]:
+    """
+    Read the pagination, sorting and filtering arguments of a request.
+
+    Args:
+        request (Request): The current request.
+        sort_fields (Sequence[str]): The fields the view may be sorted by.
+        default_sort (str): The sort field used when the request does not give a valid one.
+
+    Returns:
+        Dict[str, Any]: The 'sort', 'order', 'q', 'after' and 'page_size' arguments.
+    """
+    sort = request.args.get('sort', default_sort)
+    if sort not in sort_fields:
+        sort = default_sort
+    order = 'desc' if request.args.get('order') == 'desc' else 'asc'
+    page_size = request.args.get('page_size', DEFAULT_PAGE_SIZE, type=int)
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    return {
+        'sort': sort,
+        'order': order,
+        'q': request.args.get('q', '', type=str).strip(),
+        'after': request.args.get('after'),
+        'page_size': page_size,
+    }
+
+
+def _coerce(column: Any, value: Any) -> Any:
+    """
+    Convert a decoded cursor value back to the Python type of its column.
+    """
+    if value is None:
+        return None
+    try:
+        return column.type.python_type(value)
+    except (NotImplementedError, TypeError, ValueError):
+        return value
+
+
+def keyset_paginate(query: Query, sort_column: Any, tiebreaker_column: Any, after: Optional[str],
+                    page_size: int, descending: bool = False) -> Tuple[List[Any], Optional[str]]:
+    """
+    Return one page of a query using keyset (seek) pagination.
+
+    Rows are ordered by the sort column and a unique tiebreaker column, and the next page starts
+    right after the sort key of the previous page's last row, so deep pages cost the same as the first.
+
+    Args:
+        query (Query): The filtered query to paginate.
+        sort_column (Any): The column to sort by.
+        tiebreaker_column (Any): A unique column that makes the order deterministic.
+        after (Optional[str]): The cursor of the previous page's last row.
+        page_size (int): Number of rows per page.
+        descending (bool): Sort in descending order.
+
+    Returns:
+        Tuple[List[Any], Optional[str]]: The rows of the page and the cursor of the next page, if any.
+    """
+    cursor = decode_cursor(after)
+    if cursor and len(cursor) == 2:
+        last_sort_value = _coerce(sort_column, cursor[0])
+        last_tiebreaker = _coerce(tiebreaker_column, cursor[1])
+        if descending:
+            query = query.filter(or_(sort_column < last_sort_value,
+                                     and_(sort_column == last_sort_value, tiebreaker_column < last_tiebreaker)))
+        else:
+            query = query.filter(or_(sort_column > last_sort_value,
+                                     and_(sort_column == last_sort_value, tiebreaker_column > last_tiebreaker)))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), tiebreaker_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), tiebreaker_column.asc())
+
+    rows = query.limit(page_size + 1).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last_row = rows[-1]
+        next_cursor = encode_cursor([getattr(last_row, sort_column.key), getattr(last_row, tiebreaker_column.key)])
+    return rows, next_cursor
+
+
+def _record_sort_key(value: Any) -> Tuple[int, Any]:
+    """
+    Build a sort key that orders missing values last and never compares them with real values.
+    """
+    if value is None or value != value:
+        return 1, 0
+    return 0, value.item() if hasattr(value, 'item') else value
+
+
+def paginate_records(records: List[Dict[str, Any]], sort: str, after: Optional[str], page_size: int,
+                     descending: bool = False,
+                     predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+                     ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Return one page of in-memory records (e.g. a processed holdings frame) using keyset pagination.
+
+    The records are ordered by the sort field and their position in the original list, which is the
+    tiebreaker stored in the cursor. The start of the next page is found with a binary search.
+
+    Args:
+        records (List[Dict[str, Any]]): The records to paginate.
+        sort (str): The record field to sort by.
+        after (Optional[str]): The cursor of the previous page's last record.
+        page_size (int): Number of records per page.
+        descending (bool): Sort in descending order.
+        predicate (Optional[Callable[[Dict[str, Any]], bool]]): Keeps only the records it returns True for.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Optional[str]]: The records of the page and the cursor of the next page, if any.
+    """
+    keyed = [(_record_sort_key(record.get(sort)), position) for position, record in enumerate(records)
+             if predicate is None or predicate(record)]
+    keyed.sort(reverse=descending)
+
+    start = 0
+    cursor = decode_cursor(after)
+    if cursor and len(cursor) == 3:
+        last_key = ((cursor[0], cursor[1]), cursor[2])
+        try:
+            if descending:
+                # Records after the cursor are the ones with a smaller key, which sit at the end of the list
+                start = len(keyed) - bisect_left(keyed[::-1], last_key)
+            else:
+                start = bisect_right(keyed, last_key)
+        except TypeError:
+            start = 0
+
+    page = keyed[start:start + page_size]
+    next_cursor = None
+    if start + page_size < len(keyed):
+        (missing, value), position = page[-1]
+        next_cursor = encode_cursor([missing, value, position])
+    return [records[position] for _, position in page], next_cursor
+
+
+def contains_predicate(field: str, text: str) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """
+    Build a case-insensitive substring filter for `paginate_records`.
+
+    Args:
+        field (str): The record field to search in.
+        text (str): The text to search for.
+
+    Returns:
+        Optional[Callable[[Dict[str, Any]], bool]]: The filter, or None if there is nothing to filter by.
+    """
+    if not text:
+        return None
+    text = text.lower()
+    return lambda record: text in str(record.get(field) or '').lower()
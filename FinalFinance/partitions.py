@@ -0,0 +1,199 @@
+import logging
+import os
+import re
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Set, Union
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import Connection, Engine, select, text
+
+from .analytics import clear_analytics_cache
+from .holdings_cache import clear_holdings_cache
+from .database import db
+from .lazy import LazyImport
+from .models import FundHoldings
+
+pd = LazyImport('pandas')
+
+logger = logging.getLogger('sLogger')
+
+# Reporting periods are stored as e.g. '2024 Q1'; only those get a partition of their own
+PERIOD_PATTERN = re.compile(r'^(\d{4}) Q([1-4])$')
+
+# Partition of FundHoldings that receives rows of periods without a partition
+DEFAULT_PARTITION = 'fund_holdings_default'
+
+# Partitions known to exist, so the catalog is only asked once per period and process
+_known_partitions: Set[str] = set()
+_known_partitions_lock = threading.Lock()
+
+
+def holdings_partition_name(period_of_portfolio: str) -> Optional[str]:
+    """
+    Get the name of the FundHoldings partition of a reporting period.
+
+    Args:
+        period_of_portfolio (str): The reporting period, e.g. '2024 Q1'.
+
+    Returns:
+        Optional[str]: The partition name, e.g. 'fund_holdings_2024_q1', or None for an unexpected period.
+    """
+    match = PERIOD_PATTERN.match(period_of_portfolio or '')
+    if not match:
+        return None
+    return f'fund_holdings_{match.group(1)}_q{match.group(2)}'
+
+
+def is_partitioned(bind: Union[Engine, Connection]) -> bool:
+    """
+    Tell whether the holdings table is partitioned, which is only the case on PostgreSQL.
+    """
+    return bind.dialect.name == 'postgresql'
+
+
+def ensure_holdings_partition(period_of_portfolio: str) -> None:
+    """
+    Create the FundHoldings partition of a reporting period if it does not exist yet.
+
+    Rows of the period that were stored in the default partition in the meantime are moved into the new
+    partition before it is attached. Runs in its own short transaction, so the lock on the parent table is
+    released before the ingestion starts. Does nothing on databases without partitioning.
+
+    Args:
+        period_of_portfolio (str): The reporting period, e.g. '2024 Q1'.
+    """
+    name = holdings_partition_name(period_of_portfolio)
+    if name is None or name in _known_partitions:
+        return
+
+    with _known_partitions_lock:
+        if name in _known_partitions:
+            return
+        if is_partitioned(db.engine):
+            with db.engine.begin() as connection:
+                exists = connection.execute(text('SELECT to_regclass(:name) IS NOT NULL'), {'name': name}).scalar()
+                if not exists:
+                    logger.info(f'Creating partition {name} of fund_holdings')
+                    connection.execute(text(f'CREATE TABLE {name} (LIKE fund_holdings INCLUDING DEFAULTS)'))
+                    connection.execute(text(f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} '
+                                            f'WHERE period_of_portfolio = :period RETURNING *) '
+                                            f'INSERT INTO {name} SELECT * FROM moved'),
+                                       {'period': period_of_portfolio})
+                    connection.execute(text(f"ALTER TABLE fund_holdings ATTACH PARTITION {name} "
+                                            f"FOR VALUES IN ('{period_of_portfolio}')"))
+        _known_partitions.add(name)
+
+
+def get_stored_periods() -> List[str]:
+    """
+    Get the reporting periods that have holdings stored, oldest first.
+    """
+    rows = db.session.query(FundHoldings.period_of_portfolio).distinct().all()
+    return sorted(period for period, in rows)
+
+
+def get_retention_cutoff(keep_quarters: int, today: Optional[date] = None) -> str:
+    """
+    Get the oldest reporting period that is kept when the newest `keep_quarters` quarters are retained.
+
+    Args:
+        keep_quarters (int): Number of quarters to keep, including the current one.
+        today (Optional[date]): The reference date, today by default.
+
+    Returns:
+        str: The oldest retained period, e.g. '2023 Q2'.
+    """
+    today = today or date.today()
+    quarter_index = today.year * 4 + (today.month - 1) // 3 - (keep_quarters - 1)
+    return f'{quarter_index // 4} Q{quarter_index % 4 + 1}'
+
+
+def archive_holdings_period(period_of_portfolio: str, output_dir: str) -> Dict[str, object]:
+    """
+    Move the holdings of one reporting period out of the database into a zstd-compressed Parquet file.
+
+    On PostgreSQL the period's partition is detached and dropped, which takes no time regardless of its
+    size; elsewhere the rows are deleted.
+
+    Args:
+        period_of_portfolio (str): The reporting period to archive.
+        output_dir (str): Directory of the archive files.
+
+    Returns:
+        Dict[str, object]: The archived period, the number of rows and the path of the file.
+    """
+    holdings_df = pd.read_sql(select(FundHoldings.__table__)
+                              .where(FundHoldings.period_of_portfolio == period_of_portfolio),
+                              db.session.connection())
+    for column in ('id', 'fund_data_id'):
+        holdings_df[column] = holdings_df[column].astype(str)
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"fund_holdings_{period_of_portfolio.replace(' ', '_')}.parquet")
+    # Write the file before deleting anything, so a failure leaves the rows in place
+    holdings_df.to_parquet(path, compression='zstd', index=False)
+
+    connection = db.session.connection()
+    name = holdings_partition_name(period_of_portfolio)
+    if is_partitioned(connection) and name and connection.execute(
+            text('SELECT to_regclass(:name) IS NOT NULL'), {'name': name}).scalar():
+        connection.execute(text(f'ALTER TABLE fund_holdings DETACH PARTITION {name}'))
+        connection.execute(text(f'DROP TABLE {name}'))
+        _known_partitions.discard(name)
+    else:
+        db.session.query(FundHoldings).filter(FundHoldings.period_of_portfolio == period_of_portfolio) \
+            .delete(synchronize_session=False)
+    db.session.commit()
+    clear_analytics_cache()
+    clear_holdings_cache()
+
+    logger.info(f'Archived {len(holdings_df)} holdings of {period_of_portfolio} to {path}')
+    return {'period_of_portfolio': period_of_portfolio, 'rows': len(holdings_df), 'path': path}
+
+
+def archive_holdings(keep_quarters: int, output_dir: str, dry_run: bool = False,
+                     today: Optional[date] = None) -> List[Dict[str, object]]:
+    """
+    Archive the holdings of every reporting period older than the retention window.
+
+    Submissions are kept, so the filing history of a fund stays complete; only the positions of old
+    periods leave the database.
+
+    Args:
+        keep_quarters (int): Number of most recent quarters whose holdings stay in the database.
+        output_dir (str): Directory of the archive files.
+        dry_run (bool): Only report the periods that would be archived.
+        today (Optional[date]): The reference date, today by default.
+
+    Returns:
+        List[Dict[str, object]]: One entry per archived period.
+    """
+    cutoff = get_retention_cutoff(keep_quarters, today)
+    periods = [period for period in get_stored_periods() if period < cutoff]
+    if dry_run:
+        return [{'period_of_portfolio': period, 'rows': None, 'path': None} for period in periods]
+    return [archive_holdings_period(period, output_dir) for period in periods]
+
+
+@click.command('archive-holdings')
+@click.option('--keep-quarters', type=int, default=None, help='Number of recent quarters to keep in the database.')
+@click.option('--output-dir', default=None, help='Directory of the Parquet archive files.')
+@click.option('--dry-run', is_flag=True, help='Only list the periods that would be archived.')
+@with_appcontext
+def archive_holdings_command(keep_quarters: Optional[int], output_dir: Optional[str], dry_run: bool) -> None:
+    """
+    Move the holdings of old reporting periods into compressed Parquet files.
+    """
+    keep_quarters = keep_quarters or current_app.config['HOLDINGS_RETENTION_QUARTERS']
+    output_dir = output_dir or current_app.config['HOLDINGS_ARCHIVE_DIR']
+    archived = archive_holdings(keep_quarters, output_dir, dry_run=dry_run)
+    if not archived:
+        click.echo(f'Nothing to archive; holdings of the last {keep_quarters} quarters are kept.')
+    for entry in archived:
+        if dry_run:
+            click.echo(f"Would archive {entry['period_of_portfolio']}")
+        else:
+            click.echo(f"Archived {entry['rows']} holdings of {entry['period_of_portfolio']} to {entry['path']}")
@@ -1,13 +1,22 @@
 import uuid
 from datetime import datetime
 
-from .database import db
+from .database import db, read_replica
 from flask import render_template, flash, redirect, url_for, request, Blueprint, send_from_directory, current_app, \
-    session
+    session, Response, stream_template
 from .forms import SignUpForm, LoginForm, UpdateProfileForm, AdminSignUpForm
 from .models import User, FundData, Submission, AddFundToFavorites, FundHoldings, AdminUser
-from .utils import edgar_downloader_from_sec, get_fund_lists, save_plot_to_file, get_rss_feed_entries, \
-    fetch_and_process_holdings, process_holdings_dataframe, process_monitor_holdings_dataframe
+from .utils import edgar_downloader_from_sec, save_plot_to_file, get_rss_feed_entries, \
+    fetch_and_process_holdings, process_holdings_dataframe, process_monitor_holdings_dataframe, process_submissions, \
+    parse_date_window, get_window_submissions
+from .amendments import get_effective_submissions, get_filing_chains
+from .exports import export_response, iter_submission_holdings_rows, iter_monitor_rows, get_monitor_export_header, \
+    SUBMISSION_HOLDINGS_HEADER
+from .summaries import get_fund_summaries
+from .flows import get_consensus_leaderboard
+from .snapshots import get_well_known_panel
+from .http_cache import cached_page, home_version, today_version, fund_search_version, fund_details_version
+from .pagination import get_page_args, keyset_paginate, paginate_records, contains_predicate
 from flask_login import login_user, logout_user, current_user, login_required
 import re
 import os
@@ -18,17 +27,30 @@ from functools import wraps
 # Define the blueprint for routes
 routes = Blueprint('routes', __name__)
 
+# Columns the holdings of a single submission can be sorted by
+SUBMISSION_HOLDINGS_SORT_COLUMNS = {
+    'Company Name': FundHoldings.company_name,
+    'Value (USD)': FundHoldings.value_usd,
+    'Share Amount': FundHoldings.share_amount,
+    'CUSIP': FundHoldings.cusip,
+}
+
+# Fields the compared fund holdings can be sorted by
+FUND_HOLDINGS_SORT_FIELDS = ['Company Name', 'Value (USD)', 'Share Amount', 'Previous Share Amount', 'Change Status',
+                             'Change Amount', 'Change Percentage']
+
 
 @routes.route('/')
+@cached_page(home_version)
 def home() -> str:
     """
     Route for the home page.
     """
-    # Retrieve a list of well-known funds
-    well_known_funds = get_fund_lists()
+    # Latest figures of the well-known funds, rendered once per snapshot version
+    well_known_panel = get_well_known_panel()
 
-    # Retrieve RSS feed entries
-    rss_feed_entries = get_rss_feed_entries()
+    # Retrieve RSS feed entries from the cache; stale feeds are refreshed in the background
+    rss_feed_entries = get_rss_feed_entries(max_age=current_app.config['RSS_FEED_CACHE_SECONDS'], background=True)
 
     # Define the ticker symbol and current date
     ticker_symbol = 'spy'
@@ -49,9 +71,13 @@ def home() -> str:
     else:
         print("Image already exists.")
 
+    # Most bought and sold securities across all tracked funds, from the maintained flows table
+    leaderboard = get_consensus_leaderboard(limit=10)
+
     # Render the home page template with the required context variables
-    return render_template('home.html', well_known_funds=well_known_funds,
-                           rss_feed_entries=rss_feed_entries, image_filename=image_filename, year=datetime.now().year)
+    return render_template('home.html', well_known_panel=well_known_panel,
+                           rss_feed_entries=rss_feed_entries, image_filename=image_filename, leaderboard=leaderboard,
+                           year=datetime.now().year)
 #
 # @routes.route('/static/images/<path:filename>')
 # def custom_static(filename: str) -> object:
@@ -76,6 +102,7 @@ def home() -> str:
 
 
 @routes.route('/about')
+@cached_page(today_version)
 def about() -> str:
     """
     Route for the about page.
@@ -125,6 +152,8 @@ def logout() -> object:
 
 
 @routes.route('/fund_search', methods=['GET'])
+@read_replica
+@cached_page(fund_search_version)
 def fund_search() -> str:
     """
     Route for searching funds.
@@ -321,6 +350,7 @@ def remove_from_favorites(fund_id: uuid.UUID) -> object:
 
 
 @routes.route('/submission_details/<accession_number>')
+@read_replica
 @login_required
 def submission_details(accession_number: str) -> str:
     """
@@ -343,25 +373,57 @@ def submission_details(accession_number: str) -> str:
 
     # Retrieve the fund and holdings associated with the submission
     fund = Submission.query.filter_by(cik=submission.cik).first()
-    holdings = FundHoldings.query.filter_by(accession_number=accession_number).all()
+    page_args = get_page_args(request, SUBMISSION_HOLDINGS_SORT_COLUMNS, 'Company Name')
+    sort_column = SUBMISSION_HOLDINGS_SORT_COLUMNS[page_args['sort']]
+
+    holdings_query = FundHoldings.query.filter_by(accession_number=accession_number,
+                                                  period_of_portfolio=submission.period_of_portfolio)
+    if page_args['q']:
+        holdings_query = holdings_query.filter(FundHoldings.company_name.ilike(f"%{page_args['q']}%"))
+
+    if request.args.get('all'):
+        # Stream every holding from a server-side cursor while the page is being rendered
+        order = sort_column.desc() if page_args['order'] == 'desc' else sort_column.asc()
+        holdings = holdings_query.order_by(order, FundHoldings.id).yield_per(500)
+        return Response(stream_template('submission_details.html', submission=submission, holdings=holdings,
+                                        fund=fund, year=datetime.now().year))
+
+    holdings, next_cursor = keyset_paginate(holdings_query, sort_column, FundHoldings.id, page_args['after'],
+                                            page_args['page_size'], descending=page_args['order'] == 'desc')
 
     # Render the submission details page
     return render_template('submission_details.html', submission=submission, holdings=holdings, fund=fund,
-                           year=datetime.now().year)
+                           year=datetime.now().year, page_args=page_args, next_cursor=next_cursor,
+                           sort_fields=list(SUBMISSION_HOLDINGS_SORT_COLUMNS))
 
 
-@routes.route('/fund_details/<cik>', methods=['GET', 'POST'])
-def fund_details(cik: str) -> str:
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
+@routes.route('/submission_details/<accession_number>/export/<file_format>')
+@read_replica
+@login_required
+def export_submission_holdings(accession_number: str, file_format: str) -> object:
+    """
+    Route for downloading the holdings of a submission as CSV or XLSX.
 
-    if start_date_str and end_date_str:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-    else:
-        start_date = None
-        end_date = None
+    Args:
+        accession_number (str): The accession number of the submission.
+        file_format (str): Either 'csv' or 'xlsx'.
+
+    Returns:
+        Response: The file download, or a redirect if the submission or format is unknown.
+    """
+    submission = Submission.query.filter_by(accession_number=accession_number).first()
+    if not submission or file_format not in ('csv', 'xlsx'):
+        flash('No submission found with the given accession number.')
+        return redirect(url_for('routes.fund_search'))
 
+    return export_response(SUBMISSION_HOLDINGS_HEADER, iter_submission_holdings_rows(submission), file_format,
+                           f'{accession_number}_holdings')
+
+
+@routes.route('/fund_details/<cik>', methods=['GET', 'POST'])
+@read_replica
+@cached_page(fund_details_version)
+def fund_details(cik: str) -> str:
     if request.method == 'POST':
         start_date_str = request.form['start_date']
         end_date_str = request.form['end_date']
@@ -373,14 +435,36 @@ def fund_details(cik: str) -> str:
         flash('Submissions added successfully.')
         return redirect(url_for('routes.fund_details', cik=cik))
 
+    try:
+        start_date, end_date = parse_date_window(request.args)
+    except ValueError as e:
+        flash(f'Error parsing date: {e}')
+        return redirect(url_for('routes.fund_details', cik=cik))
+
     fund, all_submissions, holdings_df = fetch_and_process_holdings(cik, start_date, end_date)
     if not fund:
         flash('This Fund does not provide holding filings.')
         return redirect(url_for('routes.fund_search'))
 
     holdings_list = process_holdings_dataframe(holdings_df, all_submissions)
-    return render_template('fund_details.html', fund=fund, submissions=all_submissions, newest_holdings=holdings_list,
-                           year=datetime.now().year)
+    fund_summaries = get_fund_summaries(cik)
+
+    page_args = get_page_args(request, FUND_HOLDINGS_SORT_FIELDS, 'Company Name')
+    predicate = contains_predicate('Company Name', page_args['q'])
+    descending = page_args['order'] == 'desc'
+
+    if request.args.get('all'):
+        newest_holdings, _ = paginate_records(holdings_list, page_args['sort'], None, len(holdings_list) or 1,
+                                              descending=descending, predicate=predicate)
+        return Response(stream_template('fund_details.html', fund=fund, submissions=all_submissions,
+                                        newest_holdings=newest_holdings, fund_summaries=fund_summaries,
+                                        year=datetime.now().year))
+
+    newest_holdings, next_cursor = paginate_records(holdings_list, page_args['sort'], page_args['after'],
+                                                    page_args['page_size'], descending=descending, predicate=predicate)
+    return render_template('fund_details.html', fund=fund, submissions=all_submissions, newest_holdings=newest_holdings,
+                           fund_summaries=fund_summaries, year=datetime.now().year, page_args=page_args,
+                           next_cursor=next_cursor, sort_fields=FUND_HOLDINGS_SORT_FIELDS)
 
 
 @routes.route('/signup', methods=['GET', 'POST'])
@@ -501,6 +585,7 @@ def profile() -> str:
 
 
 @routes.route('/monitor', methods=['GET', 'POST'])
+@read_replica
 @login_required
 def monitor():
     favorite_funds = current_user.favorite_funds
@@ -510,28 +595,21 @@ def monitor():
 
     fund_name_and_cik = [(favorite.fund.fund_name, favorite.fund.cik) for favorite in favorite_funds]
 
-    start_date = datetime(2023, 1, 1)
-    end_date = datetime(2024, 12, 31)
-
     monitored_cik = request.form.get('monitored_cik', None)
     if monitored_cik is None and favorite_funds:
         monitored_cik = favorite_funds[0].fund.cik
 
-    if request.method == 'POST':
-        start_date_str = request.form.get('start_date', '2023-01-01')
-        end_date_str = request.form.get('end_date', '2023-12-31')
-
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-        except ValueError as e:
-            flash(f'Error parsing date: {e}')
-            return redirect(url_for('routes.monitor'))
-
-    elif request.method == 'GET':
+    if request.method == 'GET':
         monitored_cik = request.args.get('cik', monitored_cik)
 
-    fund, all_submissions, holdings_df = fetch_and_process_holdings(monitored_cik)
+    # The window comes from the form, or from the query string of the pagination and export links
+    try:
+        start_date, end_date = parse_date_window(request.values)
+    except ValueError as e:
+        flash(f'Error parsing date: {e}')
+        return redirect(url_for('routes.monitor'))
+
+    fund, all_submissions, holdings_df = fetch_and_process_holdings(monitored_cik, start_date, end_date)
 
     if not fund:
         flash('This Fund does not provide holding filings.')
@@ -540,16 +618,67 @@ def monitor():
     holdings_list, headers = process_monitor_holdings_dataframe(holdings_df, all_submissions)
     newest_submission = all_submissions[0] if all_submissions else None
 
+    page_args = get_page_args(request, headers, 'Company Name')
+    predicate = contains_predicate('Company Name', page_args['q'])
+    descending = page_args['order'] == 'desc'
+
+    if request.args.get('all'):
+        newest_holdings, _ = paginate_records(holdings_list, page_args['sort'], None, len(holdings_list) or 1,
+                                              descending=descending, predicate=predicate)
+        return Response(stream_template('monitor.html', fund=fund, newest_holdings=newest_holdings,
+                                        year=datetime.now().year, fund_details=fund_name_and_cik,
+                                        favorite_funds=favorite_funds, monitored_cik=monitored_cik,
+                                        submissions=all_submissions, newest_submission=newest_submission,
+                                        headers=headers, start_date=start_date, end_date=end_date))
+
+    newest_holdings, next_cursor = paginate_records(holdings_list, page_args['sort'], page_args['after'],
+                                                    page_args['page_size'], descending=descending, predicate=predicate)
+
     return render_template('monitor.html',
                            fund=fund,
-                           newest_holdings=holdings_list,
+                           newest_holdings=newest_holdings,
+                           page_args=page_args,
+                           next_cursor=next_cursor,
                            year=datetime.now().year,
                            fund_details=fund_name_and_cik,
                            favorite_funds=favorite_funds,
                            monitored_cik=monitored_cik,
                            submissions=all_submissions,
                            newest_submission=newest_submission,
-                           headers=headers)
+                           headers=headers,
+                           start_date=start_date,
+                           end_date=end_date)
+
+
+@routes.route('/monitor/export/<file_format>')
+@read_replica
+@login_required
+def export_monitor(file_format: str) -> object:
+    """
+    Route for downloading the monitor matrix of a fund as CSV or XLSX.
+
+    Args:
+        file_format (str): Either 'csv' or 'xlsx'.
+
+    Returns:
+        Response: The file download, or a redirect if the fund or format is unknown.
+    """
+    cik = request.args.get('cik', '')
+    try:
+        start_date, end_date = parse_date_window(request.args)
+    except ValueError as e:
+        flash(f'Error parsing date: {e}')
+        return redirect(url_for('routes.monitor'))
+
+    submissions = get_window_submissions(cik, start_date, end_date)
+    chains = get_filing_chains(submissions)
+    all_submissions = process_submissions(get_effective_submissions(submissions))
+    if not all_submissions or file_format not in ('csv', 'xlsx'):
+        flash('This Fund does not provide holding filings.')
+        return redirect(url_for('routes.monitor'))
+
+    return export_response(get_monitor_export_header(all_submissions), iter_monitor_rows(all_submissions, chains),
+                           file_format, f'{cik}_monitor')
 
 
 @login_required
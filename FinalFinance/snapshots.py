@@ -0,0 +1,173 @@
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask, current_app, render_template
+from markupsafe import Markup
+from sqlalchemy import func, tuple_
+
+from .amendments import get_effective_periods
+from .database import db
+from .models import FundSummary, SecurityFlow, Submission
+from .summaries import get_period_positions, memoize_positions
+
+logger = logging.getLogger('sLogger')
+
+# Number of largest position changes listed per fund
+TOP_MOVERS = 3
+
+# Key of the rendered panel in the extensions of the application; every worker process renders its own
+PANEL_EXTENSION = 'well_known_panel'
+_panel_lock = threading.Lock()
+
+
+def get_snapshot_version(ciks: List[str]) -> Tuple[Any, ...]:
+    """
+    Identify the state of the funds' summaries with a single aggregate read. Ingesting a filing of one of the
+    funds updates its summaries (see `summaries.refresh_fund_summaries`), which changes the version.
+    """
+    count, updated_at = db.session.query(func.count(FundSummary.accession_number), func.max(FundSummary.updated_at)) \
+        .filter(FundSummary.cik.in_(ciks)).one()
+    return tuple(sorted(ciks)), count, updated_at
+
+
+def build_well_known_snapshot(funds: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    Collect the latest figures of the well-known funds from the precomputed summaries and security flows.
+
+    Args:
+        funds (Dict[str, str]): The funds, as CIK: fund name.
+
+    Returns:
+        List[Dict[str, Any]]: Per fund, in the configured order: the name, CIK, latest period, AUM, number of
+            positions and the largest position changes against the previous period. The figures of a period are
+            those of its effective submissions, added up for trusts filing one N-PORT per series.
+    """
+    latest_periods = dict(db.session.query(FundSummary.cik, func.max(FundSummary.period_of_portfolio))
+                          .filter(FundSummary.cik.in_(list(funds))).group_by(FundSummary.cik).all())
+    figures = {}
+    if latest_periods:
+        fund_periods = list(latest_periods.items())
+        period_summaries = {summary.accession_number: summary for summary in FundSummary.query.filter(
+            tuple_(FundSummary.cik, FundSummary.period_of_portfolio).in_(fund_periods))}
+        period_submissions = defaultdict(list)
+        for submission in Submission.query.filter(
+                tuple_(Submission.cik, Submission.period_of_portfolio).in_(fund_periods)):
+            period_submissions[submission.cik].append(submission)
+
+        for cik, period in fund_periods:
+            # Amendments replace the filing they amend; the series of a trust are added up
+            effective = [submission for submission in
+                         get_effective_periods(period_submissions[cik]).get(period, [])
+                         if submission.accession_number in period_summaries]
+            if not effective:
+                continue
+            summaries = [period_summaries[submission.accession_number] for submission in effective]
+            if len(summaries) == 1:
+                position_count = summaries[0].position_count
+            else:
+                # Series can hold the same positions
+                position_count = len(get_period_positions(effective, memoize_positions()))
+            figures[cik] = {'period': period, 'aum': sum(summary.aum or 0.0 for summary in summaries),
+                            'position_count': position_count}
+
+    movers: Dict[str, List[SecurityFlow]] = {cik: [] for cik in figures}
+    if figures:
+        flows = SecurityFlow.query.filter(
+            tuple_(SecurityFlow.cik, SecurityFlow.period_of_portfolio).in_(
+                [(cik, fund_figures['period']) for cik, fund_figures in figures.items()])) \
+            .order_by(func.abs(SecurityFlow.value_change).desc(), SecurityFlow.cusip)
+        for flow in flows:
+            if len(movers[flow.cik]) < TOP_MOVERS:
+                movers[flow.cik].append(flow)
+
+    snapshot = []
+    for cik, fund_name in funds.items():
+        fund_figures = figures.get(cik, {})
+        snapshot.append({
+            'fund_name': fund_name,
+            'cik': cik,
+            'period': fund_figures.get('period'),
+            'aum': fund_figures.get('aum'),
+            'position_count': fund_figures.get('position_count'),
+            'top_movers': [{'company_name': flow.company_name, 'value_change': flow.value_change,
+                            'change_status': flow.change_status} for flow in movers.get(cik, [])],
+        })
+    return snapshot
+
+
+def render_well_known_panel(funds: Dict[str, str], version: Tuple[Any, ...]) -> Markup:
+    """
+    Render the well-known funds panel and keep it as the cached fragment of the current application.
+    """
+    html = Markup(render_template('_well_known_funds.html', snapshot=build_well_known_snapshot(funds)))
+    with _panel_lock:
+        get_panel_state(current_app).update(version=version, html=html)
+    return html
+
+
+def get_panel_state(app: Flask) -> Dict[str, Any]:
+    """
+    Get the rendered panel of an application and the snapshot version it shows.
+    """
+    return app.extensions.setdefault(PANEL_EXTENSION, {'version': None, 'html': None, 'refreshing': False})
+
+
+def _refresh_in_background(app: Flask, funds: Dict[str, str], version: Tuple[Any, ...]) -> None:
+    """
+    Re-render the panel outside of the request that noticed the new version.
+    """
+    try:
+        # The request context lets the fragment build its URLs
+        with app.test_request_context('/'):
+            render_well_known_panel(funds, version)
+    except Exception as e:
+        logger.error(f'Could not refresh the well-known funds panel: {e}')
+    finally:
+        with _panel_lock:
+            get_panel_state(app)['refreshing'] = False
+
+
+def get_well_known_panel(funds: Optional[Dict[str, str]] = None) -> Markup:
+    """
+    Get the rendered well-known funds panel of the home page.
+
+    A hit costs one aggregate read of the summaries. When a filing of one of the funds has been ingested
+    since the panel was rendered, the previous panel is returned while a background thread renders the new
+    one, so only the very first request of a process renders synchronously.
+
+    Args:
+        funds (Optional[Dict[str, str]]): The funds, as CIK: fund name. Defaults to WELL_KNOWN_FUNDS.
+
+    Returns:
+        Markup: The panel HTML.
+    """
+    funds = funds or current_app.config['WELL_KNOWN_FUNDS']
+    version = get_snapshot_version(list(funds))
+
+    app = current_app._get_current_object()
+    with _panel_lock:
+        panel = get_panel_state(app)
+        if panel['html'] is not None and panel['version'] == version:
+            return panel['html']
+        # A panel of other funds cannot stand in for this one
+        stale_html = panel['html'] if panel['version'] and panel['version'][0] == version[0] else None
+        start_refresh = stale_html is not None and not panel['refreshing']
+        if start_refresh:
+            panel['refreshing'] = True
+
+    if stale_html is None:
+        return render_well_known_panel(funds, version)
+    if start_refresh:
+        threading.Thread(target=_refresh_in_background, args=(app, funds, version),
+                         name='well-known-panel-refresh', daemon=True).start()
+    return stale_html
+
+
+def clear_well_known_panel() -> None:
+    """
+    Drop the cached panel of the current application.
+    """
+    with _panel_lock:
+        get_panel_state(current_app).update(version=None, html=None, refreshing=False)
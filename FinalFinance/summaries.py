@@ -0,0 +1,244 @@
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+
+from .amendments import get_effective_periods, is_stored_in_full, read_positions_after
+from .database import db
+from .diffs import position_key
+from .models import FundHoldings, FundSummary, Submission
+
+logger = logging.getLogger('sLogger')
+
+# Number of largest positions in the concentration figure
+TOP_POSITIONS = 10
+
+# CUSIP, company name and put/call flag of a position, see `diffs.position_key`
+Position = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def get_ordered_submissions(cik: str) -> List[Submission]:
+    """
+    Get the submissions of a fund, oldest period first.
+    """
+    return Submission.query.filter_by(cik=cik) \
+        .order_by(Submission.period_of_portfolio, Submission.accession_number).all()
+
+
+def get_submission_positions(submission: Submission) -> Dict[Position, float]:
+    """
+    Get the value of every position of a submission. Positions are told apart like on the diff page (see
+    `diffs.position_key`), so a renamed issuer stays one position and option lines are positions of their own.
+    The positions of an amendment stored as changes are its period's effective positions.
+
+    Args:
+        submission (Submission): The submission.
+
+    Returns:
+        Dict[Position, float]: The value in USD per position.
+    """
+    if not is_stored_in_full(submission):
+        rows = [(company_name, cusip, put_call, value)
+                for (company_name, cusip, put_call), (value, _) in read_positions_after(submission).items()]
+    else:
+        rows = db.session.query(FundHoldings.company_name, FundHoldings.cusip, FundHoldings.put_call,
+                                func.sum(FundHoldings.value_usd)) \
+            .filter(FundHoldings.period_of_portfolio == submission.period_of_portfolio,
+                    FundHoldings.accession_number == submission.accession_number) \
+            .group_by(FundHoldings.company_name, FundHoldings.cusip, FundHoldings.put_call).all()
+
+    positions = {}
+    for company_name, cusip, put_call, value in rows:
+        key = position_key(company_name, cusip, put_call)
+        positions[key] = positions.get(key, 0.0) + (value or 0.0)
+    return positions
+
+
+def get_period_positions(submissions: List[Submission],
+                         positions_of: Callable[[Submission], Dict[Position, float]]) -> Dict[Position, float]:
+    """
+    Sum the position values of the effective submissions of a period, e.g. the series of a trust.
+
+    Args:
+        submissions (List[Submission]): The effective submissions of the period, see
+            `amendments.get_effective_periods`.
+        positions_of (Callable[[Submission], Dict[Position, float]]): Reads the positions of a submission.
+
+    Returns:
+        Dict[Position, float]: The value in USD per position.
+    """
+    positions: Dict[Position, float] = {}
+    for submission in submissions:
+        for key, value in positions_of(submission).items():
+            positions[key] = positions.get(key, 0.0) + value
+    return positions
+
+
+def compute_summary(positions: Dict[Hashable, float],
+                    previous_positions: Optional[Dict[Hashable, float]]) -> Dict[str, object]:
+    """
+    Compute the fund-level figures of a submission.
+
+    Args:
+        positions (Dict[Hashable, float]): The position values of the submission.
+        previous_positions (Optional[Dict[Hashable, float]]): The position values of the previous period, or None
+            if there is none (or its holdings are no longer stored).
+
+    Returns:
+        Dict[str, object]: The values of the FundSummary columns.
+    """
+    aum = sum(positions.values())
+    largest = sorted(positions.values(), reverse=True)[:TOP_POSITIONS]
+    summary = {
+        'aum': aum,
+        'position_count': len(positions),
+        'top10_concentration': sum(largest) / aum if aum else None,
+        'new_positions': None,
+        'closed_positions': None,
+        'turnover': None,
+    }
+    if not previous_positions:
+        return summary
+
+    summary['new_positions'] = len(positions.keys() - previous_positions.keys())
+    summary['closed_positions'] = len(previous_positions.keys() - positions.keys())
+    previous_aum = sum(previous_positions.values())
+    if aum and previous_aum:
+        companies = positions.keys() | previous_positions.keys()
+        summary['turnover'] = 0.5 * sum(abs(positions.get(name, 0.0) / aum - previous_positions.get(name, 0.0) /
+                                            previous_aum) for name in companies)
+    return summary
+
+
+def store_summary(submission: Submission, positions: Dict[Position, float],
+                  previous_positions: Optional[Dict[Position, float]]) -> Optional[FundSummary]:
+    """
+    Insert or update the summary of a submission. Submissions without stored holdings, e.g. archived ones,
+    keep their existing summary.
+    """
+    if not positions:
+        return None
+
+    summary = FundSummary.query.filter_by(accession_number=submission.accession_number).first()
+    if not summary:
+        summary = FundSummary(accession_number=submission.accession_number)
+        db.session.add(summary)
+
+    summary.cik = submission.cik
+    summary.period_of_portfolio = submission.period_of_portfolio
+    summary.filed_of_date = submission.filed_of_date
+    summary.fund_data_id = submission.fund_data_id
+    for column, value in compute_summary(positions, previous_positions).items():
+        setattr(summary, column, value)
+    summary.updated_at = datetime.utcnow()
+    return summary
+
+
+def memoize_positions() -> Callable[[Submission], Dict[Position, float]]:
+    """
+    Get a reader of `get_submission_positions` that reads every submission once.
+    """
+    cache: Dict[str, Dict[Position, float]] = {}
+
+    def positions_of(submission: Submission) -> Dict[Position, float]:
+        if submission.accession_number not in cache:
+            cache[submission.accession_number] = get_submission_positions(submission)
+        return cache[submission.accession_number]
+
+    return positions_of
+
+
+def store_period_summaries(submissions: List[Submission], previous_period: Optional[List[Submission]],
+                           positions_of: Callable[[Submission], Dict[Position, float]]) -> int:
+    """
+    Store the summaries of submissions of one period. All of them, amendments included, are measured against
+    the effective holdings of the previous period.
+
+    Args:
+        submissions (List[Submission]): Submissions of the period.
+        previous_period (Optional[List[Submission]]): The effective submissions of the previous period, or None
+            for the first period of the fund.
+        positions_of (Callable[[Submission], Dict[Position, float]]): Reads the positions of a submission.
+
+    Returns:
+        int: The number of stored summaries.
+    """
+    previous_positions = get_period_positions(previous_period, positions_of) if previous_period else None
+    return sum(1 for submission in submissions
+               if store_summary(submission, positions_of(submission), previous_positions))
+
+
+def refresh_fund_summaries(cik: str, accession_number: str) -> None:
+    """
+    Update the summaries affected by an ingested submission: its own and those of the following period,
+    whose new/closed counts and turnover are relative to the effective holdings of its period.
+
+    Args:
+        cik (str): The CIK of the fund.
+        accession_number (str): The accession number of the ingested submission.
+    """
+    submissions = get_ordered_submissions(cik)
+    submission = next((submission for submission in submissions if submission.accession_number == accession_number),
+                      None)
+    if submission is None:
+        return
+
+    effective_periods = get_effective_periods(submissions)
+    periods = sorted(effective_periods)
+    index = periods.index(submission.period_of_portfolio)
+    positions_of = memoize_positions()
+
+    store_period_summaries([submission], effective_periods[periods[index - 1]] if index > 0 else None, positions_of)
+    if index + 1 < len(periods):
+        store_period_summaries([next_submission for next_submission in submissions
+                                if next_submission.period_of_portfolio == periods[index + 1]],
+                               effective_periods[periods[index]], positions_of)
+    db.session.commit()
+
+
+def rebuild_fund_summaries(cik: Optional[str] = None) -> int:
+    """
+    Recompute the summaries of every submission of one fund or of all funds.
+
+    Args:
+        cik (Optional[str]): The CIK of the fund, or None for all funds.
+
+    Returns:
+        int: The number of stored summaries.
+    """
+    ciks = [cik] if cik else [row[0] for row in db.session.query(Submission.cik).distinct()]
+    count = 0
+    for fund_cik in ciks:
+        submissions = get_ordered_submissions(fund_cik)
+        effective_periods = get_effective_periods(submissions)
+        positions_of = memoize_positions()
+        previous_period = None
+        for period in sorted(effective_periods):
+            count += store_period_summaries([submission for submission in submissions
+                                             if submission.period_of_portfolio == period],
+                                            previous_period, positions_of)
+            previous_period = effective_periods[period]
+        db.session.commit()
+    return count
+
+
+def get_fund_summaries(cik: str) -> List[FundSummary]:
+    """
+    Get the summary time series of a fund, newest first.
+    """
+    return FundSummary.query.filter_by(cik=cik) \
+        .order_by(FundSummary.period_of_portfolio.desc(), FundSummary.accession_number.desc()).all()
+
+
+@click.command('rebuild-fund-summaries')
+@click.option('--cik', default=None, help='Only rebuild the summaries of this fund.')
+@with_appcontext
+def rebuild_fund_summaries_command(cik: Optional[str]) -> None:
+    """
+    Recompute the per-submission fund summaries from the stored holdings.
+    """
+    count = rebuild_fund_summaries(cik)
+    click.echo(f'Stored {count} fund summaries.')
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+from benchmarks.generators import generate_filing
+from FinalFinance import create_app, db
+from FinalFinance.amendments import NEW_HOLDINGS, RESTATEMENT, get_filing_chains, parse_amendment_type
+from FinalFinance.exports import get_monitor_export_header, iter_monitor_rows
+from FinalFinance.models import FundData, FundHoldings, FundSummary, SecurityFlow, Submission
+from FinalFinance.utils import extract_holdings_from_file, fetch_and_process_holdings
+
+CIK = '0009999999'
+
+PORTFOLIO = [(f'Company {company} Inc', f'{company:09d}', 1000 * (company + 1), 100 * (company + 1))
+             for company in range(1, 6)]
+
+
+class AmendmentTypeTestCase(unittest.TestCase):
+
+    def test_parse_amendment_type(self):
+        self.assertIsNone(parse_amendment_type('13F-HR', '<amendmentType>RESTATEMENT</amendmentType>'))
+        self.assertEqual(parse_amendment_type('13F-HR/A', '<coverPage></coverPage>'), RESTATEMENT)
+        self.assertEqual(parse_amendment_type('13F-HR/A', '<ns1:amendmentType> new holdings </ns1:amendmentType>'),
+                         NEW_HOLDINGS)
+        self.assertEqual(parse_amendment_type('NPORT-P/A', ''), RESTATEMENT)
+
+
+class AmendmentIngestionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.temp_dir = tempfile.mkdtemp()
+        db.session.add(FundData(fund_name='Benchmark Fund', cik=CIK))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.temp_dir)
+
+    def ingest(self, sequence, portfolio, submission_type='13F-HR', amendment_type=None):
+        accession_number = f'{CIK}-24-{sequence:06d}'
+        text = generate_filing(CIK, 'Benchmark Fund', accession_number, date(2024, 3, 31), portfolio,
+                               submission_type)
+        if amendment_type:
+            text = text.replace('<XML>\n', f'<XML>\n<coverPage><amendmentType>{amendment_type}</amendmentType>'
+                                           f'</coverPage>\n', 1)
+        path = os.path.join(self.temp_dir, f'{accession_number}.txt')
+        with open(path, 'w') as file:
+            file.write(text)
+        extract_holdings_from_file(path)
+        return accession_number
+
+    def stored_rows(self, accession_number):
+        return {holding.company_name: (holding.value_usd, holding.share_amount)
+                for holding in FundHoldings.query.filter_by(accession_number=accession_number)}
+
+    def test_amendments_store_only_their_changes(self):
+        original = self.ingest(1, PORTFOLIO)
+        # Company 2 is restated and company 5 no longer reported
+        restated_portfolio = [PORTFOLIO[0], ('Company 2 Inc', '000000002', 9000, 900)] + PORTFOLIO[2:4]
+        restatement = self.ingest(2, restated_portfolio, '13F-HR/A')
+        new_holdings = self.ingest(3, [('Company 6 Inc', '000000006', 7000, 700)], '13F-HR/A', NEW_HOLDINGS)
+
+        self.assertEqual(self.stored_rows(restatement), {'Company 2 Inc': (9000, 900), 'Company 5 Inc': (0, 0)})
+        self.assertEqual(self.stored_rows(new_holdings), {'Company 6 Inc': (7000, 700)})
+
+        submissions = {submission.accession_number: submission for submission in Submission.query}
+        self.assertEqual((submissions[restatement].amendment_type, submissions[restatement].base_accession_number),
+                         (RESTATEMENT, original))
+        self.assertEqual((submissions[new_holdings].amendment_type, submissions[new_holdings].base_accession_number),
+                         (NEW_HOLDINGS, restatement))
+        self.assertEqual(submissions[new_holdings].fund_owns_companies, 5)
+        self.assertEqual(submissions[new_holdings].fund_portfolio_value, 2000 + 9000 + 4000 + 5000 + 7000)
+        self.assertEqual([submission.accession_number
+                          for submission in get_filing_chains(submissions.values())[0]],
+                         [original, restatement, new_holdings])
+
+        # The period is shown once, with its effective holdings
+        _, processed_submissions, holdings_df = fetch_and_process_holdings(CIK, download_missing=False)
+        self.assertEqual([submission['accession_number'] for submission in processed_submissions], [new_holdings])
+        self.assertEqual(set(holdings_df['Accession Number']), {new_holdings})
+        self.assertEqual(dict(zip(holdings_df['Company Name'], holdings_df['Share Amount'])),
+                         {'Company 1 Inc': 200, 'Company 2 Inc': 900, 'Company 3 Inc': 400, 'Company 4 Inc': 500,
+                          'Company 6 Inc': 700})
+
+        chains = get_filing_chains(Submission.query.all())
+        self.assertEqual(len(get_monitor_export_header(processed_submissions)), 3)
+        self.assertEqual({row[0]: row[2] for row in iter_monitor_rows(processed_submissions, chains)},
+                         {'Company 1 Inc': 200, 'Company 2 Inc': 900, 'Company 3 Inc': 400, 'Company 4 Inc': 500,
+                          'Company 6 Inc': 700})
+
+        summary = FundSummary.query.filter_by(accession_number=new_holdings).one()
+        self.assertEqual((summary.position_count, summary.aum), (5, 27000))
+        self.assertEqual(SecurityFlow.query.count(), 0)
+
+    def test_originals_of_one_period_are_kept_apart(self):
+        # A trust files one N-PORT per series for the same period
+        first_series = self.ingest(1, PORTFOLIO[:3], 'NPORT-P')
+        second_series = self.ingest(2, PORTFOLIO[3:], 'NPORT-P')
+        amendment = self.ingest(3, [PORTFOLIO[3]], 'NPORT-P/A')
+
+        submission = Submission.query.filter_by(accession_number=amendment).one()
+        self.assertEqual(submission.base_accession_number, second_series)
+        self.assertEqual([[submission.accession_number for submission in chain]
+                          for chain in get_filing_chains(Submission.query.all())],
+                         [[first_series], [second_series, amendment]])
+
+        _, processed_submissions, holdings_df = fetch_and_process_holdings(CIK, download_missing=False)
+        self.assertEqual(sorted(submission['accession_number'] for submission in processed_submissions),
+                         [first_series, amendment])
+        self.assertEqual(dict(zip(holdings_df['Company Name'], holdings_df['Accession Number'])),
+                         {'Company 1 Inc': first_series, 'Company 2 Inc': first_series,
+                          'Company 3 Inc': first_series, 'Company 4 Inc': amendment})
+
+    def test_amendment_without_stored_original_is_stored_in_full(self):
+        amendment = self.ingest(2, PORTFOLIO, '13F-HR/A')
+
+        submission = Submission.query.one()
+        self.assertEqual((submission.amendment_type, submission.base_accession_number), (RESTATEMENT, None))
+        self.assertEqual(len(self.stored_rows(amendment)), len(PORTFOLIO))
+
+
+if __name__ == '__main__':
+    unittest.main()
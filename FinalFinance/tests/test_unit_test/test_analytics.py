@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from FinalFinance.analytics import clear_analytics_cache, compute_fund_analytics
+from benchmarks.generators import build_holdings_frame
+
+
+def holdings_frame(portfolios):
+    rows = [(company_name, value, value / 10, accession_number)
+            for accession_number, positions in portfolios for company_name, value in positions.items()]
+    submissions = [{'accession_number': accession_number, 'period_of_portfolio': f'2024 Q{index + 1}_1'}
+                   for index, (accession_number, _) in enumerate(portfolios)][::-1]
+    return pd.DataFrame(rows, columns=['Company Name', 'Value (USD)', 'Share Amount', 'Accession Number']), submissions
+
+
+class FundAnalyticsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        clear_analytics_cache()
+
+    def test_turnover_and_concentration(self):
+        holdings_df, submissions = holdings_frame([('A1', {'Alpha': 1000.0, 'Beta': 500.0}),
+                                                   ('A2', {'Alpha': 1500.0, 'Gamma': 200.0})])
+
+        periods = compute_fund_analytics(holdings_df, submissions)['periods']
+
+        self.assertEqual(list(periods['Accession Number']), ['A2', 'A1'])
+        self.assertAlmostEqual(periods['Turnover'][0], 1 / 3)
+        self.assertTrue(np.isnan(periods['Turnover'][1]))
+        self.assertAlmostEqual(periods['HHI'][1], (2 / 3) ** 2 + (1 / 3) ** 2)
+        self.assertEqual((periods['New Positions'][0], periods['Closed Positions'][0]), (1, 1))
+
+    def test_holding_period_restarts_after_a_gap(self):
+        holdings_df, submissions = holdings_frame([('A1', {'Alpha': 1.0, 'Beta': 1.0}),
+                                                   ('A2', {'Alpha': 1.0}),
+                                                   ('A3', {'Alpha': 1.0, 'Beta': 1.0})])
+
+        positions = compute_fund_analytics(holdings_df, submissions)['positions'].set_index('Company Name')
+
+        self.assertEqual(positions.loc['Alpha', 'Holding Quarters'], 3)
+        self.assertEqual(positions.loc['Beta', 'Holding Quarters'], 1)
+        self.assertEqual(positions.loc['Beta', 'Previous Weight'], 0.0)
+
+    def test_matches_dense_computation(self):
+        holdings_df, submissions = build_holdings_frame('0000000001', 50, 6)
+        periods = compute_fund_analytics(holdings_df, submissions)['periods'].iloc[::-1].reset_index(drop=True)
+
+        matrix = holdings_df.pivot_table(index='Accession Number', columns='Company Name', values='Value (USD)',
+                                         aggfunc='sum', fill_value=0.0, observed=True).sort_index().to_numpy()
+        weights = matrix / matrix.sum(axis=1, keepdims=True)
+        np.testing.assert_allclose(periods['Turnover'][1:], 0.5 * np.abs(np.diff(weights, axis=0)).sum(axis=1))
+        np.testing.assert_allclose(periods['HHI'], (weights ** 2).sum(axis=1))
+
+    def test_results_are_cached_per_accession(self):
+        holdings_df, submissions = holdings_frame([('A1', {'Alpha': 1.0})])
+
+        first = compute_fund_analytics(holdings_df, submissions)
+        self.assertIs(compute_fund_analytics(holdings_df, submissions), first)
+
+        clear_analytics_cache('A1')
+        self.assertIsNot(compute_fund_analytics(holdings_df, submissions), first)
+
+    def test_empty_history(self):
+        result = compute_fund_analytics(pd.DataFrame(columns=['Company Name', 'Value (USD)', 'Share Amount',
+                                                              'Accession Number']), [])
+
+        self.assertTrue(result['periods'].empty)
+        self.assertTrue(result['positions'].empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+from FinalFinance import create_app, db
+from FinalFinance.models import FundData, Submission, FundHoldings
+from FinalFinance.utils import extract_holdings_from_file, fetch_and_process_holdings, get_rss_feed_entries, \
+    edgar_downloader_from_sec, rss_feed_cache
+from benchmarks.generators import iter_portfolios, write_filing, seed_fund
+from benchmarks.loadtest import parse_mix
+from benchmarks.run_benchmarks import compare_with_baseline
+from benchmarks.sec_stub import SecStub
+
+
+class BenchmarkGeneratorsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_portfolios_are_reproducible_with_turnover(self):
+        first, second = list(iter_portfolios(100, 2, seed=1))
+
+        self.assertEqual(list(iter_portfolios(100, 2, seed=1)), [first, second])
+        self.assertEqual(len(first), 100)
+        self.assertEqual(len(second), 100)
+        self.assertEqual(len({row[0] for row in first} - {row[0] for row in second}), 5)
+
+    def test_generated_filings_are_ingested(self):
+        db.session.add(FundData(fund_name='Benchmark Fund', cik='0009999999'))
+        db.session.commit()
+
+        for seed, submission_type in enumerate(['13F-HR', 'NPORT-P']):
+            path, accession_number = write_filing(self.temp_dir, '0009999999', 25, submission_type, seed=seed)
+            extract_holdings_from_file(path)
+
+            submission = Submission.query.filter_by(accession_number=accession_number).one()
+            self.assertEqual(submission.submission_type, submission_type)
+            self.assertEqual(submission.period_of_portfolio, '2024 Q1')
+            self.assertEqual(submission.fund_owns_companies, 25)
+            self.assertEqual(FundHoldings.query.filter_by(accession_number=accession_number).count(), 25)
+
+    def test_seeded_fund_is_processed(self):
+        seeded = seed_fund('0009999999', 50, 3)
+
+        fund, all_submissions, holdings_df = fetch_and_process_holdings('0009999999', download_missing=False)
+
+        self.assertEqual(seeded['holdings'], 150)
+        self.assertIsNotNone(fund)
+        self.assertEqual([submission['period_of_portfolio'] for submission in all_submissions],
+                         ['2024 Q4_1', '2024 Q3_1', '2024 Q2_1'])
+        self.assertEqual(len(holdings_df), 150)
+
+    def test_compare_with_baseline(self):
+        baseline = {'case': {'p50_ms': 10.0, 'peak_memory_mib': 5.0}}
+
+        self.assertEqual(compare_with_baseline({'case': {'p50_ms': 11.0, 'peak_memory_mib': 5.0}}, baseline, 0.2), [])
+        regressions = compare_with_baseline({'case': {'p50_ms': 13.0, 'peak_memory_mib': 7.0}, 'new': {}},
+                                            baseline, 0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('case p50_ms: 10.00 -> 13.00'))
+
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('home=3,monitor=1'), {'home': 3, 'monitor': 1})
+        with self.assertRaises(ValueError):
+            parse_mix('admin=1')
+
+    def test_application_downloads_from_sec_stub(self):
+        db.session.add(FundData(fund_name='Stub Fund', cik='0009000001'))
+        db.session.commit()
+        stub = SecStub({'0009000001': 'Stub Fund'}, positions=20, filings_per_fund=2).start()
+        self.app.config['SEC_URL'] = self.app.config['SEC_DATA_URL'] = stub.url
+        original_dir = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            rss_feed_cache.clear()
+            entries = get_rss_feed_entries(count=10, max_age=0)
+            edgar_downloader_from_sec('0009000001')
+        finally:
+            os.chdir(original_dir)
+            stub.stop()
+            rss_feed_cache.clear()
+
+        self.assertEqual(entries[0]['cik'], '0009000001')
+        self.assertEqual(entries[0]['acc_no'], '0009000001-10-000002')
+        self.assertEqual(stub.requests_served, {'rss': 2, 'submissions': 1, 'filing': 2})
+        self.assertEqual(Submission.query.filter_by(cik='0009000001').count(), 2)
+        self.assertEqual(FundHoldings.query.filter_by(cik='0009000001').count(), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
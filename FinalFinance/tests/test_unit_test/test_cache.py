@@ -0,0 +1,140 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from FinalFinance import create_app
+from FinalFinance.cache import Cache, CacheBackend, CacheNamespace, FileBackend, MemoryBackend, SQLiteBackend, \
+    get_cache, init_cache
+from FinalFinance.instrumentation import metrics
+
+
+class CacheBackendsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        metrics.reset()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def backends(self):
+        yield MemoryBackend()
+        yield FileBackend(os.path.join(self.temp_dir.name, 'files'))
+        yield SQLiteBackend(os.path.join(self.temp_dir.name, 'cache.sqlite3'))
+
+    def test_backends_implement_every_operation(self):
+        class PartialBackend(CacheBackend):
+            def get(self, namespace, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            PartialBackend()
+
+    def test_namespaced_values(self):
+        for backend in self.backends():
+            with self.subTest(backend=type(backend).__name__):
+                cache = Cache(backend)
+                cache.set('analytics', 'A1|A2', {'value': 1})
+                cache.set('diffs', 'A1|A2', None)
+
+                self.assertEqual(cache.get('analytics', 'A1|A2'), {'value': 1})
+                self.assertIsNone(cache.get('diffs', 'A1|A2', 'missing'))
+                self.assertEqual(cache.get('pages', 'A1|A2', 'missing'), 'missing')
+
+                cache.delete_matching('analytics', lambda key: 'A2' in key.split('|'))
+                cache.clear('diffs')
+                self.assertEqual(cache.get('analytics', 'A1|A2', 'missing'), 'missing')
+                self.assertEqual(cache.get('diffs', 'A1|A2', 'missing'), 'missing')
+
+    def test_expired_values_are_missing(self):
+        for backend in self.backends():
+            with self.subTest(backend=type(backend).__name__):
+                cache = Cache(backend, default_ttl=60)
+                cache.set('rss_feeds', 'url', 'feed')
+                self.assertEqual(cache.get('rss_feeds', 'url'), 'feed')
+
+                with patch('FinalFinance.cache.time.time', return_value=time.time() + 61):
+                    self.assertIsNone(cache.get('rss_feeds', 'url'))
+
+    def test_evicts_least_recently_used_entries(self):
+        for backend in self.backends():
+            with self.subTest(backend=type(backend).__name__):
+                cache = Cache(backend)
+                for key in 'abc':
+                    cache.set('analytics', key, key, max_entries=2)
+                    # Distinct access times for the file backend
+                    time.sleep(0.01)
+                    if key == 'b':
+                        cache.get('analytics', 'a')
+                        time.sleep(0.01)
+
+                self.assertEqual(sorted(backend.keys('analytics')), ['a', 'c'])
+
+    def test_evicts_by_size(self):
+        for backend in self.backends():
+            with self.subTest(backend=type(backend).__name__):
+                cache = Cache(backend)
+                for key in 'abc':
+                    cache.set('pages', key, b'x' * 4000, max_bytes=10000)
+                    time.sleep(0.01)
+
+                self.assertEqual(sorted(backend.keys('pages')), ['b', 'c'])
+        self.assertIn('cache_evictions_total{namespace="pages"} 3', metrics.render())
+
+    def test_file_and_sqlite_entries_are_shared(self):
+        path = os.path.join(self.temp_dir.name, 'cache.sqlite3')
+        Cache(SQLiteBackend(path)).set('diffs', 'key', [1, 2])
+        self.assertEqual(Cache(SQLiteBackend(path)).get('diffs', 'key'), [1, 2])
+
+        directory = os.path.join(self.temp_dir.name, 'files')
+        Cache(FileBackend(directory)).set('diffs', 'key', [1, 2])
+        self.assertEqual(Cache(FileBackend(directory)).get('diffs', 'key'), [1, 2])
+
+    def test_get_or_set_computes_once(self):
+        cache = Cache(MemoryBackend())
+        calls = []
+
+        def creator():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_set('analytics', 'key', creator)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 5)
+        self.assertIn('cache_requests_total{namespace="analytics",result="miss"}', metrics.render())
+
+
+class CacheConfigTestCase(unittest.TestCase):
+
+    def test_backend_selected_in_config(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            app = create_app('testing')
+            app.config.update(CACHE_BACKEND='sqlite', CACHE_SQLITE_PATH=os.path.join(temp_dir, 'cache.sqlite3'))
+            init_cache(app)
+
+            with app.app_context():
+                self.assertIsInstance(get_cache().backend, SQLiteBackend)
+                CacheNamespace('analytics').set('key', 'value')
+                self.assertEqual(CacheNamespace('analytics').get('key'), 'value')
+
+        with create_app('testing').app_context():
+            self.assertIsInstance(get_cache().backend, MemoryBackend)
+
+    def test_invalid_namespace(self):
+        with self.assertRaises(ValueError):
+            CacheNamespace('../pages')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from flask import request
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from FinalFinance import create_app, db
+from FinalFinance.config import ProductionConfig, TestingConfig
+from FinalFinance.database import REPLICA_BIND, read_replica
+from FinalFinance.instrumentation import metrics
+from FinalFinance.models import FundData
+
+
+class DatabasePoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+
+        @self.app.route('/pool-exhausted')
+        def pool_exhausted():
+            raise PoolTimeoutError('QueuePool limit of size 4 overflow 2 reached')
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        metrics.reset()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_pool_timeout_returns_service_unavailable(self):
+        response = self.client.get('/pool-exhausted')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], str(self.app.config['DB_POOL_RETRY_AFTER']))
+        self.assertIn('db_pool_timeouts_total{endpoint="pool_exhausted"} 1', metrics.render())
+
+    def test_production_pool_settings(self):
+        options = ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS
+
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertGreater(options['pool_recycle'], 0)
+        self.assertGreater(options['pool_size'], 0)
+        self.assertEqual(ProductionConfig.DEBUG, False)
+
+
+
+class ReadReplicaTestCase(unittest.TestCase):
+    """
+    Uses a second SQLite file as the replica; rows are inserted into only one of the databases so the
+    responses show which one answered.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        replica_url = f"sqlite:///{os.path.join(self.temp_dir.name, 'replica.db')}"
+        with patch.object(TestingConfig, 'SQLALCHEMY_BINDS', {REPLICA_BIND: replica_url}):
+            self.app = create_app('testing')
+
+        @self.app.route('/replica-funds', methods=['GET', 'POST'])
+        @read_replica
+        def replica_funds():
+            if request.method == 'POST' or request.args.get('write'):
+                db.session.add(FundData(fund_name='Written Fund', cik='3'))
+                db.session.commit()
+            return ','.join(sorted(fund.fund_name for fund in FundData.query.all()))
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        db.session.add(FundData(fund_name='Primary Fund', cik='1'))
+        db.session.commit()
+        with db.engines[REPLICA_BIND].begin() as connection:
+            connection.execute(FundData.__table__.insert(), {'fund_name': 'Replica Fund', 'cik': '2'})
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        for engine in db.engines.values():
+            engine.dispose()
+        self.app_context.pop()
+        # init_app registered an (empty) metadata for the bind on the shared db object
+        db.metadatas.pop(REPLICA_BIND, None)
+        self.temp_dir.cleanup()
+
+    def test_read_only_view_reads_from_replica(self):
+        response = self.client.get('/replica-funds')
+
+        self.assertEqual(response.get_data(as_text=True), 'Replica Fund')
+
+    def test_queries_outside_replica_views_use_primary(self):
+        self.assertEqual([fund.fund_name for fund in FundData.query.all()], ['Primary Fund'])
+        self.assertEqual(self.client.post('/replica-funds').get_data(as_text=True), 'Primary Fund,Written Fund')
+
+    def test_reads_after_a_write_use_primary(self):
+        response = self.client.get('/replica-funds?write=1')
+        self.assertEqual(response.get_data(as_text=True), 'Primary Fund,Written Fund')
+
+        # The next request of the same user still reads its own write
+        self.assertEqual(self.client.get('/replica-funds').get_data(as_text=True), 'Primary Fund,Written Fund')
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        lag = self.app.config['REPLICA_MAX_LAG_SECONDS'] + 1
+        with patch('FinalFinance.database.get_replica_lag', return_value=lag):
+            response = self.client.get('/replica-funds')
+
+        self.assertEqual(response.get_data(as_text=True), 'Primary Fund')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from FinalFinance import create_app, db
+from FinalFinance.diffs import diff_positions, encode_positions, monitor_matrix
+from FinalFinance.frames import HOLDINGS_COLUMNS
+from FinalFinance.models import FundData, FundHoldings
+from FinalFinance.utils import extract_holdings_from_file
+
+CURRENT = '0000000001-24-000002'
+PREVIOUS = '0000000001-24-000001'
+
+FILING = """<SEC-DOCUMENT>
+ACCESSION NUMBER: 0000000001-24-000001
+CONFORMED SUBMISSION TYPE: 13F-HR
+CONFORMED PERIOD OF REPORT: 20240331
+FILED AS OF DATE: 20240515
+COMPANY CONFORMED NAME: Test Fund
+CENTRAL INDEX KEY: 0000000001
+<XML>
+<informationTable>
+<infoTable><nameOfIssuer>Alpha Inc</nameOfIssuer><cusip>AAAAAAAAA</cusip><value>100</value>
+<shrsOrPrnAmt><sshPrnamt>10</sshPrnamt></shrsOrPrnAmt></infoTable>
+<infoTable><nameOfIssuer>Alpha Inc</nameOfIssuer><cusip>AAAAAAAAA</cusip><value>50</value>
+<shrsOrPrnAmt><sshPrnamt>5</sshPrnamt></shrsOrPrnAmt></infoTable>
+<infoTable><nameOfIssuer>Alpha Inc</nameOfIssuer><cusip>AAAAAAAAA</cusip><value>30</value>
+<shrsOrPrnAmt><sshPrnamt>3</sshPrnamt></shrsOrPrnAmt><putCall>PUT</putCall></infoTable>
+</informationTable>
+</XML>
+</SEC-DOCUMENT>
+"""
+
+
+def holdings_frame(rows):
+    return pd.DataFrame(rows, columns=HOLDINGS_COLUMNS)
+
+
+class DiffsTestCase(unittest.TestCase):
+
+    def test_renamed_issuer_is_matched_by_cusip(self):
+        holdings_df = holdings_frame([
+            ('Alpha Inc', 1500.0, 150.0, CURRENT, 'AAAAAAAAA', None),
+            ('Alpha Incorporated', 1000.0, 100.0, PREVIOUS, 'AAAAAAAAA', None),
+        ])
+
+        diff_df = diff_positions(holdings_df, CURRENT, PREVIOUS)
+
+        self.assertEqual(diff_df['Company Name'].tolist(), ['Alpha Inc'])
+        self.assertEqual(diff_df['Change Status'].tolist(), ['Increased'])
+        self.assertEqual(diff_df['Change Percentage'].tolist(), [50.0])
+
+    def test_repeated_lines_are_summed_and_options_kept_apart(self):
+        holdings_df = holdings_frame([
+            ('Alphabet Inc', 100.0, 10.0, CURRENT, 'GOOGLAAAA', None),
+            ('Alphabet Inc', 100.0, 10.0, CURRENT, 'GOOGLAAAA', None),
+            ('Alphabet Inc', 200.0, 20.0, CURRENT, 'GOOGCCCCC', None),
+            ('Alphabet Inc', 50.0, 5.0, CURRENT, 'GOOGLAAAA', 'Put'),
+            ('Alphabet Inc', 100.0, 10.0, PREVIOUS, 'GOOGLAAAA', None),
+            ('Alphabet Inc', 100.0, 10.0, PREVIOUS, 'GOOGCCCCC', None),
+            ('Beta Corp', 100.0, 10.0, PREVIOUS, '000000000', None),
+            ('Beta Corp', 100.0, 10.0, PREVIOUS, '000000000', None),
+        ])
+
+        diff_df = diff_positions(holdings_df, CURRENT, PREVIOUS)
+
+        self.assertEqual(list(zip(diff_df['Company Name'], diff_df['CUSIP'], diff_df['Share Amount'],
+                                  diff_df['Previous Share Amount'], diff_df['Change Status'])), [
+            ('Alphabet Inc', 'GOOGCCCCC', 20, 10, 'Increased'),
+            ('Alphabet Inc', 'GOOGLAAAA', 20, 10, 'Increased'),
+            ('Alphabet Inc (Put)', 'GOOGLAAAA', 5, 0, 'New Investment'),
+            ('Beta Corp', '000000000', 0, 20, 'Position Closed'),
+        ])
+        self.assertEqual(diff_df['Change Amount'].tolist()[-1], -20)
+        # The order does not depend on the order of the input rows
+        shuffled_df = diff_positions(holdings_df.sample(frac=1, random_state=1), CURRENT, PREVIOUS)
+        pd.testing.assert_frame_equal(diff_df, shuffled_df)
+
+    def test_frames_without_cusips_are_matched_by_name(self):
+        holdings_df = pd.DataFrame([('Alpha Inc', 100.0, 10.0, CURRENT), ('Alpha Inc', 100.0, 10.0, PREVIOUS)],
+                                   columns=HOLDINGS_COLUMNS[:4])
+
+        codes, count = encode_positions(holdings_df)
+
+        self.assertEqual(codes.tolist(), [0, 0])
+        self.assertEqual(count, 1)
+
+    def test_rows_without_cusip_and_name_are_a_position_of_their_own(self):
+        holdings_df = holdings_frame([
+            ('Alpha Inc', 100.0, 10.0, CURRENT, 'AAAAAAAAA', None),
+            ('Zeta Corp', 100.0, 10.0, CURRENT, 'ZZZZZZZZZ', None),
+            (None, 100.0, 10.0, CURRENT, None, None),
+        ])
+
+        codes, count = encode_positions(holdings_df)
+
+        self.assertEqual(codes.tolist(), [0, 1, 2])
+        self.assertEqual(count, 3)
+
+    def test_monitor_matrix(self):
+        holdings_df = holdings_frame([
+            ('Beta Corp', 100.0, 10.0, CURRENT, 'BBBBBBBBB', None),
+            ('Alpha Inc', 100.0, 10.0, CURRENT, 'AAAAAAAAA', None),
+            ('Alpha Inc', 100.0, 5.0, CURRENT, 'AAAAAAAAA', None),
+            ('Alpha Corp', 100.0, 7.0, PREVIOUS, 'AAAAAAAAA', None),
+        ])
+
+        matrix_df = monitor_matrix(holdings_df, [(PREVIOUS, '2024 Q1'), (CURRENT, '2024 Q2')])
+
+        self.assertEqual(matrix_df.columns.tolist(), ['Company Name', '2024 Q1', '2024 Q2'])
+        self.assertEqual(matrix_df.values.tolist(), [['Alpha Inc', 7, 15], ['Beta Corp', 0, 10]])
+
+
+class IngestPositionsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add(FundData(fund_name='Test Fund', cik='0000000001'))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_options_and_repeated_lines(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'full-submission.txt')
+            with open(path, 'w') as file:
+                file.write(FILING)
+            # Ingesting the same filing twice must not add the repeated lines up again
+            extract_holdings_from_file(path)
+            extract_holdings_from_file(path)
+
+        holdings = {holding.put_call: holding.share_amount for holding in FundHoldings.query.all()}
+        self.assertEqual(holdings, {None: 15.0, 'Put': 3.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from datetime import date
+from FinalFinance import create_app, db
+from FinalFinance.flows import compute_security_flows, get_consensus_leaderboard, refresh_security_flows
+from FinalFinance.models import FundData, FundHoldings, SecurityFlow, Submission
+
+
+class SecurityFlowTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def ingest(self, cik, accession_number, period, positions, submission_type='13F-HR'):
+        fund = FundData.query.filter_by(cik=cik).first()
+        if not fund:
+            fund = FundData(fund_name=f'Fund {cik}', cik=cik)
+            db.session.add(fund)
+            db.session.commit()
+        db.session.add(Submission(cik=cik, company_name=fund.fund_name, submission_type=submission_type,
+                                  filed_of_date=date(2024, 1, 1), accession_number=accession_number,
+                                  period_of_portfolio=period, fund_data_id=fund.id))
+        for cusip, (shares, value) in positions.items():
+            db.session.add(FundHoldings(company_name=f'Company {cusip}', value_usd=value, share_amount=shares,
+                                        cusip=cusip, cik=cik, accession_number=accession_number,
+                                        period_of_portfolio=period, fund_data_id=fund.id))
+        db.session.commit()
+        refresh_security_flows(cik, period)
+
+    def test_compute_security_flows(self):
+        flows = compute_security_flows({'AAAAAAAAA': ('Alpha', 150.0, 3000.0), 'CCCCCCCCC': ('Gamma', 10.0, 100.0)},
+                                       {'AAAAAAAAA': ('Alpha', 100.0, 1000.0), 'BBBBBBBBB': ('Beta', 40.0, 400.0)})
+        by_cusip = {flow['cusip']: flow for flow in flows}
+
+        self.assertEqual(by_cusip['AAAAAAAAA']['change_status'], 'Increased')
+        # Valued at the current price (20 per share), not the change in reported value
+        self.assertEqual(by_cusip['AAAAAAAAA']['value_change'], 1000.0)
+        self.assertEqual(by_cusip['BBBBBBBBB']['change_status'], 'Closed')
+        self.assertEqual(by_cusip['BBBBBBBBB']['value_change'], -400.0)
+        self.assertEqual(by_cusip['CCCCCCCCC']['change_status'], 'New')
+
+    def test_leaderboard_across_funds(self):
+        self.ingest('0000000001', '0000000001-24-000001', '2024 Q1', {'AAAAAAAAA': (100.0, 1000.0),
+                                                                      'BBBBBBBBB': (50.0, 500.0)})
+        self.ingest('0000000001', '0000000001-24-000002', '2024 Q2', {'AAAAAAAAA': (200.0, 2000.0)})
+        self.ingest('0000000002', '0000000002-24-000001', '2024 Q1', {'AAAAAAAAA': (10.0, 100.0)})
+        self.ingest('0000000002', '0000000002-24-000002', '2024 Q2', {'AAAAAAAAA': (30.0, 300.0),
+                                                                      'BBBBBBBBB': (5.0, 50.0)})
+
+        leaderboard = get_consensus_leaderboard()
+
+        self.assertEqual(leaderboard['period'], '2024 Q2')
+        self.assertEqual([(entry['cusip'], entry['value_change'], entry['buyers'])
+                          for entry in leaderboard['bought']], [('AAAAAAAAA', 1200.0, 2)])
+        self.assertEqual([(entry['cusip'], entry['value_change'], entry['sellers'])
+                          for entry in leaderboard['sold']], [('BBBBBBBBB', -450.0, 1)])
+
+    def test_older_period_ingested_later_and_amendments(self):
+        self.ingest('0000000001', '0000000001-24-000002', '2024 Q2', {'AAAAAAAAA': (200.0, 2000.0)})
+        self.assertEqual(SecurityFlow.query.count(), 0)
+
+        self.ingest('0000000001', '0000000001-24-000001', '2024 Q1', {'AAAAAAAAA': (100.0, 1000.0)})
+        self.assertEqual(SecurityFlow.query.one().shares_change, 100.0)
+
+        # An amendment of Q2 replaces the original filing instead of being counted twice
+        self.ingest('0000000001', '0000000001-24-000003', '2024 Q2', {'AAAAAAAAA': (150.0, 1500.0)}, '13F-HR/A')
+        flow = SecurityFlow.query.one()
+        self.assertEqual((flow.shares_change, flow.accession_number), (50.0, '0000000001-24-000003'))
+
+    def test_series_of_one_period_are_summed(self):
+        self.ingest('0000000001', '0000000001-24-000001', '2024 Q1', {'AAAAAAAAA': (100.0, 1000.0)})
+        self.ingest('0000000001', '0000000001-24-000002', '2024 Q2', {'AAAAAAAAA': (150.0, 1500.0)}, 'NPORT-P')
+        self.ingest('0000000001', '0000000001-24-000003', '2024 Q2', {'AAAAAAAAA': (30.0, 300.0)}, 'NPORT-P')
+
+        flow = SecurityFlow.query.one()
+        self.assertEqual((flow.shares_change, flow.accession_number), (80.0, '0000000001-24-000003'))
+
+
+if __name__ == '__main__':
+    unittest.main()
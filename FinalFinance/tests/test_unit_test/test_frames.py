@@ -0,0 +1,60 @@
+import unittest
+
+import pandas as pd
+from sqlalchemy import select
+
+from benchmarks.generators import seed_fund
+from FinalFinance import create_app, db
+from FinalFinance.frames import HOLDINGS_COLUMNS, read_holdings_frame
+from FinalFinance.models import FundHoldings
+from FinalFinance.utils import fetch_and_process_holdings
+
+
+class HoldingsFrameTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        seed_fund('0000000001', 200, 3)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_matches_object_frame(self):
+        holdings_df = read_holdings_frame(
+            select(FundHoldings.company_name, FundHoldings.value_usd, FundHoldings.share_amount,
+                   FundHoldings.accession_number, FundHoldings.cusip, FundHoldings.put_call))
+
+        expected_df = pd.DataFrame(
+            [(holding.company_name, holding.value_usd, holding.share_amount, holding.accession_number, holding.cusip,
+              holding.put_call) for holding in FundHoldings.query.all()], columns=HOLDINGS_COLUMNS) \
+            .sort_values(['Company Name', 'Accession Number'], ascending=[True, False]).reset_index(drop=True)
+
+        self.assertEqual(holdings_df['Company Name'].dtype, 'category')
+        self.assertTrue(holdings_df['Put/Call'].isna().all())
+        pd.testing.assert_frame_equal(holdings_df.drop(columns='Put/Call').astype(object),
+                                      expected_df.drop(columns='Put/Call').astype(object))
+
+    def test_compact_frame_is_smaller(self):
+        _, _, holdings_df = fetch_and_process_holdings('0000000001', download_missing=False)
+
+        compact_size = holdings_df.memory_usage(deep=True).sum()
+        object_size = holdings_df.astype(object).memory_usage(deep=True).sum()
+        self.assertLess(compact_size * 3, object_size)
+
+    def test_empty_result(self):
+        holdings_df = read_holdings_frame(
+            select(FundHoldings.company_name, FundHoldings.value_usd, FundHoldings.share_amount,
+                   FundHoldings.accession_number, FundHoldings.cusip, FundHoldings.put_call)
+            .where(FundHoldings.cik == '0000000002'))
+
+        self.assertEqual(list(holdings_df.columns), HOLDINGS_COLUMNS)
+        self.assertTrue(holdings_df.empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import pandas as pd
+
+from benchmarks.generators import seed_fund
+from FinalFinance import create_app, db
+from FinalFinance.holdings_cache import clear_holdings_cache, read_cached_holdings, refresh_holdings_cache
+from FinalFinance.instrumentation import metrics
+from FinalFinance.models import FundData, FundHoldings, Submission
+from FinalFinance.utils import fetch_and_process_holdings
+
+CIK = '0000000001'
+
+
+class HoldingsCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.app.config['HOLDINGS_CACHE_DIR'] = self.temp_dir.name
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        seed_fund(CIK, 50, 2)
+        metrics.reset()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.temp_dir.cleanup()
+
+    def add_submission(self):
+        fund = FundData.query.filter_by(cik=CIK).first()
+        db.session.add(Submission(cik=CIK, company_name=fund.fund_name, submission_type='13F-HR',
+                                  filed_of_date=date(2025, 2, 14), accession_number=f'{CIK}-25-000001',
+                                  period_of_portfolio='2024 Q4', fund_data_id=fund.id))
+        db.session.add(FundHoldings(company_name='New Holding Inc', value_usd=100.0, share_amount=10.0,
+                                    cusip='NEWHOLDIN', cik=CIK, accession_number=f'{CIK}-25-000001',
+                                    period_of_portfolio='2024 Q4', fund_data_id=fund.id))
+        db.session.commit()
+
+    def test_first_read_fills_the_cache(self):
+        _, _, holdings_df = fetch_and_process_holdings(CIK, download_missing=False)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, f'{CIK}.arrow')))
+
+        _, _, cached_df = fetch_and_process_holdings(CIK, download_missing=False)
+
+        self.assertIn('holdings_cache_requests_total{result="miss"} 1', metrics.render())
+        self.assertIn('holdings_cache_requests_total{result="hit"} 1', metrics.render())
+        self.assertEqual(cached_df['Company Name'].dtype, 'category')
+        pd.testing.assert_frame_equal(cached_df, holdings_df)
+
+    def test_new_submission_makes_the_cache_stale(self):
+        fetch_and_process_holdings(CIK, download_missing=False)
+        self.add_submission()
+
+        submissions = Submission.query.filter_by(cik=CIK).all()
+        self.assertIsNone(read_cached_holdings(CIK, submissions))
+        self.assertIn('holdings_cache_requests_total{result="stale"} 1', metrics.render())
+
+        refresh_holdings_cache(CIK)
+        cached_df = read_cached_holdings(CIK, submissions)
+        self.assertIn('New Holding Inc', cached_df['Company Name'].tolist())
+
+    def test_uncached_funds_are_not_written_on_ingest(self):
+        refresh_holdings_cache(CIK)
+        clear_holdings_cache()
+
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_cik_must_be_numeric(self):
+        self.assertIsNone(read_cached_holdings('../0000000001', Submission.query.all()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from datetime import date
+from unittest.mock import Mock, patch
+
+from benchmarks.generators import seed_fund
+from FinalFinance import create_app, db
+from FinalFinance.http_cache import get_page_cache
+from FinalFinance.instrumentation import metrics
+from FinalFinance.models import FundData, Submission
+from FinalFinance.utils import fetch_and_process_holdings
+
+CIK = '0000000001'
+
+
+class PageCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['HTTP_CACHE_MAX_BYTES'] = 10000
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def test_evicts_least_recently_used_pages(self):
+        cache = get_page_cache()
+        cache.set('a', (b'x' * 4000, 'text/html'))
+        cache.set('b', (b'x' * 4000, 'text/html'))
+        cache.get('a')
+        cache.set('c', (b'x' * 4000, 'text/html'))
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_disabled_without_size(self):
+        self.app.config['HTTP_CACHE_MAX_BYTES'] = 0
+        self.assertIsNone(get_page_cache())
+
+
+class CachedPagesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['HTTP_CACHE_MAX_BYTES'] = 1024 * 1024
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        seed_fund(CIK, 20, 2)
+        self.client = self.app.test_client()
+        metrics.reset()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_about_answers_conditional_requests(self):
+        response = self.client.get('/about')
+        etag = response.headers['ETag']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'public, max-age=0, s-maxage=60')
+        self.assertIn('Cookie', response.headers['Vary'])
+
+        revalidated = self.client.get('/about', headers={'If-None-Match': etag})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.headers['ETag'], etag)
+        self.assertIn('http_cache_requests_total{result="not_modified"} 1', metrics.render())
+
+    def test_fund_details_served_from_page_cache_until_ingestion(self):
+        with patch('FinalFinance.routes.fetch_and_process_holdings', wraps=fetch_and_process_holdings) as mock_fetch:
+            first = self.client.get(f'/fund_details/{CIK}')
+            second = self.client.get(f'/fund_details/{CIK}')
+
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(second.get_data(), first.get_data())
+            self.assertEqual(mock_fetch.call_count, 1)
+
+            fund = FundData.query.filter_by(cik=CIK).first()
+            db.session.add(Submission(cik=CIK, company_name=fund.fund_name, submission_type='13F-HR',
+                                      filed_of_date=date(2025, 2, 14), accession_number=f'{CIK}-25-000001',
+                                      period_of_portfolio='2024 Q4', fund_data_id=fund.id))
+            db.session.commit()
+
+            third = self.client.get(f'/fund_details/{CIK}', headers={'If-None-Match': first.headers['ETag']})
+            self.assertEqual(third.status_code, 200)
+            self.assertNotEqual(third.headers['ETag'], first.headers['ETag'])
+            self.assertEqual(mock_fetch.call_count, 2)
+
+    def test_flashing_responses_are_not_cached(self):
+        response = self.client.get('/fund_search')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+
+    @patch('FinalFinance.routes.save_plot_to_file')
+    @patch('FinalFinance.utils.fetch_rss_feed', return_value=Mock(entries=[]))
+    def test_home_revalidates_feeds_when_not_modified(self, mock_fetch, mock_plot):
+        etag = self.client.get('/').headers['ETag']
+        mock_fetch.reset_mock()
+
+        response = self.client.get('/', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        # Stale feeds are still refreshed in the background
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertTrue(all(call.kwargs['background'] for call in mock_fetch.call_args_list))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from benchmarks.generators import write_filing
+from FinalFinance import create_app, db
+from FinalFinance.ingestion import IngestionContext
+from FinalFinance.models import FundData, FundHoldings, Submission
+from FinalFinance.utils import extract_holdings_from_file
+
+CIK = '0009999999'
+
+
+class IngestionContextTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.temp_dir = tempfile.mkdtemp()
+        db.session.add(FundData(fund_name='Benchmark Fund', cik=CIK))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.temp_dir)
+
+    def count_lookups(self, function):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT') and \
+                    ('FROM fund_data' in statement or 'FROM submission' in statement or
+                     'FROM fund_holdings' in statement):
+                statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            function()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return statements
+
+    def test_lookups_are_preloaded_once_per_batch(self):
+        paths = [write_filing(self.temp_dir, CIK, 20, seed=seed)[0] for seed in range(3)]
+        context = IngestionContext([CIK])
+        self.assertEqual(context.submission_ids, {})
+
+        def ingest():
+            for path in paths:
+                extract_holdings_from_file(path, context)
+
+        # Fund summaries and flows read the stored holdings, but the ingestion itself does not look anything up
+        with patch('FinalFinance.utils.refresh_fund_summaries'), \
+                patch('FinalFinance.utils.refresh_security_flows'), \
+                patch('FinalFinance.utils.refresh_holdings_cache'):
+            statements = self.count_lookups(ingest)
+
+        self.assertEqual(statements, [])
+        self.assertEqual(Submission.query.count(), 3)
+        self.assertEqual(set(context.submission_ids), {submission.accession_number
+                                                       for submission in Submission.query.all()})
+
+    def test_reingest_updates_stored_filing(self):
+        path, accession_number = write_filing(self.temp_dir, CIK, 20)
+        extract_holdings_from_file(path)
+        holdings_count = FundHoldings.query.count()
+        value = Submission.query.one().fund_portfolio_value
+
+        Submission.query.one().fund_portfolio_value = 0.0
+        db.session.commit()
+        extract_holdings_from_file(path, IngestionContext([CIK]))
+
+        self.assertEqual(Submission.query.count(), 1)
+        self.assertEqual(Submission.query.one().fund_portfolio_value, value)
+        self.assertEqual(FundHoldings.query.count(), holdings_count)
+
+    def test_unknown_fund(self):
+        context = IngestionContext(['0000000001'])
+        self.assertIsNone(context.get_fund_id('0000000001'))
+        self.assertIsNotNone(context.get_fund_id(CIK))
+        self.assertIsNone(context.get_submission_id(CIK, '0009999999-24-000001'))
+
+
+if __name__ == '__main__':
+    unittest.main()
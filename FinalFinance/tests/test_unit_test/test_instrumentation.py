@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import patch
+from FinalFinance import create_app, db
+from FinalFinance.models import FundData
+from FinalFinance.instrumentation import MetricsRegistry, metrics, summarize_queries
+
+
+class MetricsRegistryTestCase(unittest.TestCase):
+
+    def test_render_counters_and_histograms(self):
+        registry = MetricsRegistry()
+        registry.describe('requests_total', 'counter', 'Requests.')
+        registry.inc('requests_total', endpoint='routes.home')
+        registry.inc('requests_total', endpoint='routes.home')
+        registry.observe('duration_seconds', 0.02, endpoint='routes.home')
+
+        output = registry.render()
+
+        self.assertIn('# TYPE requests_total counter', output)
+        self.assertIn('requests_total{endpoint="routes.home"} 2', output)
+        self.assertIn('duration_seconds_bucket{endpoint="routes.home",le="0.01"} 0', output)
+        self.assertIn('duration_seconds_bucket{endpoint="routes.home",le="0.025"} 1', output)
+        self.assertIn('duration_seconds_count{endpoint="routes.home"} 1', output)
+
+    def test_summarize_queries_groups_repeated_statements(self):
+        query_log = [('SELECT a', 0.01), ('SELECT b', 0.001), ('SELECT b', 0.001), ('SELECT b', 0.001)]
+
+        summary = summarize_queries(query_log)
+
+        self.assertEqual(summary[0], ('SELECT a', 1, 0.01))
+        self.assertEqual(summary[1][:2], ('SELECT b', 3))
+
+
+class RequestInstrumentationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['SLOW_REQUEST_THRESHOLD_MS'] = 0
+        self.app.config['METRICS_ENABLED'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        metrics.reset()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_request_timing_and_metrics_endpoint(self):
+        db.session.add(FundData(fund_name='Test Fund A', cik='0001234567'))
+        db.session.commit()
+
+        with patch('FinalFinance.instrumentation.logger') as mock_logger:
+            response = self.client.get('/fund_search?query=Test')
+            response.close()
+
+        self.assertIn('db;dur=', response.headers['Server-Timing'])
+        self.assertIn('render;dur=', response.headers['Server-Timing'])
+        self.assertIn('Slow request GET /fund_search?query=Test', mock_logger.warning.call_args_list[0][0][0])
+
+        output = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('http_requests_total{endpoint="routes.fund_search",method="GET",status="200"} 1', output)
+        self.assertIn('db_queries_total{endpoint="routes.fund_search"}', output)
+
+    def test_metrics_endpoint_access(self):
+        self.app.config['METRICS_ENABLED'] = False
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+        self.app.config.update(METRICS_ENABLED=True, METRICS_TOKEN='secret')
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code, 401)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code, 200)
+
+    def test_repeated_statements_are_flagged_on_fast_requests(self):
+        self.app.config.update(SLOW_REQUEST_THRESHOLD_MS=60000, N_PLUS_ONE_QUERY_THRESHOLD=1)
+
+        with patch('FinalFinance.instrumentation.logger') as mock_logger:
+            self.client.get('/fund_search?query=Test').close()
+
+        self.assertIn('Possible N+1 query in GET /fund_search?query=Test', mock_logger.warning.call_args[0][0])
+        self.assertIn('n_plus_one_queries_total{endpoint="routes.fund_search"}', metrics.render())
+
+    def test_failed_statement_does_not_leave_its_start_time(self):
+        with db.engine.connect() as connection:
+            with self.assertRaises(Exception):
+                connection.exec_driver_sql('SELECT * FROM missing_table')
+            self.assertEqual(connection.info.get('query_start_times'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
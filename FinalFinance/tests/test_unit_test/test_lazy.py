@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+import unittest
+from FinalFinance.lazy import LazyImport
+
+
+class LazyImportTestCase(unittest.TestCase):
+
+    def test_module_is_imported_on_first_use(self):
+        lazy_json = LazyImport('json')
+        dumps = LazyImport('json', 'dumps')
+
+        self.assertIn('LazyImport json>', repr(lazy_json))
+        self.assertEqual(lazy_json.loads('[1]'), [1])
+        self.assertEqual(dumps({'a': 1}), '{"a": 1}')
+        self.assertIn('(loaded)', repr(lazy_json))
+
+    def test_application_import_skips_heavy_dependencies(self):
+        code = ("import sys, FinalFinance; "
+                "print(sorted(m for m in ('pandas', 'matplotlib', 'yfinance', 'bs4', 'openpyxl') if m in sys.modules))")
+        project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=project_dir).stdout
+
+        self.assertEqual(output.strip().splitlines()[-1], '[]')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from benchmarks.generators import write_filing
+from FinalFinance import create_app, db
+from FinalFinance.models import FundData, FundHoldings
+from FinalFinance.nport import parse_nport_positions
+from FinalFinance.utils import extract_holdings_from_file
+
+CIK = '0009999999'
+
+PREFIXED_FILING = """<SEC-DOCUMENT>
+<XML>
+<nport:edgarSubmission xmlns:nport="http://www.sec.gov/edgar/nport" xmlns:com="http://www.sec.gov/edgar/common">
+<nport:formData>
+<nport:fundInfo><nport:netAssets>1000.00</nport:netAssets></nport:fundInfo>
+<nport:invstOrSecs>
+<nport:invstOrSec>
+<nport:name>Smith &amp; Sons Corp</nport:name>
+<nport:lei>N/A</nport:lei>
+<nport:cusip>123456789</nport:cusip>
+<nport:balance>10.5</nport:balance>
+<nport:valUSD>600.00</nport:valUSD>
+<nport:pctVal>60.0</nport:pctVal>
+<nport:assetConditional assetCat="OTHER" desc="Warrant"/>
+<nport:derivativeInfo><nport:fwdDeriv><nport:name>Counterparty Bank</nport:name></nport:fwdDeriv>
+</nport:derivativeInfo>
+<com:note>Reported in USD</com:note>
+</nport:invstOrSec>
+<nport:invstOrSec>
+<nport:name>Bond Issuer LLC</nport:name>
+<nport:lei>549300ABCDEFGHIJKL12</nport:lei>
+<nport:cusip>987654321</nport:cusip>
+<nport:balance>4</nport:balance>
+<nport:valUSD>400.00</nport:valUSD>
+<nport:pctVal>40.0</nport:pctVal>
+<nport:assetCat>DBT</nport:assetCat>
+</nport:invstOrSec>
+</nport:invstOrSecs>
+</nport:formData>
+</nport:edgarSubmission>
+</XML>
+</SEC-DOCUMENT>
+"""
+
+
+class NportParserTestCase(unittest.TestCase):
+
+    def test_prefixed_section_is_streamed(self):
+        positions = parse_nport_positions(PREFIXED_FILING)
+
+        self.assertEqual(positions, [
+            {'company_name': 'Smith & Sons Corp', 'cusip': '123456789', 'value_usd': 600.0, 'share_amount': 10.5,
+             'put_call': None, 'asset_category': 'OTHER', 'issuer_lei': None, 'pct_of_net_assets': 60.0},
+            {'company_name': 'Bond Issuer LLC', 'cusip': '987654321', 'value_usd': 400.0, 'share_amount': 4.0,
+             'put_call': None, 'asset_category': 'DBT', 'issuer_lei': '549300ABCDEFGHIJKL12',
+             'pct_of_net_assets': 40.0},
+        ])
+
+    def test_filings_that_cannot_be_streamed(self):
+        self.assertIsNone(parse_nport_positions('<informationTable><infoTable></infoTable></informationTable>'))
+        # HTML entities are not defined in XML
+        malformed = PREFIXED_FILING.replace('Smith &amp; Sons', 'Smith&nbsp;Sons')
+        self.assertIsNone(parse_nport_positions(malformed))
+
+
+class NportIngestionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.temp_dir = tempfile.mkdtemp()
+        db.session.add(FundData(fund_name='Benchmark Fund', cik=CIK))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.temp_dir)
+
+    def stored_holdings(self):
+        return sorted((holding.cusip, holding.value_usd, holding.share_amount, holding.asset_category,
+                       holding.issuer_lei, round(holding.pct_of_net_assets, 6))
+                      for holding in FundHoldings.query)
+
+    def test_streamed_and_parsed_filings_store_the_same_holdings(self):
+        path, _ = write_filing(self.temp_dir, CIK, 30, 'NPORT-P')
+        extract_holdings_from_file(path)
+        streamed = self.stored_holdings()
+
+        FundHoldings.query.delete()
+        db.session.commit()
+        with patch('FinalFinance.utils.parse_nport_positions', return_value=None):
+            extract_holdings_from_file(path)
+
+        self.assertEqual(len(streamed), 30)
+        self.assertEqual(streamed[0][3:5], ('EC', f'5493{streamed[0][0]}{streamed[0][0][-7:]}'))
+        self.assertEqual(self.stored_holdings(), streamed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import pandas as pd
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from FinalFinance import create_app, db
+from FinalFinance.models import FundData, FundHoldings, Submission
+from FinalFinance.partitions import archive_holdings, get_retention_cutoff, holdings_partition_name
+from FinalFinance.utils import fetch_and_process_holdings
+
+
+class PartitionsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        fund = FundData(fund_name='Test Fund', cik='0000000001')
+        db.session.add(fund)
+        db.session.commit()
+        for sequence, period in enumerate(['2020 Q4', '2021 Q1', '2024 Q2']):
+            accession_number = f'0000000001-24-00000{sequence}'
+            db.session.add(Submission(cik=fund.cik, company_name=fund.fund_name, submission_type='13F-HR',
+                                      filed_of_date=date(2024, 1, 1), accession_number=accession_number,
+                                      period_of_portfolio=period, fund_data_id=fund.id))
+            for company_name in ('Apple Inc', 'Microsoft Corp'):
+                db.session.add(FundHoldings(company_name=company_name, value_usd=100.0, share_amount=10.0,
+                                            cusip='000000000', cik=fund.cik, accession_number=accession_number,
+                                            period_of_portfolio=period, fund_data_id=fund.id))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.temp_dir.cleanup()
+
+    def test_partition_names(self):
+        self.assertEqual(holdings_partition_name('2024 Q1'), 'fund_holdings_2024_q1')
+        self.assertIsNone(holdings_partition_name('2024 Q1; DROP TABLE user'))
+        self.assertIsNone(holdings_partition_name(None))
+
+    def test_table_is_partitioned_by_period_on_postgresql(self):
+        ddl = str(CreateTable(FundHoldings.__table__).compile(dialect=postgresql.dialect()))
+
+        self.assertIn('PARTITION BY LIST (period_of_portfolio)', ddl)
+        self.assertIn('PRIMARY KEY (id, period_of_portfolio)', ddl)
+
+    def test_retention_cutoff(self):
+        self.assertEqual(get_retention_cutoff(1, date(2024, 5, 15)), '2024 Q2')
+        self.assertEqual(get_retention_cutoff(8, date(2024, 5, 15)), '2022 Q3')
+
+    def test_archive_moves_old_periods_to_parquet(self):
+        archived = archive_holdings(4, self.temp_dir.name, today=date(2024, 5, 15))
+
+        self.assertEqual([entry['period_of_portfolio'] for entry in archived], ['2020 Q4', '2021 Q1'])
+        archived_df = pd.read_parquet(os.path.join(self.temp_dir.name, 'fund_holdings_2020_Q4.parquet'))
+        self.assertEqual(sorted(archived_df['company_name']), ['Apple Inc', 'Microsoft Corp'])
+        self.assertEqual({period for period, in db.session.query(FundHoldings.period_of_portfolio).distinct()},
+                         {'2024 Q2'})
+        # Submissions stay, so the filing history is still complete
+        self.assertEqual(Submission.query.count(), 3)
+
+    def test_dry_run_keeps_holdings(self):
+        archived = archive_holdings(4, self.temp_dir.name, dry_run=True, today=date(2024, 5, 15))
+
+        self.assertEqual(len(archived), 2)
+        self.assertEqual(FundHoldings.query.count(), 6)
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_fetch_and_process_holdings_after_archive(self):
+        archive_holdings(4, self.temp_dir.name, today=date(2024, 5, 15))
+
+        fund, all_submissions, holdings_df = fetch_and_process_holdings('0000000001', download_missing=False)
+
+        self.assertEqual(len(all_submissions), 3)
+        self.assertEqual(len(holdings_df), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+from FinalFinance import create_app, db
+from FinalFinance.flows import refresh_security_flows
+from FinalFinance.models import FundData, FundHoldings, Submission
+from FinalFinance.snapshots import build_well_known_snapshot, get_panel_state, get_well_known_panel
+from FinalFinance.summaries import refresh_fund_summaries
+
+FUNDS = {'0000000001': 'Fund One', '0000000002': 'Fund Two'}
+
+
+class WellKnownSnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def ingest(self, cik, accession_number, period, positions, submission_type='13F-HR'):
+        fund = FundData.query.filter_by(cik=cik).first()
+        if not fund:
+            fund = FundData(fund_name=FUNDS[cik], cik=cik)
+            db.session.add(fund)
+            db.session.commit()
+        db.session.add(Submission(cik=cik, company_name=fund.fund_name, submission_type=submission_type,
+                                  filed_of_date=date(2024, 1, 1), accession_number=accession_number,
+                                  period_of_portfolio=period, fund_data_id=fund.id))
+        for cusip, (shares, value) in positions.items():
+            db.session.add(FundHoldings(company_name=f'Company {cusip}', value_usd=value, share_amount=shares,
+                                        cusip=cusip, cik=cik, accession_number=accession_number,
+                                        period_of_portfolio=period, fund_data_id=fund.id))
+        db.session.commit()
+        refresh_fund_summaries(cik, accession_number)
+        refresh_security_flows(cik, period)
+
+    def test_snapshot_of_latest_period(self):
+        self.ingest('0000000001', '0000000001-24-000001', '2024 Q1', {'AAAAAAAAA': (100.0, 1000.0),
+                                                                      'BBBBBBBBB': (50.0, 500.0)})
+        self.ingest('0000000001', '0000000001-24-000002', '2024 Q2', {'AAAAAAAAA': (300.0, 3000.0),
+                                                                      'CCCCCCCCC': (10.0, 100.0)})
+
+        snapshot = build_well_known_snapshot(FUNDS)
+
+        self.assertEqual([fund['cik'] for fund in snapshot], list(FUNDS))
+        fund_one, fund_two = snapshot
+        self.assertEqual(fund_one['period'], '2024 Q2')
+        self.assertEqual(fund_one['aum'], 3100.0)
+        self.assertEqual(fund_one['position_count'], 2)
+        self.assertEqual([(mover['company_name'], mover['value_change']) for mover in fund_one['top_movers']],
+                         [('Company AAAAAAAAA', 2000.0), ('Company BBBBBBBBB', -500.0),
+                          ('Company CCCCCCCCC', 100.0)])
+        self.assertIsNone(fund_two['aum'])
+        self.assertEqual(fund_two['top_movers'], [])
+
+    def test_series_of_the_latest_period_are_added_up(self):
+        self.ingest('0000000001', '0000000001-24-000001', '2024 Q1', {'AAAAAAAAA': (100.0, 1000.0)}, 'NPORT-P')
+        self.ingest('0000000001', '0000000001-24-000002', '2024 Q2', {'AAAAAAAAA': (100.0, 1000.0),
+                                                                      'BBBBBBBBB': (50.0, 500.0)}, 'NPORT-P')
+        self.ingest('0000000001', '0000000001-24-000003', '2024 Q2', {'AAAAAAAAA': (20.0, 200.0)}, 'NPORT-P')
+        self.ingest('0000000001', '0000000001-24-000004', '2024 Q2', {'AAAAAAAAA': (30.0, 300.0),
+                                                                      'CCCCCCCCC': (10.0, 100.0)}, 'NPORT-P/A')
+
+        fund_one = build_well_known_snapshot(FUNDS)[0]
+
+        self.assertEqual((fund_one['period'], fund_one['aum'], fund_one['position_count']), ('2024 Q2', 1900.0, 3))
+
+    def test_panel_is_rendered_once_per_version(self):
+        with self.app.test_request_context('/'), \
+                patch('FinalFinance.snapshots.build_well_known_snapshot',
+                      wraps=build_well_known_snapshot) as mock_build:
+            first = get_well_known_panel(FUNDS)
+            second = get_well_known_panel(FUNDS)
+
+            self.assertIs(first, second)
+            self.assertEqual(mock_build.call_count, 1)
+            self.assertIn('Fund One', first)
+
+    def test_stale_panel_is_served_while_refreshing(self):
+        with self.app.test_request_context('/'):
+            stale = get_well_known_panel(FUNDS)
+            self.ingest('0000000001', '0000000001-24-000001', '2024 Q1', {'AAAAAAAAA': (100.0, 1000.0)})
+
+            with patch('FinalFinance.snapshots.threading.Thread') as mock_thread:
+                self.assertIs(get_well_known_panel(FUNDS), stale)
+                self.assertIs(get_well_known_panel(FUNDS), stale)
+
+            # A single refresh is started for the new version
+            mock_thread.assert_called_once()
+            self.assertTrue(get_panel_state(self.app)['refreshing'])
+
+
+if __name__ == '__main__':
+    unittest.main()
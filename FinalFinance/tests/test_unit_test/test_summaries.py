@@ -0,0 +1,100 @@
+import unittest
+from datetime import date
+from FinalFinance import create_app, db
+from FinalFinance.models import FundData, FundHoldings, FundSummary, Submission
+from FinalFinance.summaries import compute_summary, rebuild_fund_summaries, refresh_fund_summaries
+
+
+class FundSummaryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.fund = FundData(fund_name='Test Fund', cik='0000000001')
+        db.session.add(self.fund)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_submission(self, accession_number, period, positions, submission_type='13F-HR'):
+        db.session.add(Submission(cik=self.fund.cik, company_name=self.fund.fund_name, submission_type=submission_type,
+                                  filed_of_date=date(2024, 1, 1), accession_number=accession_number,
+                                  period_of_portfolio=period, fund_data_id=self.fund.id))
+        for company_name, value in positions.items():
+            db.session.add(FundHoldings(company_name=company_name, value_usd=value, share_amount=1.0,
+                                        cusip='000000000', cik=self.fund.cik, accession_number=accession_number,
+                                        period_of_portfolio=period, fund_data_id=self.fund.id))
+        db.session.commit()
+
+    def test_compute_summary(self):
+        positions = {f'Company {index}': float(index) for index in range(1, 13)}
+        summary = compute_summary(positions, {'Company 1': 1.0, 'Sold Corp': 1.0})
+
+        self.assertEqual(summary['aum'], 78.0)
+        self.assertEqual(summary['position_count'], 12)
+        self.assertEqual(summary['new_positions'], 11)
+        self.assertEqual(summary['closed_positions'], 1)
+        self.assertAlmostEqual(summary['top10_concentration'], (78.0 - 1.0 - 2.0) / 78.0)
+        self.assertIsNone(compute_summary(positions, None)['turnover'])
+
+    def test_unchanged_portfolio_has_no_turnover(self):
+        summary = compute_summary({'Alpha': 10.0, 'Beta': 30.0}, {'Alpha': 5.0, 'Beta': 15.0})
+
+        self.assertEqual(summary['turnover'], 0.0)
+
+    def test_older_submission_ingested_later_updates_the_next_summary(self):
+        self.add_submission('0000000001-24-000002', '2024 Q2', {'Alpha': 50.0, 'Gamma': 50.0})
+        refresh_fund_summaries(self.fund.cik, '0000000001-24-000002')
+        self.assertIsNone(FundSummary.query.filter_by(period_of_portfolio='2024 Q2').one().turnover)
+
+        self.add_submission('0000000001-24-000001', '2024 Q1', {'Alpha': 100.0})
+        refresh_fund_summaries(self.fund.cik, '0000000001-24-000001')
+
+        newest = FundSummary.query.filter_by(period_of_portfolio='2024 Q2').one()
+        self.assertEqual(FundSummary.query.count(), 2)
+        self.assertEqual(newest.new_positions, 1)
+        self.assertEqual(newest.closed_positions, 0)
+        self.assertAlmostEqual(newest.turnover, 0.5)
+
+    def test_amendment_is_measured_against_the_previous_period(self):
+        self.add_submission('0000000001-24-000001', '2024 Q1', {'Alpha': 100.0})
+        self.add_submission('0000000001-24-000002', '2024 Q2', {'Alpha': 100.0, 'Beta': 100.0})
+        self.add_submission('0000000001-24-000003', '2024 Q2', {'Alpha': 100.0, 'Gamma': 100.0}, '13F-HR/A')
+        self.add_submission('0000000001-24-000004', '2024 Q3', {'Gamma': 100.0})
+        for sequence in range(1, 5):
+            refresh_fund_summaries(self.fund.cik, f'0000000001-24-00000{sequence}')
+
+        for rebuilt in (False, True):
+            if rebuilt:
+                self.assertEqual(rebuild_fund_summaries(self.fund.cik), 4)
+            summaries = {summary.accession_number[-1]: summary for summary in FundSummary.query}
+            self.assertEqual([(summaries[sequence].new_positions, summaries[sequence].closed_positions)
+                              for sequence in '234'], [(1, 0), (1, 0), (0, 1)])
+            self.assertAlmostEqual(summaries['4'].turnover, 0.5)
+
+    def test_positions_are_matched_like_the_diff_page(self):
+        holdings = {'0000000001-24-000001': ('2024 Q1', [('Alpha Inc', 'AAAAAAAAA', None, 100.0)]),
+                    '0000000001-24-000002': ('2024 Q2', [('Alpha Incorporated', 'AAAAAAAAA', None, 100.0),
+                                                         ('Alpha Incorporated', 'AAAAAAAAA', 'Put', 10.0)])}
+        for accession_number, (period, positions) in holdings.items():
+            self.add_submission(accession_number, period, {})
+            for company_name, cusip, put_call, value in positions:
+                db.session.add(FundHoldings(company_name=company_name, value_usd=value, share_amount=1.0, cusip=cusip,
+                                            put_call=put_call, cik=self.fund.cik, accession_number=accession_number,
+                                            period_of_portfolio=period, fund_data_id=self.fund.id))
+            db.session.commit()
+            refresh_fund_summaries(self.fund.cik, accession_number)
+
+        newest = FundSummary.query.filter_by(period_of_portfolio='2024 Q2').one()
+        self.assertEqual(newest.position_count, 2)
+        self.assertEqual((newest.new_positions, newest.closed_positions), (1, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,10 +4,20 @@ from unittest.mock import MagicMock, patch
 import pandas as pd
 from FinalFinance import create_app, db
 from FinalFinance.utils import get_user_agent, download_and_store_all_companies_names_and_cik_from_edgar, \
-    save_plot_to_file, extract_holdings_from_file
+    save_plot_to_file, extract_holdings_from_file, find_missing_filings, discover_missing_filings, \
+    fetch_and_process_holdings, parse_date_window, HOLDINGS_FILING_TYPES
 from FinalFinance.models import FundData, Submission, FundHoldings
 import tempfile
 import shutil
+import json
+from datetime import date, datetime
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixture(file_name):
+    with open(os.path.join(FIXTURES_DIR, file_name)) as file:
+        return json.load(file)
 
 
 class UtilsTestCase(unittest.TestCase):
@@ -103,5 +113,118 @@ class UtilsTestCase(unittest.TestCase):
             self.assertEqual(added_fund_holding.share_amount, 50)
             self.assertEqual(added_fund_holding.cusip, "123456789")
 
+
+class SubmissionsIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.submissions_index = load_fixture('CIK0001067983.json')
+
+    def test_find_missing_filings_filters_forms_dates_and_existing(self):
+        missing = find_missing_filings(self.submissions_index['filings']['recent'],
+                                       {'0000950123-24-005913'}, ['13F-HR'],
+                                       datetime(2023, 5, 1), datetime(2024, 7, 24))
+
+        self.assertEqual([filing['accession_number'] for filing in missing],
+                         ['0000950123-24-002518', '0000950123-23-008074', '0000950123-23-005270'])
+        self.assertEqual(missing[0]['report_date'], '2023-12-31')
+        self.assertEqual(missing[0]['primary_document'], 'xslForm13F_X02/primary_doc.xml')
+
+    @patch('FinalFinance.utils.requests.Session.get')
+    def test_discover_missing_filings_skips_older_pages_outside_window(self, mock_get):
+        mock_get.return_value.json.return_value = self.submissions_index
+
+        missing = discover_missing_filings('0001067983', set(), ['13F-HR'],
+                                           datetime(2023, 1, 1), datetime(2024, 12, 31))
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(len(missing), 6)
+
+    @patch('FinalFinance.utils.requests.Session.get')
+    def test_discover_missing_filings_includes_amendments(self, mock_get):
+        mock_get.return_value.json.return_value = self.submissions_index
+
+        missing = discover_missing_filings('0001067983', set(), HOLDINGS_FILING_TYPES,
+                                           datetime(2023, 1, 1), datetime(2024, 12, 31))
+
+        self.assertEqual(len(missing), 7)
+        self.assertEqual([filing['form'] for filing in missing
+                          if filing['accession_number'] == '0000950123-23-011301'], ['13F-HR/A'])
+
+    @patch('FinalFinance.utils.requests.Session.get')
+    def test_discover_missing_filings_reads_older_pages_in_window(self, mock_get):
+        pages = {
+            'CIK0001067983.json': self.submissions_index,
+            'CIK0001067983-submissions-001.json': load_fixture('CIK0001067983-submissions-001.json'),
+        }
+
+        def get(url, headers=None):
+            response = MagicMock()
+            response.json.return_value = pages[url.rsplit('/', 1)[1]]
+            return response
+
+        mock_get.side_effect = get
+        existing = {'0000950123-22-008829', '0000950123-23-002585'}
+
+        missing = discover_missing_filings('1067983', existing, ['13F-HR'],
+                                           datetime(2022, 6, 1), datetime(2023, 6, 30))
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual([filing['accession_number'] for filing in missing],
+                         ['0000950123-23-005270', '0000950123-22-012345'])
+
+
+class DateWindowTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        fund = FundData(fund_name='Test Fund A', cik='0001234567')
+        db.session.add(fund)
+        db.session.commit()
+        for number, filed_of_date in enumerate([date(2023, 5, 15), date(2024, 5, 15), date(2024, 8, 14)]):
+            accession_number = f'0001234567-24-00000{number}'
+            db.session.add(Submission(cik=fund.cik, company_name=fund.fund_name, submission_type='13F-HR',
+                                      filed_of_date=filed_of_date, accession_number=accession_number,
+                                      period_of_portfolio=f'Period {number}', fund_data_id=fund.id))
+            db.session.add(FundHoldings(company_name=f'Company {number}', value_usd=1000.0, share_amount=10.0,
+                                        cusip=f'{number:09d}', cik=fund.cik, accession_number=accession_number,
+                                        period_of_portfolio=f'Period {number}', fund_data_id=fund.id))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_fetch_reads_only_the_window(self):
+        with patch('FinalFinance.utils.read_cached_holdings') as mock_cached:
+            _, submissions, holdings_df = fetch_and_process_holdings('0001234567', datetime(2024, 1, 1),
+                                                                     datetime(2024, 5, 15, 12, 30))
+
+        mock_cached.assert_not_called()
+        self.assertEqual([submission['accession_number'] for submission in submissions],
+                         ['0001234567-24-000001'])
+        self.assertEqual(list(holdings_df['Company Name']), ['Company 1'])
+
+    def test_fetch_with_open_window(self):
+        _, submissions, holdings_df = fetch_and_process_holdings('0001234567', start_date=date(2024, 1, 1))
+        self.assertEqual(len(submissions), 2)
+
+        _, submissions, holdings_df = fetch_and_process_holdings('0001234567')
+        self.assertEqual(len(submissions), 3)
+        self.assertEqual(len(holdings_df), 3)
+
+    def test_parse_date_window(self):
+        self.assertEqual(parse_date_window({'start_date': '2024-01-01', 'end_date': ''}), (date(2024, 1, 1), None))
+        self.assertEqual(parse_date_window({}), (None, None))
+        with self.assertRaises(ValueError):
+            parse_date_window({'start_date': '2024-13-01'})
+        with self.assertRaises(ValueError):
+            parse_date_window({'start_date': '2024-02-01', 'end_date': '2024-01-01'})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+from FinalFinance import create_app, db
+from FinalFinance.models import User, FundData, AddFundToFavorites, Submission
+from FinalFinance.watcher import FilingWatcher
+
+
+def feed_entry(cik, acc_no, form_type='13F-HR'):
+    return {'company_name': 'Test Fund', 'form_type': form_type, 'cik': cik, 'filed_date': '2024-05-15',
+            'acc_no': acc_no}
+
+
+class FilingWatcherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(username='watcher', email='watcher@example.com', password='Password123!')
+        watched_fund = FundData(fund_name='Watched Fund', cik='0001067983')
+        other_fund = FundData(fund_name='Other Fund', cik='0000089043')
+        db.session.add_all([user, watched_fund, other_fund])
+        db.session.commit()
+
+        db.session.add(AddFundToFavorites(user_id=user.id, fund_id=watched_fund.id))
+        db.session.add(Submission(cik='0001067983', company_name='Watched Fund', submission_type='13F-HR',
+                                  filed_of_date=date(2024, 2, 14), accession_number='0000950123-24-002518',
+                                  period_of_portfolio='2023 Q4', fund_data_id=watched_fund.id))
+        db.session.commit()
+
+        self.watcher = FilingWatcher(self.app)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    @patch('FinalFinance.watcher.get_rss_feed_entries')
+    def test_poll_once_enqueues_only_new_filings_of_watched_funds(self, mock_entries):
+        mock_entries.return_value = [
+            feed_entry('0001067983', '0000950123-24-005913'),
+            feed_entry('0001067983', '0000950123-24-002518'),
+            feed_entry('0001067983', '0000950123-24-005914', form_type='13F-HR/A'),
+            feed_entry('0000089043', '0000089043-24-000010', form_type='NPORT-P'),
+            None,
+        ]
+
+        enqueued = self.watcher.poll_once()
+
+        self.assertEqual([entry['acc_no'] for entry in enqueued], ['0000950123-24-005913', '0000950123-24-005914'])
+        self.assertEqual(self.watcher.queue.qsize(), 2)
+        self.assertEqual(self.watcher.poll_once(), [])
+
+    @patch('FinalFinance.watcher.ingest_filing', return_value=True)
+    @patch('FinalFinance.watcher.get_rss_feed_entries')
+    def test_process_queue_ingests_enqueued_filings(self, mock_entries, mock_ingest):
+        mock_entries.return_value = [feed_entry('0001067983', '0000950123-24-005913')]
+        self.watcher.poll_once()
+
+        processed = self.watcher.process_queue()
+
+        self.assertEqual(processed, 1)
+        mock_ingest.assert_called_once_with('0001067983', '0000950123-24-005913', '13F-HR')
+        self.assertTrue(self.watcher.queue.empty())
+
+    @patch('FinalFinance.watcher.ingest_filing', return_value=False)
+    @patch('FinalFinance.watcher.get_rss_feed_entries')
+    def test_failed_download_is_retried_on_next_poll(self, mock_entries, mock_ingest):
+        mock_entries.return_value = [feed_entry('0001067983', '0000950123-24-005913')]
+        self.watcher.poll_once()
+
+        processed = self.watcher.process_queue()
+
+        self.assertEqual(processed, 0)
+        self.assertEqual([entry['acc_no'] for entry in self.watcher.poll_once()], ['0000950123-24-005913'])
+
+
+if __name__ == '__main__':
+    unittest.main()
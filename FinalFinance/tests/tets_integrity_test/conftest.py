@@ -1,7 +1,8 @@
 import pytest
+from datetime import date
 from unittest.mock import patch, Mock
 from FinalFinance import create_app, db
-from FinalFinance.models import User
+from FinalFinance.models import User, FundData, Submission, FundHoldings
 from werkzeug.security import generate_password_hash
 
 
@@ -42,3 +43,26 @@ def mock_sec_requests():
     with patch('FinalFinance.utils.fetch_rss_feed') as mock_fetch:
         mock_fetch.return_value = Mock(entries=[])
         yield mock_fetch
+
+
+@pytest.fixture(scope='function')
+def fund_with_holdings():
+    fund = FundData(fund_name='Test Fund A', cik='0001234567')
+    db.session.add(fund)
+    db.session.commit()
+
+    filings = [('0001234567-24-000001', '2024 Q1', date(2024, 5, 15), {'Alpha Inc': 100, 'Beta Corp': 50}),
+               ('0001234567-24-000002', '2024 Q2', date(2024, 8, 14), {'Alpha Inc': 150, 'Gamma Ltd': 20})]
+    for accession_number, period, filed_of_date, positions in filings:
+        db.session.add(Submission(cik=fund.cik, company_name=fund.fund_name, submission_type='13F-HR',
+                                  filed_of_date=filed_of_date, accession_number=accession_number,
+                                  period_of_portfolio=period, fund_data_id=fund.id,
+                                  fund_portfolio_value=sum(positions.values()) * 10.0,
+                                  fund_owns_companies=len(positions)))
+        for company_name, share_amount in positions.items():
+            db.session.add(FundHoldings(company_name=company_name, value_usd=share_amount * 10.0,
+                                        share_amount=float(share_amount), cusip=company_name[:9].upper(),
+                                        cik=fund.cik, accession_number=accession_number,
+                                        period_of_portfolio=period, fund_data_id=fund.id))
+    db.session.commit()
+    return fund
@@ -0,0 +1,83 @@
+import io
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from FinalFinance.flows import rebuild_security_flows
+from FinalFinance.summaries import rebuild_fund_summaries
+
+
+def test_holdings_columnar_json(test_client, init_database, fund_with_holdings):
+    response = test_client.get('/api/v1/funds/0001234567/holdings')
+    assert response.status_code == 200
+
+    payload = response.get_json()
+    assert payload['cik'] == '0001234567'
+    assert payload['rows'] == 4
+    assert payload['columns'] == ['Company Name', 'Value (USD)', 'Share Amount', 'Accession Number', 'CUSIP',
+                                  'Put/Call']
+    assert payload['data']['Company Name'] == ['Alpha Inc', 'Alpha Inc', 'Beta Corp', 'Gamma Ltd']
+
+
+def test_holdings_filtered_by_accession(test_client, init_database, fund_with_holdings):
+    response = test_client.get('/api/v1/funds/0001234567/holdings?accession_number=0001234567-24-000001')
+    assert response.get_json()['data']['Share Amount'] == [100.0, 50.0]
+
+
+def test_diffs_arrow_stream(test_client, init_database, fund_with_holdings):
+    response = test_client.get('/api/v1/funds/0001234567/diffs', headers={'Accept': 'application/vnd.apache.arrow.stream'})
+    assert response.mimetype == 'application/vnd.apache.arrow.stream'
+
+    table = pa.ipc.open_stream(response.data).read_all()
+    statuses = dict(zip(table.column('Company Name').to_pylist(), table.column('Change Status').to_pylist()))
+    assert statuses == {'Alpha Inc': 'Increased', 'Gamma Ltd': 'New Investment', 'Beta Corp': 'Position Closed'}
+    assert table.schema.metadata[b'cik'] == b'0001234567'
+
+
+def test_submissions_parquet(test_client, init_database, fund_with_holdings):
+    response = test_client.get('/api/v1/funds/0001234567/submissions?format=parquet')
+    table = pq.read_table(io.BytesIO(response.data))
+    assert table.column('accession_number').to_pylist() == ['0001234567-24-000002', '0001234567-24-000001']
+
+
+@pytest.mark.usefixtures("mock_sec_requests")
+def test_monitor_matrix_requires_login(test_client, init_database, fund_with_holdings, login_test_user):
+    payload = test_client.get('/api/v1/funds/0001234567/monitor').get_json()
+    assert payload['columns'] == ['Company Name', '2024 Q1_1', '2024 Q2_1']
+    assert payload['data']['2024 Q2_1'] == [150, 0, 20]
+
+
+def test_unknown_cik_returns_404(test_client, init_database):
+    response = test_client.get('/api/v1/funds/0009999999/holdings')
+    assert response.status_code == 404
+
+
+def test_fund_summary(test_client, init_database, fund_with_holdings):
+    rebuild_fund_summaries(fund_with_holdings.cik)
+
+    payload = test_client.get('/api/v1/funds/0001234567/summary').get_json()
+    assert payload['data']['period_of_portfolio'] == ['2024 Q2', '2024 Q1']
+    assert payload['data']['aum'] == [1700.0, 1500.0]
+    assert payload['data']['new_positions'] == [1, None]
+    assert payload['data']['closed_positions'] == [1, None]
+    assert payload['data']['turnover'][0] == pytest.approx(1 / 3)
+
+
+def test_fund_analytics(test_client, init_database, fund_with_holdings):
+    payload = test_client.get('/api/v1/funds/0001234567/analytics').get_json()
+    assert payload['data']['Accession Number'] == ['0001234567-24-000002', '0001234567-24-000001']
+    assert payload['data']['Turnover'][0] == pytest.approx(1 / 3)
+    assert payload['data']['Turnover'][1] is None
+
+    positions = test_client.get('/api/v1/funds/0001234567/analytics/positions').get_json()
+    assert positions['data']['Company Name'] == ['Alpha Inc', 'Gamma Ltd']
+    assert positions['data']['Holding Quarters'] == [2, 1]
+
+
+def test_consensus_leaderboard(test_client, init_database, fund_with_holdings):
+    rebuild_security_flows()
+
+    payload = test_client.get('/api/v1/consensus').get_json()
+    assert payload['period'] == '2024 Q2'
+    assert payload['data']['side'] == ['bought', 'bought', 'sold']
+    assert payload['data']['company_name'] == ['Alpha Inc', 'Gamma Ltd', 'Beta Corp']
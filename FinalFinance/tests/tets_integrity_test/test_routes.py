@@ -1,6 +1,11 @@
+import csv
+import io
+import re
+from datetime import date
+from openpyxl import load_workbook
 import pytest
 from FinalFinance import db
-from FinalFinance.models import FundData, AddFundToFavorites
+from FinalFinance.models import FundData, AddFundToFavorites, Submission, FundHoldings
 
 
 def test_fund_search_empty_query(test_client, init_database):
@@ -61,3 +66,106 @@ def test_monitor_with_favorites(test_client, init_database, login_test_user):
 
     assert response.status_code == 200, f"Expected 200 but got {response.status_code} with data: {response.get_data(as_text=True)}"
     assert 'Test Fund A' in response.get_data(as_text=True)
+
+
+def seed_submission_with_holdings(holdings_count):
+    fund = FundData(fund_name='Test Fund A', cik='0001234567')
+    db.session.add(fund)
+    db.session.commit()
+
+    db.session.add(Submission(cik='0001234567', company_name='Test Fund A', submission_type='13F-HR',
+                              filed_of_date=date(2024, 5, 15), accession_number='0001234567-24-000001',
+                              period_of_portfolio='2024 Q1', fund_data_id=fund.id))
+    for number in range(holdings_count):
+        db.session.add(FundHoldings(company_name=f'Company {number:02d}', value_usd=1000.0 * number,
+                                    share_amount=10.0 * number, cusip=f'{number:09d}', cik='0001234567',
+                                    accession_number='0001234567-24-000001', period_of_portfolio='2024 Q1',
+                                    fund_data_id=fund.id))
+    db.session.commit()
+
+
+@pytest.mark.usefixtures("mock_sec_requests")
+def test_submission_details_keyset_pages(test_client, init_database, login_test_user):
+    seed_submission_with_holdings(5)
+
+    response = test_client.get('/submission_details/0001234567-24-000001?page_size=2&sort=Value (USD)&order=desc')
+    page = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert 'Company 04' in page and 'Company 03' in page and 'Company 02' not in page
+
+    next_url = re.search(r'href="([^"]*after=[^"]*)">Next page', page).group(1).replace('&amp;', '&')
+    page = test_client.get(next_url).get_data(as_text=True)
+    assert 'Company 02' in page and 'Company 01' in page and 'Company 03' not in page
+
+
+@pytest.mark.usefixtures("mock_sec_requests")
+def test_submission_details_streams_all_holdings(test_client, init_database, login_test_user):
+    seed_submission_with_holdings(5)
+
+    response = test_client.get('/submission_details/0001234567-24-000001?all=1&q=company 0')
+    assert response.is_streamed
+    page = response.get_data(as_text=True)
+    assert all(f'Company {number:02d}' in page for number in range(5))
+    assert 'Next page' not in page
+
+
+@pytest.mark.usefixtures("mock_sec_requests")
+def test_export_submission_holdings_csv(test_client, init_database, login_test_user, fund_with_holdings):
+    response = test_client.get('/submission_details/0001234567-24-000001/export/csv')
+    assert response.is_streamed
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ['Company Name', 'Value (USD)', 'Share Amount', 'CUSIP', 'Accession Number', 'Period']
+    assert [row[0] for row in rows[1:]] == ['Alpha Inc', 'Beta Corp']
+
+
+@pytest.mark.usefixtures("mock_sec_requests")
+def test_export_monitor_xlsx(test_client, init_database, login_test_user, fund_with_holdings):
+    response = test_client.get('/monitor/export/xlsx?cik=0001234567')
+    rows = list(load_workbook(io.BytesIO(response.data), read_only=True).active.values)
+    assert rows == [('Company Name', 'CUSIP', '2024 Q1_1', '2024 Q2_1'), ('Alpha Inc', 'ALPHA INC', 100, 150),
+                    ('Beta Corp', 'BETA CORP', 50, 0), ('Gamma Ltd', 'GAMMA LTD', 0, 20)]
+
+
+@pytest.mark.usefixtures("mock_sec_requests")
+def test_export_monitor_matches_positions_of_the_page(test_client, init_database, login_test_user,
+                                                      fund_with_holdings):
+    # An option line on Alpha, a renamed issuer and a holding without CUSIP in Q2
+    for company_name, cusip, put_call, share_amount in [('Alpha Inc', 'ALPHA INC', 'Put', 5.0),
+                                                        ('Beta Corporation', 'BETA CORP', None, 40.0),
+                                                        ('Delta Co', 'N/A', None, 7.0)]:
+        db.session.add(FundHoldings(company_name=company_name, value_usd=share_amount * 10.0,
+                                    share_amount=share_amount, cusip=cusip, put_call=put_call,
+                                    cik=fund_with_holdings.cik, accession_number='0001234567-24-000002',
+                                    period_of_portfolio='2024 Q2', fund_data_id=fund_with_holdings.id))
+    db.session.commit()
+
+    response = test_client.get('/monitor/export/csv?cik=0001234567')
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[1:] == [['Alpha Inc', 'ALPHA INC', '100', '150'], ['Alpha Inc (Put)', 'ALPHA INC', '0', '5'],
+                        ['Beta Corporation', 'BETA CORP', '50', '40'], ['Gamma Ltd', 'GAMMA LTD', '0', '20'],
+                        ['Delta Co', 'N/A', '0', '7']]
+
+
+@pytest.mark.usefixtures("mock_sec_requests")
+def test_monitor_date_window(test_client, init_database, login_test_user, fund_with_holdings):
+    db.session.add(AddFundToFavorites(user_id=login_test_user.id, fund_id=fund_with_holdings.id))
+    db.session.commit()
+
+    response = test_client.post('/monitor', data={'monitored_cik': '0001234567', 'start_date': '2024-06-01',
+                                                  'end_date': '2024-12-31'})
+    page = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert '2024 Q2_1' in page and '2024 Q1_1' not in page
+    assert 'value="2024-06-01"' in page
+    assert 'start_date=2024-06-01' in page
+
+    response = test_client.post('/monitor', data={'monitored_cik': '0001234567', 'start_date': 'June'},
+                                follow_redirects=True)
+    assert 'Error parsing date' in response.get_data(as_text=True)
+
+
+@pytest.mark.usefixtures("mock_sec_requests")
+def test_export_monitor_date_window(test_client, init_database, login_test_user, fund_with_holdings):
+    response = test_client.get('/monitor/export/csv?cik=0001234567&end_date=2024-06-30')
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ['Company Name', 'CUSIP', '2024 Q1_1']
@@ -1,40 +1,54 @@
 from collections import defaultdict
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple, TYPE_CHECKING
 
-import pandas as pd
-from feedparser import FeedParserDict
 from flask_wtf import FlaskForm
-from sqlalchemy import func
+from sqlalchemy import func, select, update
 from wtforms.fields.simple import StringField
 
 from .models import Submission, FundHoldings, FundData
-from bs4 import BeautifulSoup
-from sec_edgar_downloader import Downloader
-from dotenv import load_dotenv
 import requests
-from .database import db
+from .database import db, pin_to_primary
+from .instrumentation import span
+from .partitions import ensure_holdings_partition
+from .summaries import refresh_fund_summaries
+from .flows import refresh_security_flows
+from .analytics import clear_analytics_cache
+from .cache import CacheNamespace
+from .diffs import DIFF_COLUMNS, diff_positions, monitor_matrix
+from .frames import read_submission_holdings
+from .holdings_cache import read_cached_holdings, refresh_holdings_cache, write_cached_holdings
+from .ingestion import IngestionContext
+from .nport import MISSING_VALUES, parse_nport_positions
+from .amendments import RESTATEMENT, apply_amendment, compute_restatement_delta, get_amendment_baseline, \
+    get_base_form, get_effective_submissions, parse_amendment_type, resolve_effective_holdings
+from .config import DEFAULT_WELL_KNOWN_FUNDS
+from .lazy import LazyImport
 import shutil
-from datetime import datetime
+from datetime import date, datetime
 import os
+import threading
+import time
 import re
 import logging.config
 from requests.exceptions import HTTPError
-from yfinance import Ticker
 
-import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-
-import base64
-from io import BytesIO
-
-import feedparser
 from wtforms.validators import ValidationError
 from .models import User
 from werkzeug.security import check_password_hash
 from flask_login import current_user
+from flask import current_app, has_app_context
 
-# Load environment variables from a .env file
-load_dotenv()
+if TYPE_CHECKING:
+    from feedparser import FeedParserDict
+
+# Heavy dependencies are imported on first use, so importing the application stays fast
+pd = LazyImport('pandas')
+BeautifulSoup = LazyImport('bs4', 'BeautifulSoup')
+Downloader = LazyImport('sec_edgar_downloader', 'Downloader')
+Ticker = LazyImport('yfinance', 'Ticker')
+plt = LazyImport('matplotlib.pyplot')
+Figure = LazyImport('matplotlib.figure', 'Figure')
+feedparser = LazyImport('feedparser')
 
 
 def setup_logging(default_path: str = 'logging.conf', default_level: int = logging.INFO) -> None:
@@ -65,12 +79,51 @@ def setup_logging(default_path: str = 'logging.conf', default_level: int = loggi
         logging.basicConfig(level=default_level)
 
 
-# Initialize logging
-setup_logging()
-
 # Create a logger instance
 logger = logging.getLogger('sLogger')
 
+# SEC Edgar hosts, overridden with the SEC_URL and SEC_DATA_URL settings (e.g. to point at a local stand-in)
+DEFAULT_SEC_URL = 'https://www.sec.gov'
+DEFAULT_SEC_DATA_URL = 'https://data.sec.gov'
+
+# SEC Edgar endpoints for the per-CIK submissions index and the complete submission text files
+SEC_SUBMISSIONS_URL = '{sec_data_url}/submissions/{file_name}'
+SEC_ARCHIVES_URL = '{sec_url}/Archives/edgar/data/{cik}/{accession_folder}/{accession_number}.txt'
+SEC_RSS_URL = ('{sec_url}/cgi-bin/browse-edgar?action=getcurrent&CIK=&type={filing_type}'
+               '&owner=include&count={count}&output=atom')
+SEC_CIK_LOOKUP_URL = '{sec_url}/Archives/edgar/cik-lookup-data.txt'
+
+# Filing types with holdings, with their amendments
+HOLDINGS_FILING_TYPES = ['NPORT-P', 'NPORT-P/A', '13F-HR', '13F-HR/A']
+
+# Parsed RSS feeds keyed by URL, with the validators needed for conditional requests
+rss_feed_cache = CacheNamespace('rss_feeds')
+
+# Holdings comparisons of the fund details page keyed by '<newest accession>|<previous accession>'
+HOLDINGS_DIFF_CACHE_SIZE = 256
+holdings_diff_cache = CacheNamespace('diffs', max_entries=HOLDINGS_DIFF_CACHE_SIZE)
+
+# URLs of RSS feeds being revalidated by a background thread
+rss_feed_refreshing: Set[str] = set()
+rss_feed_refreshing_lock = threading.Lock()
+
+
+def get_sec_url(template: str, **fields: Any) -> str:
+    """
+    Build an SEC Edgar URL on the hosts configured for the current application.
+
+    Args:
+        template (str): One of the SEC_*_URL templates.
+        **fields (Any): The remaining template fields.
+
+    Returns:
+        str: The URL.
+    """
+    config = current_app.config if has_app_context() else {}
+    return template.format(sec_url=(config.get('SEC_URL') or DEFAULT_SEC_URL).rstrip('/'),
+                           sec_data_url=(config.get('SEC_DATA_URL') or DEFAULT_SEC_DATA_URL).rstrip('/'),
+                           **fields)
+
 
 def get_user_agent() -> Optional[str]:
     """
@@ -93,12 +146,13 @@ def download_and_store_all_companies_names_and_cik_from_edgar() -> None:
     logger.info('Starting downloading data from Edgar.')
 
     # URL for the SEC Edgar CIK lookup data
-    url = "https://www.sec.gov/Archives/edgar/cik-lookup-data.txt"
+    url = get_sec_url(SEC_CIK_LOOKUP_URL)
     headers = {"User-Agent": get_user_agent()}
 
     try:
         # Send a GET request to the SEC Edgar database
-        response = requests.get(url, headers=headers)
+        with span('http'):
+            response = requests.get(url, headers=headers)
         response.raise_for_status()
     except requests.RequestException as e:
         # Log an error if the request fails
@@ -145,30 +199,63 @@ def edgar_downloader_from_sec(fund_cik: str,
     """
     Download SEC filings for a given fund CIK between specified dates and store them locally.
 
-    This function downloads SEC filings of specified types for a given fund CIK within the date range
-    and stores them in the local file system. If the filing type directory exists, it is cleared before
-    downloading new filings.
+    The fund's submissions index is read first and compared with the accessions already stored in the
+    database, so only filings that are missing are downloaded and added to the database. If the index
+    cannot be retrieved, the full date window is crawled with the SEC Edgar downloader instead.
 
     Args:
         fund_cik (str): The Central Index Key (CIK) of the fund.
         start_date (Optional[datetime]): The start date for the filings to be downloaded. Defaults to 2022-02-01.
         end_date (Optional[datetime]): The end date for the filings to be downloaded. Defaults to 2024-07-24.
-
-    Raises:
-        HTTPError: If an HTTP error occurs during the download process.
-        Exception: If any other error occurs during the download process.
     """
-    filing_types = ['NPORT-P', '13F-HR']
+    filing_types = HOLDINGS_FILING_TYPES
 
     if start_date is None:
         start_date = datetime(2022, 2, 1)
     if end_date is None:
         end_date = datetime(2024, 7, 24)
 
+    try:
+        existing_accession_numbers = get_existing_accession_numbers(fund_cik)
+        missing_filings = discover_missing_filings(fund_cik, existing_accession_numbers, filing_types,
+                                                   start_date, end_date)
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"Could not read submissions index for CIK {fund_cik}: {e}")
+        download_filings_with_crawler(fund_cik, filing_types, start_date, end_date)
+        return
+
+    logger.info(f"Found {len(missing_filings)} missing filings for CIK {fund_cik}.")
+
+    context = IngestionContext()
+    with requests.Session() as session:
+        session.headers.update({"User-Agent": get_user_agent()})
+        # Oldest first, so amendments are stored against the filings they amend
+        for filing in reversed(missing_filings):
+            path_to_file = download_filing(fund_cik, filing, session=session)
+            if path_to_file:
+                extract_holdings_from_file(path_to_file, context)
+
+
+def download_filings_with_crawler(fund_cik: str, filing_types: List[str], start_date: datetime,
+                                  end_date: datetime) -> None:
+    """
+    Download every filing in the date window with the SEC Edgar downloader and store them in the database.
+    The downloader stores amendments with the filings of their base form type.
+
+    Args:
+        fund_cik (str): The Central Index Key (CIK) of the fund.
+        filing_types (List[str]): The filing types to download, amendment types included.
+        start_date (datetime): The start date for the filings to be downloaded.
+        end_date (datetime): The end date for the filings to be downloaded.
+
+    Raises:
+        HTTPError: If an HTTP error occurs during the download process.
+        Exception: If any other error occurs during the download process.
+    """
     # Base directory path for storing SEC filings
     dir_path = 'sec-edgar-filings'
 
-    for filing_type in filing_types:
+    for filing_type in dict.fromkeys(get_base_form(filing_type) for filing_type in filing_types):
         # Path to store filings of a specific type for the given fund CIK
         filings_path = os.path.join(dir_path, fund_cik, filing_type)
         if os.path.exists(filings_path):
@@ -180,7 +267,8 @@ def edgar_downloader_from_sec(fund_cik: str,
             # Initialize the downloader with the base directory path and email for authorization
             dl = Downloader(dir_path, os.environ['EMAIL_FOR_AUTHORIZATION'])
             # Download filings of the specified type for the given CIK within the date range
-            dl.get(filing_type, fund_cik, after=start_date, before=end_date)
+            dl.get(filing_type, fund_cik, after=start_date, before=end_date,
+                   include_amends=f'{filing_type}/A' in filing_types)
         except HTTPError as e:
             if e.response.status_code == 404:
                 print(f"404 Error for URL: {e.request.url}. CIK may be incorrect or data not available.")
@@ -197,7 +285,172 @@ def edgar_downloader_from_sec(fund_cik: str,
         add_filing_to_db(fund_cik)
 
 
-def add_filing_to_db(fund_cik: str) -> None:
+def get_existing_accession_numbers(fund_cik: str) -> Set[str]:
+    """
+    Retrieve the accession numbers of the submissions already stored for a fund.
+
+    Args:
+        fund_cik (str): The Central Index Key (CIK) of the fund.
+
+    Returns:
+        Set[str]: The stored accession numbers.
+    """
+    rows = db.session.query(Submission.accession_number).filter(Submission.cik == fund_cik.zfill(10)).all()
+    return {accession_number for accession_number, in rows}
+
+
+def fetch_submissions_index(file_name: str, session: Optional[requests.Session] = None) -> Dict[str, Any]:
+    """
+    Fetch a submissions index document from the SEC Edgar submissions API.
+
+    Args:
+        file_name (str): The document name, e.g. 'CIK0001067983.json' or 'CIK0001067983-submissions-001.json'.
+        session (Optional[requests.Session]): The session used for the request. Defaults to a one-off request.
+
+    Returns:
+        Dict[str, Any]: The decoded JSON document.
+
+    Raises:
+        requests.RequestException: If the request to the submissions API fails.
+    """
+    url = get_sec_url(SEC_SUBMISSIONS_URL, file_name=file_name)
+    headers = {"User-Agent": get_user_agent()}
+    with span('http'):
+        response = (session or requests).get(url, headers=headers)
+    response.raise_for_status()
+    return response.json()
+
+
+def find_missing_filings(filings_block: Dict[str, List[Any]],
+                         existing_accession_numbers: Set[str],
+                         filing_types: List[str],
+                         start_date: datetime,
+                         end_date: datetime) -> List[Dict[str, str]]:
+    """
+    Find the filings of a submissions index block that are not stored yet.
+
+    The submissions index stores filings column-wise, one list per field, so the rows are rebuilt
+    from the parallel lists and filtered by filing type, filing date and already stored accessions.
+
+    Args:
+        filings_block (Dict[str, List[Any]]): The 'filings.recent' block or an older submissions page.
+        existing_accession_numbers (Set[str]): Accession numbers already stored in the database.
+        filing_types (List[str]): The filing types to keep.
+        start_date (datetime): The earliest filing date to keep.
+        end_date (datetime): The latest filing date to keep.
+
+    Returns:
+        List[Dict[str, str]]: The missing filings with their accession number, form, filing date,
+        report date and primary document.
+    """
+    start = start_date.strftime('%Y-%m-%d')
+    end = end_date.strftime('%Y-%m-%d')
+
+    missing_filings = []
+    accession_numbers = filings_block.get('accessionNumber', [])
+    for index, accession_number in enumerate(accession_numbers):
+        form = filings_block['form'][index]
+        filing_date = filings_block['filingDate'][index]
+
+        if form not in filing_types or not start <= filing_date <= end:
+            continue
+        if accession_number in existing_accession_numbers:
+            continue
+
+        missing_filings.append({
+            'accession_number': accession_number,
+            'form': form,
+            'filing_date': filing_date,
+            'report_date': filings_block.get('reportDate', [''] * len(accession_numbers))[index],
+            'primary_document': filings_block.get('primaryDocument', [''] * len(accession_numbers))[index],
+        })
+    return missing_filings
+
+
+def discover_missing_filings(fund_cik: str,
+                             existing_accession_numbers: Set[str],
+                             filing_types: List[str],
+                             start_date: datetime,
+                             end_date: datetime) -> List[Dict[str, str]]:
+    """
+    Discover the filings of a fund that are in the SEC submissions index but not in the database.
+
+    The main index document is read once. Older submissions pages are only fetched when their
+    filing date range overlaps the requested window.
+
+    Args:
+        fund_cik (str): The Central Index Key (CIK) of the fund.
+        existing_accession_numbers (Set[str]): Accession numbers already stored in the database.
+        filing_types (List[str]): The filing types to keep.
+        start_date (datetime): The earliest filing date to keep.
+        end_date (datetime): The latest filing date to keep.
+
+    Returns:
+        List[Dict[str, str]]: The missing filings ordered from newest to oldest.
+
+    Raises:
+        requests.RequestException: If the request to the submissions API fails.
+    """
+    start = start_date.strftime('%Y-%m-%d')
+    end = end_date.strftime('%Y-%m-%d')
+
+    with requests.Session() as session:
+        submissions_index = fetch_submissions_index(f'CIK{fund_cik.zfill(10)}.json', session=session)
+        filings = submissions_index.get('filings', {})
+
+        missing_filings = find_missing_filings(filings.get('recent', {}), existing_accession_numbers,
+                                               filing_types, start_date, end_date)
+
+        for older_page in filings.get('files', []):
+            if older_page['filingTo'] < start or older_page['filingFrom'] > end:
+                continue
+            filings_block = fetch_submissions_index(older_page['name'], session=session)
+            missing_filings.extend(find_missing_filings(filings_block, existing_accession_numbers,
+                                                        filing_types, start_date, end_date))
+
+    missing_filings.sort(key=lambda filing: (filing['filing_date'], filing['accession_number']), reverse=True)
+    return missing_filings
+
+
+def download_filing(fund_cik: str, filing: Dict[str, str],
+                    session: Optional[requests.Session] = None) -> Optional[str]:
+    """
+    Download the complete submission text file of a single filing.
+
+    The complete submission file is used because it carries the SEC header that
+    `extract_holdings_from_file` reads together with the holdings documents. It is stored in the same
+    layout as the SEC Edgar downloader uses.
+
+    Args:
+        fund_cik (str): The Central Index Key (CIK) of the fund.
+        filing (Dict[str, str]): A filing as returned by `find_missing_filings`.
+        session (Optional[requests.Session]): The session used for the request. Defaults to a one-off request.
+
+    Returns:
+        Optional[str]: The path to the downloaded file, or None if the download failed.
+    """
+    accession_number = filing['accession_number']
+    url = get_sec_url(SEC_ARCHIVES_URL, cik=int(fund_cik), accession_folder=accession_number.replace('-', ''),
+                      accession_number=accession_number)
+    headers = {"User-Agent": get_user_agent()}
+
+    try:
+        with span('http'):
+            response = (session or requests).get(url, headers=headers)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.error(f"Error downloading filing {accession_number}: {e}")
+        return None
+
+    filing_path = os.path.join('sec-edgar-filings', fund_cik, filing['form'], accession_number)
+    os.makedirs(filing_path, exist_ok=True)
+    path_to_file = os.path.join(filing_path, 'full-submission.txt')
+    with open(path_to_file, 'wb') as file:
+        file.write(response.content)
+    return path_to_file
+
+
+def add_filing_to_db(fund_cik: str, context: Optional[IngestionContext] = None) -> None:
     """
     Process and add SEC filings for a given fund CIK to the database.
 
@@ -206,7 +459,12 @@ def add_filing_to_db(fund_cik: str) -> None:
 
     Args:
         fund_cik (str): The Central Index Key (CIK) of the fund.
+        context (Optional[IngestionContext]): Lookups shared with the filings of other funds re-ingested in the
+            same batch. A context for this fund is used if not given.
     """
+    if context is None:
+        context = IngestionContext()
+
     directory_path = os.path.join('sec-edgar-filings', fund_cik)
     if not os.path.exists(directory_path):
         print(f"Directory does not exist: {directory_path}")
@@ -230,24 +488,36 @@ def add_filing_to_db(fund_cik: str) -> None:
             # Process each file in the sub_subdirectory
             for file in files:
                 file_path = os.path.join(sub_subdirectory_path, file)
-                extract_holdings_from_file(file_path)
+                extract_holdings_from_file(file_path, context)
 
 
-def extract_holdings_from_file(path_to_file: str) -> None:
+def extract_holdings_from_file(path_to_file: str, context: Optional[IngestionContext] = None) -> None:
     """
     Extract holdings from a given file and add them to the database.
 
     This function reads an SEC filing file, parses its content to extract relevant holdings information,
     and stores the extracted data in the database. It handles updates to existing records and adds new records as needed.
+    Amendments (13F-HR/A, NPORT-P/A) are stored as the rows they change in the holdings of the filing they amend,
+    see `amendments.get_filing_chains`.
+    N-PORT positions are streamed from the investments section with their asset category, issuer LEI and
+    percentage of net assets, see `nport.parse_nport_positions`.
 
     Args:
         path_to_file (str): The path to the SEC filing file.
+        context (Optional[IngestionContext]): Fund and submission lookups shared with the other filings of a
+            batch. A context for this file alone is used if not given.
     """
     with open(path_to_file, 'r') as file:
         data = file.read()
 
-    soup = BeautifulSoup(data, 'lxml')
-    tags = soup.find_all(['infotable', 'ns1:infotable', 'invstorsec'])
+    with span('parse'):
+        # N-PORT positions are streamed from their own section, other filings are parsed as a whole
+        nport_positions = parse_nport_positions(data)
+        if nport_positions is not None:
+            tags = nport_positions
+        else:
+            soup = BeautifulSoup(data, 'lxml')
+            tags = soup.find_all(['infotable', 'ns1:infotable', 'invstorsec'])
 
     cik_tag_line = re.compile(r'CENTRAL INDEX KEY:\s+(\d+)')
     owner_cik = cik_tag_line.search(data).group(1) if cik_tag_line.search(data) else None
@@ -282,108 +552,203 @@ def extract_holdings_from_file(path_to_file: str) -> None:
     else:
         period_of_portfolio = None
 
-    fund_data = FundData.query.filter_by(cik=owner_cik).first()
-    if not fund_data:
+    if context is None:
+        context = IngestionContext()
+    fund_data_id = context.get_fund_id(owner_cik)
+    if not fund_data_id:
         print(f"No FundData found for CIK: {owner_cik}")
         return
 
-    existing_submission = Submission.query.filter_by(accession_number=accession_number).first()
-    if existing_submission:
-        submission = existing_submission
-        submission.cik = owner_cik
-        submission.company_name = company_conformed_name
-        submission.submission_type = submission_type
-        submission.filed_of_date = filed_of_date
-        submission.period_of_portfolio = period_of_portfolio
-        submission.fund_data_id = fund_data.id
-    else:
-        submission = Submission(
-            cik=owner_cik,
-            company_name=company_conformed_name,
-            submission_type=submission_type,
-            filed_of_date=filed_of_date,
-            accession_number=accession_number,
-            period_of_portfolio=period_of_portfolio,
-            fund_data_id=fund_data.id
-        )
-        db.session.add(submission)
+    if period_of_portfolio:
+        ensure_holdings_partition(period_of_portfolio)
+
+    submission_id = context.get_submission_id(owner_cik, accession_number)
+
+    # Amendments store only what they change in the holdings filed before them
+    amendment_type = parse_amendment_type(submission_type, data)
+    base_accession_number, base_positions = None, {}
+    if amendment_type and period_of_portfolio:
+        base_accession_number, base_positions = get_amendment_baseline(
+            owner_cik, period_of_portfolio, filed_of_date.date() if filed_of_date else None, accession_number,
+            submission_type)
+
+    # A new filing has no stored holdings; those of a re-ingested one are read with one query
+    stored_holdings = {}
+    if submission_id:
+        for fund_holding in FundHoldings.query.filter_by(accession_number=accession_number,
+                                                         period_of_portfolio=period_of_portfolio):
+            stored_holdings.setdefault((fund_holding.company_name, fund_holding.cusip, fund_holding.put_call),
+                                       fund_holding)
 
     fund_portfolio_value = 0
     fund_owns_companies = 0
+    # Holdings stored by this run, keyed by company name, CUSIP and put/call
+    ingested_holdings = {}
 
     for tag in tags:
         try:
-            if tag.name in ['infotable', 'ns1:infotable']:
+            # N-PORT details of the position, None for 13F holdings
+            details = {'asset_category': None, 'issuer_lei': None, 'pct_of_net_assets': None}
+            if isinstance(tag, dict):
+                nameofissuer, cusip, value, sshprnamt, put_call = (
+                    tag['company_name'], tag['cusip'], tag['value_usd'], tag['share_amount'], tag['put_call'])
+                details = {column: tag[column] for column in details}
+            elif tag.name in ['infotable', 'ns1:infotable']:
                 nameofissuer = tag.find(['nameofissuer', 'ns1:nameofissuer']).text.strip() if tag.find(
                     ['nameofissuer', 'ns1:nameofissuer']) else None
                 cusip = tag.find(['cusip', 'ns1:cusip']).text.strip() if tag.find(['cusip', 'ns1:cusip']) else None
                 value = int(tag.find(['value', 'ns1:value']).text.strip()) if tag.find(['value', 'ns1:value']) else 0
                 sshprnamt = int(tag.find(['sshprnamt', 'ns1:sshprnamt']).text.strip()) if tag.find(
                     ['sshprnamt', 'ns1:sshprnamt']) else 0
+                put_call = tag.find(['putcall', 'ns1:putcall']).text.strip().title() if tag.find(
+                    ['putcall', 'ns1:putcall']) else None
             elif tag.name == 'invstorsec':
                 nameofissuer = tag.find('name').text.strip() if tag.find('name') else None
                 cusip = tag.find('cusip').text.strip() if tag.find('cusip') else None
                 value = float(tag.find('valusd').text.strip()) if tag.find('valusd') else 0
                 sshprnamt = float(tag.find('balance').text.strip()) if tag.find('balance') else 0
+                put_call = None
+                details = {
+                    'asset_category': tag.find('assetcat').text.strip() if tag.find('assetcat') else None,
+                    'issuer_lei': tag.find('lei').text.strip() if tag.find('lei') else None,
+                    'pct_of_net_assets': float(tag.find('pctval').text.strip()) if tag.find('pctval') else None,
+                }
+                if details['issuer_lei'] and details['issuer_lei'].upper() in MISSING_VALUES:
+                    details['issuer_lei'] = None
 
             if value:
                 fund_portfolio_value += value
             if nameofissuer:
                 fund_owns_companies += 1
 
-            existing_fund_holding = FundHoldings.query.filter_by(company_name=nameofissuer,
-                                                                 accession_number=accession_number).first()
+            holding_key = (nameofissuer, cusip, put_call)
+            if holding_key in ingested_holdings:
+                # The same security listed again in this filing, e.g. once per investment manager
+                ingested_holdings[holding_key].value_usd += value
+                ingested_holdings[holding_key].share_amount += sshprnamt
+                if details['pct_of_net_assets'] is not None:
+                    ingested_holdings[holding_key].pct_of_net_assets = \
+                        (ingested_holdings[holding_key].pct_of_net_assets or 0.0) + details['pct_of_net_assets']
+                continue
+
+            existing_fund_holding = stored_holdings.get(holding_key)
             if existing_fund_holding:
                 existing_fund_holding.value_usd = value
                 existing_fund_holding.share_amount = sshprnamt
                 existing_fund_holding.cusip = cusip
                 existing_fund_holding.cik = owner_cik
                 existing_fund_holding.period_of_portfolio = period_of_portfolio
-                existing_fund_holding.fund_data_id = fund_data.id
+                existing_fund_holding.fund_data_id = fund_data_id
+                for column, detail in details.items():
+                    setattr(existing_fund_holding, column, detail)
             else:
                 fund_holding = FundHoldings(
                     company_name=nameofissuer,
                     value_usd=value,
                     share_amount=sshprnamt,
                     cusip=cusip,
+                    put_call=put_call,
                     cik=owner_cik,
                     accession_number=accession_number,
                     period_of_portfolio=period_of_portfolio,
-                    fund_data_id=fund_data.id
+                    fund_data_id=fund_data_id,
+                    **details
                 )
                 db.session.add(fund_holding)
+            ingested_holdings[holding_key] = existing_fund_holding or fund_holding
 
         except Exception as e:
             print(f"Error processing tag: {e}")
 
-    submission.fund_portfolio_value = fund_portfolio_value
-    submission.fund_owns_companies = fund_owns_companies
+    if base_accession_number:
+        ingested_positions = {key: (holding.value_usd, holding.share_amount)
+                              for key, holding in ingested_holdings.items()}
+        delta = compute_restatement_delta(base_positions, ingested_positions) if amendment_type == RESTATEMENT \
+            else ingested_positions
+        effective_positions = apply_amendment(base_positions, delta, amendment_type)
+        fund_portfolio_value = sum(value for value, _ in effective_positions.values())
+        fund_owns_companies = len(effective_positions)
+
+        # Unchanged positions are not stored again, including rows left from an earlier ingestion of the filing
+        for key, holding in list(ingested_holdings.items()) + list(stored_holdings.items()):
+            if key not in delta and holding in db.session:
+                if holding in db.session.new:
+                    db.session.expunge(holding)
+                else:
+                    db.session.delete(holding)
+        # Positions the restatement no longer reports are stored as closed
+        for key in delta.keys() - ingested_holdings.keys():
+            holding = stored_holdings.get(key)
+            if not holding:
+                holding = FundHoldings(company_name=key[0], value_usd=0, share_amount=0, cusip=key[1], put_call=key[2],
+                                       cik=owner_cik, accession_number=accession_number,
+                                       period_of_portfolio=period_of_portfolio, fund_data_id=fund_data_id)
+                db.session.add(holding)
+            holding.value_usd = 0
+            holding.share_amount = 0
+
+    submission_values = {
+        'cik': owner_cik,
+        'company_name': company_conformed_name,
+        'submission_type': submission_type,
+        'filed_of_date': filed_of_date,
+        'period_of_portfolio': period_of_portfolio,
+        'fund_data_id': fund_data_id,
+        'fund_portfolio_value': fund_portfolio_value,
+        'fund_owns_companies': fund_owns_companies,
+        'amendment_type': amendment_type,
+        'base_accession_number': base_accession_number,
+    }
 
     try:
+        if submission_id:
+            # Updated by id, so the stored submission does not have to be loaded first
+            db.session.execute(update(Submission).where(Submission.id == submission_id).values(**submission_values))
+        else:
+            submission = Submission(
+                cik=owner_cik,
+                company_name=company_conformed_name,
+                submission_type=submission_type,
+                filed_of_date=filed_of_date,
+                accession_number=accession_number,
+                period_of_portfolio=period_of_portfolio,
+                fund_data_id=fund_data_id,
+                fund_portfolio_value=fund_portfolio_value,
+                fund_owns_companies=fund_owns_companies,
+                amendment_type=amendment_type,
+                base_accession_number=base_accession_number
+            )
+            db.session.add(submission)
+            db.session.flush()
+            submission_id = submission.id
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         print(f"Error committing to the database: {e}")
+        return
+    context.add_submission(accession_number, submission_id)
+
+    # Keep the fund's summary time series in step with the stored holdings
+    refresh_fund_summaries(owner_cik, accession_number)
+    if period_of_portfolio:
+        refresh_security_flows(owner_cik, period_of_portfolio)
+    clear_analytics_cache(accession_number)
+    holdings_diff_cache.delete_matching(lambda key: accession_number in key.split('|'))
+    refresh_holdings_cache(owner_cik)
 
 
 def get_fund_lists() -> Dict[str, str]:
     """
     Retrieve a dictionary of well-known funds and their Central Index Keys (CIKs).
 
-    This function returns a manually set dictionary containing the names of well-known funds
-    and their corresponding CIKs. These CIKs are used to identify the funds in the SEC database.
+    The funds are configured with WELL_KNOWN_FUNDS (see `Config`). These CIKs are used to identify the funds
+    in the SEC database.
 
     Returns:
         Dict[str, str]: A dictionary where the keys are fund names and the values are their CIKs.
     """
-    well_known_funds = {
-        'Berkshire Hathaway': '0001067983',
-        'Sequoia Fund': '0000089043',
-        'Third Avenue Management LLC': '0001099281',
-        'Longleaf Partners Funds Trust': '0000806636',
-        'Mairs & Power Inc: ': '0001070134',
-    }
-    return well_known_funds
+    funds = current_app.config['WELL_KNOWN_FUNDS'] if has_app_context() else DEFAULT_WELL_KNOWN_FUNDS
+    return {fund_name: cik for cik, fund_name in funds.items()}
 
 
 def save_plot_to_file(ticker_symbol: str = 'SPY', period: str = '1y', interval: str = '1d',
@@ -425,26 +790,79 @@ def save_plot_to_file(ticker_symbol: str = 'SPY', period: str = '1y', interval:
         return None
 
 
-def fetch_rss_feed(url: str) -> Any:
+def _revalidate_rss_feed(app: Any, url: str) -> None:
+    """
+    Revalidate a cached RSS feed outside of the request that found it stale.
+    """
+    try:
+        with app.app_context():
+            fetch_rss_feed(url, max_age=0)
+    except Exception as e:
+        logger.warning(f'Could not refresh the RSS feed {url}: {e}')
+    finally:
+        with rss_feed_refreshing_lock:
+            rss_feed_refreshing.discard(url)
+
+
+def fetch_rss_feed(url: str, max_age: int = 60, background: bool = False) -> Any:
     """
     Fetch and parse an RSS feed from the specified URL.
 
     This function sends a GET request to the provided URL, retrieves the RSS feed content,
-    and parses it using the feedparser library.
+    and parses it using the feedparser library. Parsed feeds are cached for `max_age` seconds,
+    and after that the feed is revalidated with a conditional request so an unchanged feed is
+    not downloaded and parsed again.
 
     Args:
         url (str): The URL of the RSS feed to fetch.
+        max_age (int): Number of seconds a cached feed is returned without contacting the SEC.
+        background (bool): Return the cached feed, even if it is stale, and revalidate it in a background
+            thread instead of contacting the SEC during the call.
 
     Returns:
-        Any: The parsed RSS feed.
+        Any: The parsed RSS feed, or None if `background` is set and the feed was not fetched yet.
     """
+    cached = rss_feed_cache.get(url)
+    # Wall-clock time, as the file and SQLite cache backends share entries between processes
+    now = time.time()
+    if cached and now - cached['fetched_at'] < max_age:
+        return cached['feed']
+
+    if background:
+        with rss_feed_refreshing_lock:
+            start_refresh = url not in rss_feed_refreshing
+            rss_feed_refreshing.add(url)
+        if start_refresh:
+            threading.Thread(target=_revalidate_rss_feed, args=(current_app._get_current_object(), url),
+                             name='rss-feed-refresh', daemon=True).start()
+        return cached['feed'] if cached else None
+
     headers = {"User-Agent": get_user_agent()}
-    response = requests.get(url, headers=headers)
+    if cached and cached['etag']:
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached['last_modified']:
+        headers['If-Modified-Since'] = cached['last_modified']
+
+    with span('http'):
+        response = requests.get(url, headers=headers)
+    if cached and response.status_code == 304:
+        rss_feed_cache.set(url, {**cached, 'fetched_at': now})
+        return cached['feed']
     response.raise_for_status()
-    return feedparser.parse(response.content)
 
+    with span('parse'):
+        feed = feedparser.parse(response.content)
+    rss_feed_cache.set(url, {
+        'feed': feed,
+        'fetched_at': now,
+        'updated_at': now,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    })
+    return feed
 
-def parse_rss_feed_entry(entry: FeedParserDict) -> Optional[Dict[str, str]]:
+
+def parse_rss_feed_entry(entry: 'FeedParserDict') -> Optional[Dict[str, str]]:
     """
     Parse an RSS feed entry to extract company information and filing details.
 
@@ -506,25 +924,56 @@ def parse_rss_feed_entry(entry: FeedParserDict) -> Optional[Dict[str, str]]:
         return None
 
 
-def get_rss_feed_entries() -> List[Optional[Dict[str, str]]]:
+def get_rss_feed_urls(count: int = 20) -> List[str]:
+    """
+    Build the URLs of the SEC feeds of new 13F-HR and NPORT-P filings. The feeds match form types by prefix, so
+    they list the amendments as well.
+    """
+    return [get_sec_url(SEC_RSS_URL, filing_type=filing_type, count=count) for filing_type in ['13f-hr', 'nport-p']]
+
+
+def revalidate_rss_feeds(count: int = 20, max_age: int = 60) -> None:
+    """
+    Start a background revalidation of the feeds of `get_rss_feed_entries` that are older than `max_age`.
+    """
+    for url in get_rss_feed_urls(count):
+        fetch_rss_feed(url, max_age=max_age, background=True)
+
+
+def get_rss_feed_version(count: int = 20) -> List[Optional[float]]:
+    """
+    Get when the content of every feed of `get_rss_feed_entries` was last downloaded, None for feeds that are
+    not cached yet. Revalidations that find the feed unchanged do not change the version.
+    """
+    versions = []
+    for url in get_rss_feed_urls(count):
+        cached = rss_feed_cache.get(url)
+        versions.append(cached.get('updated_at') if cached else None)
+    return versions
+
+
+def get_rss_feed_entries(count: int = 20, max_age: int = 60,
+                         background: bool = False) -> List[Optional[Dict[str, str]]]:
     """
     Fetch RSS feed entries from predefined URLs and parse each entry.
 
     This function retrieves RSS feeds from predefined SEC URLs, parses each entry to extract relevant information,
     and returns a list of parsed entries.
 
+    Args:
+        count (int): Number of entries requested from each feed.
+        max_age (int): Number of seconds a cached feed is reused without contacting the SEC.
+        background (bool): Only use cached feeds and refresh stale ones in the background (see `fetch_rss_feed`).
+
     Returns:
         List[Optional[Dict[str, str]]]: A list of dictionaries containing parsed RSS feed entries.
     """
-    urls = [
-        "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&CIK=&type=13f-hr&owner=include&count=20&output=atom",
-        "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&CIK=&type=nport-p&owner=include&count=20&output"
-        "=atom"
-    ]
     entries = []
-    for url in urls:
+    for url in get_rss_feed_urls(count):
         # Fetch and parse the RSS feed
-        feed = fetch_rss_feed(url)
+        feed = fetch_rss_feed(url, max_age=max_age, background=background)
+        if feed is None:
+            continue
         for entry in feed.entries:
             # Parse each RSS feed entry
             parsed_entry = parse_rss_feed_entry(entry)
@@ -532,6 +981,25 @@ def get_rss_feed_entries() -> List[Optional[Dict[str, str]]]:
     return entries
 
 
+def ingest_filing(fund_cik: str, accession_number: str, form: str) -> bool:
+    """
+    Download a single filing and add its holdings to the database.
+
+    Args:
+        fund_cik (str): The Central Index Key (CIK) of the fund.
+        accession_number (str): The accession number of the filing.
+        form (str): The filing type, e.g. '13F-HR' or 'NPORT-P'.
+
+    Returns:
+        bool: True if the filing was downloaded and processed, False otherwise.
+    """
+    path_to_file = download_filing(fund_cik, {'accession_number': accession_number, 'form': form})
+    if not path_to_file:
+        return False
+    extract_holdings_from_file(path_to_file)
+    return True
+
+
 def validate_unique_email(form: FlaskForm, field: StringField) -> None:
     """
     Validate that the email address provided in the form is unique and not already in use.
@@ -674,13 +1142,73 @@ def validate_admin_pin(form: FlaskForm, admin_pin: StringField) -> None:
         raise ValidationError('Invalid admin PIN.')
 
 
-def fetch_and_process_holdings(cik, start_date=None, end_date=None):
+def parse_date_window(values) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Read an optional filing date window from request values.
+
+    Args:
+        values: Request args or form with optional 'start_date' and 'end_date' fields in YYYY-MM-DD format.
+
+    Returns:
+        Tuple[Optional[date], Optional[date]]: The first and last filing date, None when not given.
+
+    Raises:
+        ValueError: If a date is malformed or the window ends before it starts.
+    """
+    start_date, end_date = (datetime.strptime(values[name], '%Y-%m-%d').date() if values.get(name) else None
+                            for name in ('start_date', 'end_date'))
+    if start_date and end_date and start_date > end_date:
+        raise ValueError('The start date must not be after the end date.')
+    return start_date, end_date
+
+
+def filter_filed_window(query, start_date=None, end_date=None):
+    """
+    Restrict a Submission query to filings made between two dates, both included. Served by the
+    (cik, filed_of_date) index.
+    """
+    # filed_of_date is a DATE column; datetimes would be compared as text on SQLite
+    if start_date is not None:
+        start_date = start_date.date() if isinstance(start_date, datetime) else start_date
+        query = query.filter(Submission.filed_of_date >= start_date)
+    if end_date is not None:
+        end_date = end_date.date() if isinstance(end_date, datetime) else end_date
+        query = query.filter(Submission.filed_of_date <= end_date)
+    return query
+
+
+def get_window_submissions(cik, start_date=None, end_date=None):
+    """
+    Get the submissions of a fund for the periods with filings in a date window, newest accession first.
+
+    Earlier filings of these periods are included, as the amendments filed in the window change them.
+    """
+    query = Submission.query.filter(Submission.cik == cik)
+    if start_date is not None or end_date is not None:
+        window_periods = filter_filed_window(select(Submission.period_of_portfolio).where(Submission.cik == cik),
+                                             start_date, end_date)
+        query = query.filter(Submission.period_of_portfolio.in_(window_periods))
+    return query.order_by(Submission.accession_number.desc()).all()
+
+
+def fetch_and_process_holdings(cik, start_date=None, end_date=None, download_missing=True):
     """
     Fetch and process holdings data for a given CIK.
+
+    If the fund has no stored submissions and `download_missing` is True, its filings are downloaded first.
+    With `start_date` or `end_date`, only the periods with submissions filed in that window and their holdings are read.
     """
     # Fetch the fund and its submissions from the database
     fund = Submission.query.filter_by(cik=cik).first()
 
+    if not fund and download_missing:
+        # The read replica may lag behind; ask the primary before downloading the filings again
+        pin_to_primary()
+        fund = Submission.query.filter_by(cik=cik).first()
+
+    if not fund and not download_missing:
+        return None, [], []
+
     if not fund:
         # If no fund found, fetch from SEC EDGAR and update the database
         edgar_downloader_from_sec(cik, start_date=start_date, end_date=end_date)
@@ -688,22 +1216,29 @@ def fetch_and_process_holdings(cik, start_date=None, end_date=None):
         if not fund:
             return None, [], []
 
-    # Fetch all submissions for the fund and order by accession number descending
-    all_submissions = Submission.query.filter_by(cik=cik).order_by(Submission.accession_number.desc()).all()
+    all_submissions = get_window_submissions(cik, start_date, end_date)
 
-    # Fetch all holdings for the fund based on submissions
-    all_holdings = []
-    if all_submissions:
-        all_accession_numbers = [submission.accession_number for submission in all_submissions]
-        all_holdings = FundHoldings.query.filter(FundHoldings.accession_number.in_(all_accession_numbers)).all()
+    if start_date is None and end_date is None:
+        # Holdings of popular funds are served from the shared on-disk cache, the others are read from the database
+        holdings_df = read_cached_holdings(cik, all_submissions)
+        if holdings_df is None:
+            holdings_df = read_submission_holdings(all_submissions)
+            write_cached_holdings(cik, all_submissions, holdings_df)
+    else:
+        # The cache holds whole funds; a window only reads its own holdings
+        holdings_df = read_submission_holdings(all_submissions)
 
-    # Convert SQLAlchemy results to a pandas DataFrame
-    holdings_df = pd.DataFrame(
-        [(holding.company_name, holding.value_usd, holding.share_amount, holding.accession_number)
-         for holding in all_holdings],
-        columns=['Company Name', 'Value (USD)', 'Share Amount', 'Accession Number']
-    )
+    # Amended periods are shown once, with their effective holdings
+    holdings_df = resolve_effective_holdings(holdings_df, all_submissions)
+    processed_submissions = process_submissions(get_effective_submissions(all_submissions))
 
+    return fund, processed_submissions, holdings_df
+
+
+def process_submissions(all_submissions):
+    """
+    Convert submissions into display dictionaries with a numbered period, newest first.
+    """
     # Sort submissions by period and accession number
     submissions_by_period = defaultdict(list)
     for submission in all_submissions:
@@ -723,131 +1258,70 @@ def fetch_and_process_holdings(cik, start_date=None, end_date=None):
                 'fund_portfolio_value': submission.fund_portfolio_value
             })
 
-    # Sort DataFrame by Company Name and Accession Number
-    holdings_df.sort_values(by=['Company Name', 'Accession Number'], ascending=[True, False], inplace=True)
-
     # Sort processed_submissions by filed_of_date and accession_number for display purposes
     processed_submissions.sort(key=lambda x: (x['filed_of_date'], x['accession_number']), reverse=True)
-
-    return fund, processed_submissions, holdings_df
+    return processed_submissions
 
 
 def process_holdings_dataframe(holdings_df, all_submissions):
     """
     Process the holdings DataFrame to compare current and previous holdings.
     """
-    most_recent_accession = all_submissions[0]['accession_number'] if all_submissions else None
-    previous_accession = all_submissions[1]['accession_number'] if len(all_submissions) > 1 else None
+    return build_holdings_diff_dataframe(holdings_df, all_submissions).to_dict(orient='records')
 
-    if not most_recent_accession:
-        return []
-
-    current_holdings_df = holdings_df[holdings_df['Accession Number'] == most_recent_accession].copy()
-    if previous_accession:
-        previous_holdings_df = holdings_df[holdings_df['Accession Number'] == previous_accession].copy()
-
-        try:
-            merged_holdings_df = pd.merge(
-                current_holdings_df,
-                previous_holdings_df[['Company Name', 'Share Amount']],
-                on='Company Name',
-                how='left',
-                suffixes=('', '_Previous')
-            )
-            merged_holdings_df.rename(columns={'Share Amount_Previous': 'Previous Share Amount'}, inplace=True)
-
-            previous_companies = previous_holdings_df['Company Name'].unique()
-            merged_holdings_df['New Company'] = ~merged_holdings_df['Company Name'].isin(previous_companies)
-
-            merged_holdings_df['Change Amount'] = merged_holdings_df['Share Amount'] - merged_holdings_df[
-                'Previous Share Amount'].fillna(0)
 
-            def calculate_change_percentage(row):
-                if pd.isna(row['Previous Share Amount']) or row['Previous Share Amount'] == 0:
-                    if row['Share Amount'] > 0:
-                        return 100.0
-                    else:
-                        return 0.0
-                else:
-                    return (row['Change Amount'] / row['Previous Share Amount']) * 100
-
-            merged_holdings_df['Change Percentage'] = merged_holdings_df.apply(calculate_change_percentage, axis=1)
-
-            merged_holdings_df['Change Status'] = 'No Change'
-            merged_holdings_df.loc[merged_holdings_df['Share Amount'] > merged_holdings_df[
-                'Previous Share Amount'], 'Change Status'] = 'Increased'
-            merged_holdings_df.loc[merged_holdings_df['Share Amount'] < merged_holdings_df[
-                'Previous Share Amount'], 'Change Status'] = 'Decreased'
-            merged_holdings_df.loc[
-                merged_holdings_df['Previous Share Amount'].isna(), 'Change Status'] = 'New Investment'
-
-            previous_holdings_not_in_current = previous_holdings_df[
-                ~previous_holdings_df['Company Name'].isin(current_holdings_df['Company Name'])].copy()
-
-            previous_holdings_not_in_current['Share Amount'] = 0
-            previous_holdings_not_in_current['Change Status'] = 'Position Closed'
-            previous_holdings_not_in_current['New Company'] = False
-            previous_holdings_not_in_current['Change Amount'] = -previous_holdings_not_in_current['Share Amount']
-            previous_holdings_not_in_current['Change Percentage'] = -100
-
-            merged_holdings_df = pd.concat([merged_holdings_df, previous_holdings_not_in_current],
-                                           ignore_index=True)
-
-        except KeyError:
-            current_holdings_df['Previous Share Amount'] = 0
-            current_holdings_df['New Company'] = True
-            current_holdings_df['Change Status'] = 'New Investment'
-            current_holdings_df['Change Amount'] = current_holdings_df['Share Amount']
-            current_holdings_df['Change Percentage'] = 100.0
-            merged_holdings_df = current_holdings_df
+def build_holdings_diff_dataframe(holdings_df, all_submissions):
+    """
+    Build a DataFrame comparing the holdings of the most recent submission with the previous one.
 
-    else:
-        current_holdings_df['Previous Share Amount'] = 0
-        current_holdings_df['New Company'] = True
-        current_holdings_df['Change Status'] = 'New Investment'
-        current_holdings_df['Change Amount'] = current_holdings_df['Share Amount']
-        current_holdings_df['Change Percentage'] = 100.0
-        merged_holdings_df = current_holdings_df
+    Positions are matched by CUSIP and put/call flag (see `diffs.encode_positions`), so renamed issuers are
+    not reported as a closed and a new position. Comparisons are cached per pair of submissions; the returned
+    frame may be shared and must not be modified.
+    """
+    most_recent_accession = all_submissions[0]['accession_number'] if all_submissions else None
+    previous_accession = all_submissions[1]['accession_number'] if len(all_submissions) > 1 else None
 
-    merged_holdings_df['Value (USD)'] = merged_holdings_df['Value (USD)'].fillna(0).astype(int)
-    merged_holdings_df['Share Amount'] = merged_holdings_df['Share Amount'].fillna(0).astype(int)
-    merged_holdings_df['Previous Share Amount'] = merged_holdings_df['Previous Share Amount'].fillna(0).astype(int)
-    merged_holdings_df['Change Amount'] = merged_holdings_df['Change Amount'].fillna(0).astype(int)
-    merged_holdings_df['Change Percentage'] = merged_holdings_df['Change Percentage'].fillna(0).round(1)
+    if not most_recent_accession:
+        return pd.DataFrame(columns=DIFF_COLUMNS)
 
-    return merged_holdings_df.to_dict(orient='records')
+    return holdings_diff_cache.get_or_set(
+        f"{most_recent_accession}|{previous_accession or ''}",
+        lambda: diff_positions(holdings_df, most_recent_accession, previous_accession))
 
 
 def process_monitor_holdings_dataframe(holdings_df, all_submissions):
     """
     Process the holdings DataFrame specifically for the monitor view.
     """
-    accession_numbers = [submission['accession_number'] for submission in all_submissions]
-    periods = [submission['period_of_portfolio'] for submission in all_submissions]
+    merged_holdings_df, columns_order = build_monitor_dataframe(holdings_df, all_submissions)
+    return merged_holdings_df.to_dict(orient='records'), columns_order
 
-    merged_holdings_df = pd.DataFrame(columns=['Company Name'])
 
-    period_counts = {}
-    if accession_numbers:
-        for i, (accession_number, period) in enumerate(zip(accession_numbers, periods)):
-            period_counts[period] = period_counts.get(period, 0) + 1
-            period_suffix = period_counts[period]
-            column_name = f'{period}_{period_suffix}' if period_suffix > 1 else period
-            temp_df = holdings_df[holdings_df['Accession Number'] == accession_number].copy()
-            temp_df.rename(columns={'Share Amount': column_name}, inplace=True)
-            merged_holdings_df = pd.merge(
-                merged_holdings_df,
-                temp_df[['Company Name', column_name]],
-                on='Company Name',
-                how='outer'
-            )
+def get_monitor_columns(all_submissions):
+    """
+    Get the monitor matrix column name of each submission, in the order of the submissions.
 
-    merged_holdings_df.fillna(0, inplace=True)
+    Returns:
+        List[Tuple[str, str]]: Pairs of accession number and column name.
+    """
+    monitor_columns = []
+    period_counts = {}
+    for submission in all_submissions:
+        period = submission['period_of_portfolio']
+        period_counts[period] = period_counts.get(period, 0) + 1
+        period_suffix = period_counts[period]
+        column_name = f'{period}_{period_suffix}' if period_suffix > 1 else period
+        monitor_columns.append((submission['accession_number'], column_name))
+    return monitor_columns
 
-    for col in merged_holdings_df.columns[1:]:
-        merged_holdings_df[col] = merged_holdings_df[col].astype(int)
 
-    columns_order = ['Company Name'] + [col for col in merged_holdings_df.columns if col != 'Company Name'][::-1]
-    merged_holdings_df = merged_holdings_df[columns_order]
+def build_monitor_dataframe(holdings_df, all_submissions):
+    """
+    Build the monitor matrix: one row per position and one share amount column per submission period.
+    """
+    # Oldest submission first
+    monitor_columns = get_monitor_columns(all_submissions)[::-1]
+    merged_holdings_df = monitor_matrix(holdings_df, monitor_columns)
+    columns_order = list(merged_holdings_df.columns)
 
-    return merged_holdings_df.to_dict(orient='records'), columns_order
+    return merged_holdings_df, columns_order
@@ -0,0 +1,182 @@
+import logging
+import queue
+import threading
+from typing import Dict, List, Optional, Set
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+
+from .database import db
+from .models import FundData, AddFundToFavorites, Submission
+from .utils import HOLDINGS_FILING_TYPES, get_rss_feed_entries, ingest_filing
+
+logger = logging.getLogger('sLogger')
+
+
+class FilingWatcher:
+    """
+    Poll the SEC "getcurrent" feeds and ingest new filings of funds that users have in their favorites and of the
+    well-known funds of the home page.
+
+    Polling and ingestion are decoupled by a queue: the polling loop only matches feed entries against the
+    watched CIKs and enqueues accessions it has not seen yet, while a worker thread downloads and stores them.
+
+    Attributes:
+        app (Flask): The Flask application used for database access.
+        poll_interval (int): Number of seconds between two feed polls.
+        feed_max_age (int): Number of seconds a cached feed is reused.
+        filing_types (List[str]): Filing types that are ingested, amendments included.
+        queue (queue.Queue): Accessions waiting for ingestion.
+    """
+
+    def __init__(self, app: Flask, poll_interval: int = 60, feed_max_age: int = 30,
+                 filing_types: Optional[List[str]] = None):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.feed_max_age = feed_max_age
+        self.filing_types = filing_types or HOLDINGS_FILING_TYPES
+        self.queue: 'queue.Queue[Dict[str, str]]' = queue.Queue()
+        self._seen_accession_numbers: Set[str] = set()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def watched_ciks(self) -> Set[str]:
+        """
+        Retrieve the CIKs of all funds that are in at least one user's favorites, and of the well-known funds of
+        the home page that have stored submissions, so the figures of their panel stay current.
+
+        Returns:
+            Set[str]: The watched CIKs.
+        """
+        rows = db.session.query(FundData.cik).join(AddFundToFavorites, AddFundToFavorites.fund_id == FundData.id) \
+            .distinct().all()
+        well_known_rows = db.session.query(Submission.cik) \
+            .filter(Submission.cik.in_(list(self.app.config['WELL_KNOWN_FUNDS']))).distinct().all()
+        return {cik for cik, in rows} | {cik for cik, in well_known_rows}
+
+    def poll_once(self) -> List[Dict[str, str]]:
+        """
+        Poll the feeds once and enqueue the new filings of watched funds.
+
+        Returns:
+            List[Dict[str, str]]: The feed entries that were enqueued.
+        """
+        entries = [entry for entry in get_rss_feed_entries(count=100, max_age=self.feed_max_age)
+                   if entry and entry['form_type'] in self.filing_types]
+        watched_ciks = self.watched_ciks()
+        candidates = [entry for entry in entries
+                      if entry['cik'] in watched_ciks and entry['acc_no'] not in self._seen_accession_numbers]
+        if not candidates:
+            return []
+
+        # Filings already stored, e.g. by a manual download, are only marked as seen
+        stored = db.session.query(Submission.accession_number).filter(
+            Submission.accession_number.in_([entry['acc_no'] for entry in candidates])).all()
+        stored_accession_numbers = {accession_number for accession_number, in stored}
+
+        enqueued = []
+        for entry in candidates:
+            self._seen_accession_numbers.add(entry['acc_no'])
+            if entry['acc_no'] in stored_accession_numbers:
+                continue
+            self.queue.put(entry)
+            enqueued.append(entry)
+            logger.info(f"Enqueued {entry['form_type']} {entry['acc_no']} for CIK {entry['cik']}.")
+        return enqueued
+
+    def process_queue(self, block: bool = False) -> int:
+        """
+        Ingest the filings waiting in the queue.
+
+        Args:
+            block (bool): Wait for new filings until the watcher is stopped instead of returning when the queue is empty.
+
+        Returns:
+            int: Number of filings that were ingested.
+        """
+        processed = 0
+        while not self._stop.is_set():
+            try:
+                entry = self.queue.get(block=block, timeout=1 if block else None)
+            except queue.Empty:
+                if block:
+                    continue
+                break
+
+            with self.app.app_context():
+                try:
+                    if ingest_filing(entry['cik'], entry['acc_no'], entry['form_type']):
+                        processed += 1
+                    else:
+                        logger.warning(f"Could not download filing {entry['acc_no']}, retrying on the next poll")
+                        self._seen_accession_numbers.discard(entry['acc_no'])
+                except Exception as e:
+                    logger.error(f"Error ingesting filing {entry['acc_no']}: {e}")
+                    # Allow the next poll to retry the filing
+                    self._seen_accession_numbers.discard(entry['acc_no'])
+                finally:
+                    db.session.remove()
+                    self.queue.task_done()
+        return processed
+
+    def start_worker(self) -> None:
+        """
+        Start the background thread that ingests enqueued filings.
+        """
+        if self._worker and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self.process_queue, kwargs={'block': True},
+                                        name='filing-watcher-worker', daemon=True)
+        self._worker.start()
+
+    def run(self, iterations: Optional[int] = None) -> None:
+        """
+        Poll the feeds in a loop and ingest new filings in the background.
+
+        Args:
+            iterations (Optional[int]): Number of polls before returning. Runs until stopped if None.
+        """
+        self.start_worker()
+        poll_count = 0
+        while not self._stop.is_set() and (iterations is None or poll_count < iterations):
+            with self.app.app_context():
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    logger.error(f"Error polling filing feeds: {e}")
+                finally:
+                    db.session.remove()
+            poll_count += 1
+            if iterations is None or poll_count < iterations:
+                self._stop.wait(self.poll_interval)
+
+        if iterations is not None:
+            self.queue.join()
+
+    def stop(self) -> None:
+        """
+        Stop the polling loop and the worker thread.
+        """
+        self._stop.set()
+        if self._worker:
+            self._worker.join()
+
+
+@click.command('watch-filings')
+@click.option('--interval', type=int, default=None, help='Seconds between feed polls.')
+@click.option('--iterations', type=int, default=None, help='Number of polls before exiting.')
+@with_appcontext
+def watch_filings_command(interval: Optional[int], iterations: Optional[int]) -> None:
+    """
+    Watch the SEC filing feeds and ingest new filings of favorite funds.
+    """
+    app = current_app._get_current_object()
+    watcher = FilingWatcher(app,
+                            poll_interval=interval or app.config['FILING_WATCHER_INTERVAL'],
+                            feed_max_age=app.config['RSS_FEED_CACHE_SECONDS'])
+    logger.info(f'Watching filing feeds every {watcher.poll_interval} seconds.')
+    try:
+        watcher.run(iterations=iterations)
+    except KeyboardInterrupt:
+        watcher.stop()
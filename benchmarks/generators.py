@@ -0,0 +1,280 @@
+import os
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Tuple
+
+from sqlalchemy import insert
+
+from FinalFinance.database import db
+from FinalFinance.frames import HOLDINGS_COLUMNS, compact_holdings_frame
+from FinalFinance.models import FundData, Submission, FundHoldings
+from FinalFinance.partitions import ensure_holdings_partition
+from FinalFinance.flows import rebuild_security_flows
+from FinalFinance.summaries import rebuild_fund_summaries
+
+# Share of positions that is closed and replaced by new companies from one submission to the next
+POSITION_TURNOVER = 0.05
+
+FILING_HEADER = """<SEC-HEADER>
+ACCESSION NUMBER:\t\t{accession_number}
+CONFORMED SUBMISSION TYPE:\t{submission_type}
+CONFORMED PERIOD OF REPORT:\t{period_of_report:%Y%m%d}
+FILED AS OF DATE:\t\t{filed_of_date:%Y%m%d}
+
+FILER:
+\tCOMPANY DATA:
+\t\tCOMPANY CONFORMED NAME:\t\t\t{fund_name}
+\t\tCENTRAL INDEX KEY:\t\t\t{cik}
+</SEC-HEADER>
+"""
+
+INFO_TABLE_ENTRY = """<infoTable>
+<nameOfIssuer>{company_name}</nameOfIssuer>
+<titleOfClass>COM</titleOfClass>
+<cusip>{cusip}</cusip>
+<value>{value}</value>
+<shrsOrPrnAmt><sshPrnamt>{share_amount}</sshPrnamt><sshPrnamtType>SH</sshPrnamtType></shrsOrPrnAmt>
+<investmentDiscretion>SOLE</investmentDiscretion>
+</infoTable>
+"""
+
+NPORT_ENTRY = """<invstOrSec>
+<name>{company_name}</name>
+<lei>{lei}</lei>
+<title>{company_name}</title>
+<cusip>{cusip}</cusip>
+<identifiers><isin value="US{cusip}0"/></identifiers>
+<balance>{share_amount}.00</balance>
+<units>NS</units>
+<curCd>USD</curCd>
+<valUSD>{value}.00</valUSD>
+<pctVal>{pct_of_net_assets:.6f}</pctVal>
+<payoffProfile>Long</payoffProfile>
+<assetCat>EC</assetCat>
+<issuerCat>CORP</issuerCat>
+<invCountry>US</invCountry>
+<isRestrictedSec>N</isRestrictedSec>
+<fairValLevel>1</fairValLevel>
+<securityLending><isCashCollateral>N</isCashCollateral><isNonCashCollateral>N</isNonCashCollateral>\
+<isLoanByFund>N</isLoanByFund></securityLending>
+</invstOrSec>
+"""
+
+# Sections of an N-PORT primary document around the investments, with the fund's returns and flows
+NPORT_DOCUMENT = """<edgarSubmission xmlns="http://www.sec.gov/edgar/nport" \
+xmlns:com="http://www.sec.gov/edgar/common" xmlns:ncom="http://www.sec.gov/edgar/nportcommon">
+<headerData><submissionType>{submission_type}</submissionType><filerInfo><filer><issuerCredentials>\
+<cik>{cik}</cik></issuerCredentials></filer></filerInfo></headerData>
+<formData>
+<genInfo><regName>{fund_name}</regName><regCik>{cik}</regCik><repPdDate>{period_of_report:%Y-%m-%d}</repPdDate>\
+</genInfo>
+<fundInfo><totAssets>{net_assets}.00</totAssets><totLiabs>0.00</totLiabs><netAssets>{net_assets}.00</netAssets>
+<returnInfo><monthlyTotReturns><monthlyTotReturn classId="C000000001" rtn1="1.25" rtn2="-0.50" rtn3="2.10"/>\
+</monthlyTotReturns>
+<othMon1><netRealizedGain>0.00</netRealizedGain><netUnrealizedAppr>0.00</netUnrealizedAppr></othMon1>
+</returnInfo>
+<mon1Flow sales="0.00" reinvestment="0.00" redemption="0.00"/>
+<mon2Flow sales="0.00" reinvestment="0.00" redemption="0.00"/>
+<mon3Flow sales="0.00" reinvestment="0.00" redemption="0.00"/>
+</fundInfo>
+<invstOrSecs>
+{entries}</invstOrSecs>
+<signature><ncom:signerName>Benchmark Signer</ncom:signerName></signature>
+</formData>
+</edgarSubmission>"""
+
+
+def accession_number_for(cik: str, sequence: int) -> str:
+    """
+    Build a deterministic accession number for the n-th synthetic submission of a fund.
+    """
+    return f'{cik}-{10 + sequence // 100000:02d}-{sequence % 100000 + 1:06d}'
+
+
+def iter_portfolios(positions: int, submissions: int, seed: int = 0) -> Iterator[List[Tuple[str, str, int, int]]]:
+    """
+    Generate the portfolios of consecutive submissions, oldest first.
+
+    Each portfolio keeps most companies of the previous one with changed share amounts, and a small share of
+    positions is closed and replaced by new companies, like the quarterly turnover of a real fund.
+
+    Args:
+        positions (int): Number of positions per submission.
+        submissions (int): Number of submissions.
+        seed (int): Seed of the random generator, so runs are reproducible.
+
+    Yields:
+        List[Tuple[str, str, int, int]]: Company name, CUSIP, value in USD and share amount of every position.
+    """
+    rng = random.Random(seed)
+    next_company = positions
+    companies = list(range(positions))
+    share_amounts = {company: rng.randint(100, 5_000_000) for company in companies}
+
+    for _ in range(submissions):
+        portfolio = []
+        for company in companies:
+            share_amount = share_amounts[company]
+            portfolio.append((f'Company {company:06d} Inc', f'{company:09d}', share_amount * rng.randint(5, 500),
+                              share_amount))
+        yield portfolio
+
+        closed = set(rng.sample(companies, int(len(companies) * POSITION_TURNOVER)))
+        companies = [company for company in companies if company not in closed]
+        for _ in closed:
+            companies.append(next_company)
+            share_amounts[next_company] = rng.randint(100, 5_000_000)
+            next_company += 1
+        for company in companies:
+            share_amounts[company] = max(1, int(share_amounts[company] * rng.uniform(0.8, 1.25)))
+
+
+def generate_filing(cik: str, fund_name: str, accession_number: str, period_of_report: date,
+                    portfolio: List[Tuple[str, str, int, int]], submission_type: str = '13F-HR') -> str:
+    """
+    Render a full-submission.txt file in the layout that `extract_holdings_from_file` reads.
+
+    Args:
+        cik (str): The CIK of the fund.
+        fund_name (str): The conformed name of the fund.
+        accession_number (str): The accession number of the filing.
+        period_of_report (date): The last day of the reported quarter.
+        portfolio (List[Tuple[str, str, int, int]]): The positions, as produced by `iter_portfolios`.
+        submission_type (str): Either '13F-HR' (information table) or 'NPORT-P' (investments or securities).
+
+    Returns:
+        str: The filing text.
+    """
+    header = FILING_HEADER.format(accession_number=accession_number, submission_type=submission_type,
+                                  period_of_report=period_of_report,
+                                  filed_of_date=period_of_report + timedelta(days=45),
+                                  fund_name=fund_name, cik=cik)
+    if submission_type.startswith('NPORT'):
+        net_assets = sum(value for _, _, value, _ in portfolio) or 1
+        entries = ''.join(NPORT_ENTRY.format(company_name=company_name, cusip=cusip, value=value,
+                                             share_amount=share_amount, lei=f'5493{cusip}{cusip[-7:]}',
+                                             pct_of_net_assets=100 * value / net_assets)
+                          for company_name, cusip, value, share_amount in portfolio)
+        document = NPORT_DOCUMENT.format(submission_type=submission_type, cik=cik, fund_name=fund_name,
+                                         period_of_report=period_of_report, net_assets=net_assets, entries=entries)
+    else:
+        entries = ''.join(INFO_TABLE_ENTRY.format(company_name=company_name, cusip=cusip, value=value,
+                                                  share_amount=share_amount)
+                          for company_name, cusip, value, share_amount in portfolio)
+        document = f'<informationTable>\n{entries}</informationTable>'
+    return f'<SEC-DOCUMENT>\n{header}<DOCUMENT>\n<TEXT>\n<XML>\n{document}\n</XML>\n</TEXT>\n</DOCUMENT>\n' \
+           f'</SEC-DOCUMENT>\n'
+
+
+def write_filing(directory: str, cik: str, positions: int, submission_type: str = '13F-HR', seed: int = 0,
+                 fund_name: str = 'Benchmark Fund') -> Tuple[str, str]:
+    """
+    Write one synthetic filing to disk.
+
+    Args:
+        directory (str): The directory the file is written to.
+        cik (str): The CIK of the fund.
+        positions (int): Number of positions in the filing.
+        submission_type (str): Either '13F-HR' or 'NPORT-P'.
+        seed (int): Seed of the random generator.
+        fund_name (str): The conformed name of the fund.
+
+    Returns:
+        Tuple[str, str]: The path of the file and its accession number.
+    """
+    portfolio = next(iter_portfolios(positions, 1, seed))
+    accession_number = accession_number_for(cik, seed)
+    path = os.path.join(directory, f'{accession_number}.txt')
+    with open(path, 'w') as file:
+        file.write(generate_filing(cik, fund_name, accession_number, date(2024, 3, 31), portfolio,
+                                   submission_type))
+    return path, accession_number
+
+
+def quarter_end(quarters_back: int) -> date:
+    """
+    Get the last day of the quarter the given number of quarters before 2024 Q4.
+    """
+    year, quarter = divmod(2024 * 4 + 3 - quarters_back, 4)
+    month = quarter * 3 + 3
+    return date(year, month, 30 if month in (6, 9) else 31)
+
+
+def build_holdings_frame(cik: str, positions: int, submissions: int, seed: int = 0) -> Tuple[Any, List[Dict[str, Any]]]:
+    """
+    Build the holdings frame and processed submissions of a synthetic fund in memory, in the shape returned by
+    `fetch_and_process_holdings`, without touching the database.
+
+    Args:
+        cik (str): The CIK of the fund.
+        positions (int): Number of positions per submission.
+        submissions (int): Number of submissions.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        Tuple[Any, List[Dict[str, Any]]]: The holdings DataFrame and the processed submissions, newest first.
+    """
+    import pandas as pd
+
+    rows = []
+    all_submissions = []
+    for sequence, portfolio in enumerate(iter_portfolios(positions, submissions, seed)):
+        period_of_report = quarter_end(submissions - 1 - sequence)
+        accession_number = accession_number_for(cik, sequence)
+        rows.extend((company_name, float(value), float(share_amount), accession_number, cusip, None)
+                    for company_name, cusip, value, share_amount in portfolio)
+        all_submissions.insert(0, {
+            'filed_of_date': period_of_report + timedelta(days=45),
+            'period_of_portfolio': f'{period_of_report.year} Q{(period_of_report.month - 1) // 3 + 1}_1',
+            'submission_type': '13F-HR',
+            'accession_number': accession_number,
+            'fund_portfolio_value': float(sum(value for _, _, value, _ in portfolio)),
+        })
+    holdings_df = compact_holdings_frame(pd.DataFrame(rows, columns=HOLDINGS_COLUMNS))
+    return holdings_df, all_submissions
+
+
+def seed_fund(cik: str, positions: int, submissions: int, seed: int = 0,
+              fund_name: str = 'Benchmark Fund') -> Dict[str, Any]:
+    """
+    Store a fund with synthetic submissions and holdings directly in the database.
+
+    Rows are written with bulk inserts, so seeding does not go through the (measured) ingestion path.
+
+    Args:
+        cik (str): The CIK of the fund.
+        positions (int): Number of positions per submission.
+        submissions (int): Number of submissions.
+        seed (int): Seed of the random generator.
+        fund_name (str): The name of the fund.
+
+    Returns:
+        Dict[str, Any]: The CIK, the number of submissions and the number of stored holdings.
+    """
+    fund = FundData(fund_name=fund_name, cik=cik)
+    db.session.add(fund)
+    db.session.commit()
+
+    holdings_count = 0
+    for sequence, portfolio in enumerate(iter_portfolios(positions, submissions, seed)):
+        period_of_report = quarter_end(submissions - 1 - sequence)
+        period_of_portfolio = f'{period_of_report.year} Q{(period_of_report.month - 1) // 3 + 1}'
+        accession_number = accession_number_for(cik, sequence)
+        ensure_holdings_partition(period_of_portfolio)
+        db.session.add(Submission(cik=cik, company_name=fund_name, submission_type='13F-HR',
+                                  filed_of_date=period_of_report + timedelta(days=45),
+                                  accession_number=accession_number, period_of_portfolio=period_of_portfolio,
+                                  fund_data_id=fund.id,
+                                  fund_portfolio_value=float(sum(value for _, _, value, _ in portfolio)),
+                                  fund_owns_companies=len(portfolio)))
+        db.session.execute(insert(FundHoldings), [
+            {'company_name': company_name, 'value_usd': value, 'share_amount': share_amount, 'cusip': cusip,
+             'cik': cik, 'accession_number': accession_number, 'period_of_portfolio': period_of_portfolio,
+             'fund_data_id': fund.id}
+            for company_name, cusip, value, share_amount in portfolio])
+        holdings_count += len(portfolio)
+    db.session.commit()
+    rebuild_fund_summaries(cik)
+    rebuild_security_flows(cik)
+
+    return {'cik': cik, 'submissions': submissions, 'holdings': holdings_count}
@@ -0,0 +1,337 @@
+"""
+Load test of the main routes against a local SEC stand-in.
+
+Usage:
+    python -m benchmarks.loadtest --users 20 --duration 60
+    python -m benchmarks.loadtest --users 50 --funds 20 --positions 5000 --submissions 12 --output load.json
+
+The application is served in-process by a threaded WSGI server against a scratch database seeded with users,
+favorites and funds. Every virtual user logs in and then requests a weighted mix of `/`, `/fund_search`,
+`/fund_details/<cik>` and `/monitor` until the run ends. A few "cold" funds have no stored filings, so their first
+visit downloads and ingests filings from the stand-in, like a first visit in production.
+
+To load an application that is already running (e.g. under gunicorn), pass --target-url together with the
+--database-url that application uses and its working directory as --server-dir, and start it with SEC_URL and
+SEC_DATA_URL pointing at the stand-in (--sec-port makes its address predictable).
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from .run_benchmarks import create_benchmark_app, percentile, reset_database
+from .sec_stub import SecStub
+
+DEFAULT_MIX = 'home=3,fund_search=3,fund_details=3,monitor=1'
+USER_PASSWORD = 'LoadTest#2024'
+FIRST_FUND_CIK = 9000000
+SEARCH_TERMS = ['Load', 'Fund', 'Capital', 'Partners', 'Trust', '000900']
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """
+    Parse a route mix like 'home=3,monitor=1' into weights.
+
+    Raises:
+        ValueError: If a route is unknown or a weight is not a positive integer.
+    """
+    weights = {}
+    for part in mix.split(','):
+        route, _, weight = part.partition('=')
+        if route not in ('home', 'fund_search', 'fund_details', 'monitor') or int(weight) <= 0:
+            raise ValueError(f'Invalid route weight: {part}')
+        weights[route] = int(weight)
+    return weights
+
+
+def seed_database(funds: int, cold_funds: int, users: int, positions: int,
+                  submissions: int) -> Tuple[Dict[str, str], Dict[str, str], List[str]]:
+    """
+    Seed funds with holdings, funds without filings and users with favorites.
+
+    Args:
+        funds (int): Number of funds with stored submissions.
+        cold_funds (int): Number of funds that are only known by name and CIK.
+        users (int): Number of users.
+        positions (int): Number of positions per submission.
+        submissions (int): Number of submissions per fund.
+
+    Returns:
+        Tuple[Dict[str, str], Dict[str, str], List[str]]: The stored funds and the cold funds (names keyed by
+            CIK) and the usernames.
+    """
+    from FinalFinance.database import db
+    from FinalFinance.models import AddFundToFavorites, FundData, User
+    from werkzeug.security import generate_password_hash
+    from .generators import seed_fund
+
+    reset_database()
+    names = ['Capital', 'Partners', 'Trust', 'Advisors', 'Management']
+    stored_funds = {f'{FIRST_FUND_CIK + number:010d}': f'Load Fund {number} {names[number % len(names)]}'
+                    for number in range(funds)}
+    new_funds = {f'{FIRST_FUND_CIK + funds + number:010d}': f'Cold Fund {number} {names[number % len(names)]}'
+                 for number in range(cold_funds)}
+
+    for number, (cik, fund_name) in enumerate(stored_funds.items()):
+        seed_fund(cik, positions, submissions, seed=number, fund_name=fund_name)
+    for cik, fund_name in new_funds.items():
+        db.session.add(FundData(fund_name=fund_name, cik=cik))
+    db.session.commit()
+
+    fund_ids = [fund.id for fund in FundData.query.filter(FundData.cik.in_(list(stored_funds))).all()]
+    password_hash = generate_password_hash(USER_PASSWORD)
+    rng = random.Random(0)
+    usernames = []
+    for number in range(users):
+        user = User(email=f'loaduser{number}@example.com', username=f'loaduser{number}', _password=password_hash)
+        db.session.add(user)
+        db.session.flush()
+        for fund_id in rng.sample(fund_ids, min(len(fund_ids), rng.randint(1, 3))):
+            db.session.add(AddFundToFavorites(user_id=user.id, fund_id=fund_id))
+        usernames.append(user.username)
+    db.session.commit()
+    db.session.remove()
+
+    return stored_funds, new_funds, usernames
+
+
+def seed_plot_image(server_dir: str = '.') -> None:
+    """
+    Write today's S&P 500 plot that the home page would otherwise build from Yahoo Finance data.
+
+    The home page only calls yfinance when the image for the day is missing, so a pre-rendered image from a
+    synthetic price series keeps the load test off the network.
+
+    Args:
+        server_dir (str): The working directory of the application server.
+    """
+    from matplotlib.figure import Figure
+
+    image_path = os.path.abspath(os.path.join(server_dir, 'FinalFinance', 'static', 'images',
+                                              f"plot_spy_{datetime.now().strftime('%Y-%m-%d')}.png"))
+    os.makedirs(os.path.dirname(image_path), exist_ok=True)
+    rng = random.Random(0)
+    prices = [400.0]
+    for _ in range(251):
+        prices.append(prices[-1] * (1 + rng.gauss(0.0004, 0.01)))
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.plot(range(len(prices)), prices, label='spy')
+    ax.legend()
+    fig.savefig(image_path)
+
+
+class RouteStats:
+    """
+    Thread-safe collection of response times per route.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, duration: float, ok: bool) -> None:
+        with self._lock:
+            self.durations[route].append(duration)
+            if not ok:
+                self.errors[route] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize throughput and latency percentiles per route and for all routes together.
+        """
+        with self._lock:
+            routes = {route: list(durations) for route, durations in self.durations.items()}
+            errors = dict(self.errors)
+        routes['all'] = [duration for durations in routes.values() for duration in durations]
+        errors['all'] = sum(errors.values())
+
+        summary = {}
+        for route, durations in sorted(routes.items()):
+            if not durations:
+                continue
+            summary[route] = {
+                'requests': len(durations),
+                'errors': errors.get(route, 0),
+                'throughput_per_s': len(durations) / elapsed,
+                'p50_ms': percentile(durations, 50) * 1000,
+                'p95_ms': percentile(durations, 95) * 1000,
+                'p99_ms': percentile(durations, 99) * 1000,
+                'max_ms': max(durations) * 1000,
+            }
+        return summary
+
+
+def run_virtual_user(base_url: str, username: str, weights: Dict[str, int], fund_ciks: List[str],
+                     deadline: float, think_time: float, stats: RouteStats, seed: int) -> None:
+    """
+    Log in and request a weighted mix of routes until the deadline.
+    """
+    rng = random.Random(seed)
+    routes, route_weights = list(weights), list(weights.values())
+
+    with requests.Session() as session:
+        # Send the CSRF token of the login form when the server has CSRF protection enabled
+        login_page = session.get(f'{base_url}/login').text
+        csrf_token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', login_page)
+        form = {'username': username, 'password': USER_PASSWORD}
+        if csrf_token:
+            form['csrf_token'] = csrf_token.group(1)
+        response = session.post(f'{base_url}/login', data=form, allow_redirects=False)
+        if response.status_code != 302:
+            stats.record('login', 0.0, False)
+            return
+
+        while time.monotonic() < deadline:
+            route = rng.choices(routes, route_weights)[0]
+            if route == 'home':
+                url = f'{base_url}/'
+            elif route == 'fund_search':
+                url = f'{base_url}/fund_search?query={rng.choice(SEARCH_TERMS)}'
+            elif route == 'fund_details':
+                url = f'{base_url}/fund_details/{rng.choice(fund_ciks)}'
+            else:
+                url = f'{base_url}/monitor'
+
+            start = time.perf_counter()
+            try:
+                response = session.get(url, allow_redirects=False)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            stats.record(route, time.perf_counter() - start, ok)
+
+            if think_time:
+                time.sleep(rng.uniform(0, 2 * think_time))
+
+
+def run_load(base_url: str, usernames: List[str], weights: Dict[str, int], fund_ciks: List[str], duration: float,
+             ramp_up: float, think_time: float) -> Tuple[RouteStats, float]:
+    """
+    Run all virtual users concurrently.
+
+    Returns:
+        Tuple[RouteStats, float]: The collected response times and the elapsed wall time in seconds.
+    """
+    stats = RouteStats()
+    start = time.monotonic()
+    deadline = start + ramp_up + duration
+    threads = []
+    for number, username in enumerate(usernames):
+        thread = threading.Thread(target=run_virtual_user, name=f'virtual-user-{number}',
+                                  args=(base_url, username, weights, fund_ciks, deadline, think_time, stats, number),
+                                  daemon=True)
+        threads.append(thread)
+        thread.start()
+        if ramp_up:
+            time.sleep(ramp_up / len(usernames))
+    for thread in threads:
+        thread.join()
+    return stats, time.monotonic() - start
+
+
+def print_report(summary: Dict[str, Dict[str, float]]) -> None:
+    """
+    Print the per-route results as a table.
+    """
+    print(f"{'route':<14} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9}")
+    for route, result in summary.items():
+        print(f"{route:<14} {result['requests']:>9} {result['errors']:>7} {result['throughput_per_s']:>8.1f} "
+              f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['max_ms']:>9.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Load test the main routes against a local SEC stand-in.')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users.')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of load after the ramp-up.')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which the users start.')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Mean pause between requests of a user.')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Route weights.')
+    parser.add_argument('--funds', type=int, default=10, help='Funds with stored filings.')
+    parser.add_argument('--cold-funds', type=int, default=2, help='Funds ingested from the stand-in on first visit.')
+    parser.add_argument('--positions', type=int, default=1000, help='Positions per filing.')
+    parser.add_argument('--submissions', type=int, default=8, help='Stored submissions per fund.')
+    parser.add_argument('--sec-latency-ms', type=float, default=50, help='Delay of every stand-in response.')
+    parser.add_argument('--sec-port', type=int, default=0, help='Port of the SEC stand-in (0 picks a free port).')
+    parser.add_argument('--database-url', default=None,
+                        help='Dedicated scratch database (all tables are dropped). Defaults to a temporary SQLite file.')
+    parser.add_argument('--target-url', default=None, help='Load an already running application instead.')
+    parser.add_argument('--server-dir', default=None,
+                        help='Working directory of the --target-url server, where the home page plot is seeded.')
+    parser.add_argument('--output', default=None, help='Where to write the results JSON.')
+    args = parser.parse_args(argv)
+    weights = parse_mix(args.mix)
+
+    # Downloaded filings and the plot image are written relative to the working directory
+    original_dir = os.getcwd()
+    server_dir = os.path.abspath(args.server_dir) if args.server_dir else None
+    work_dir = tempfile.mkdtemp(prefix='finalfinance-load-')
+    os.chdir(work_dir)
+    app, temp_dir = create_benchmark_app(args.database_url)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server = None
+    try:
+        print('Seeding database...', file=sys.stderr)
+        with app.app_context():
+            stored_funds, new_funds, usernames = seed_database(args.funds, args.cold_funds, args.users,
+                                                               args.positions, args.submissions)
+        seed_plot_image(server_dir or '.')
+
+        stub = SecStub({**stored_funds, **new_funds}, positions=args.positions,
+                       filings_per_fund=args.submissions, latency=args.sec_latency_ms / 1000,
+                       port=args.sec_port).start()
+        app.config['SEC_URL'] = app.config['SEC_DATA_URL'] = stub.url
+        print(f'SEC stand-in listening on {stub.url}', file=sys.stderr)
+
+        base_url = args.target_url
+        if not base_url:
+            from werkzeug.serving import make_server
+            server = make_server('127.0.0.1', 0, app, threaded=True)
+            threading.Thread(target=server.serve_forever, name='wsgi-server', daemon=True).start()
+            base_url = f'http://127.0.0.1:{server.server_port}'
+
+        print(f'Running {args.users} users for {args.duration:g}s against {base_url}...', file=sys.stderr)
+        stats, elapsed = run_load(base_url.rstrip('/'), usernames, weights, list(stored_funds) + list(new_funds),
+                                  args.duration, args.ramp_up, args.think_time)
+        summary = stats.summary(elapsed)
+        stub.stop()
+    finally:
+        if server:
+            server.shutdown()
+        with app.app_context():
+            from FinalFinance.database import db
+            db.session.remove()
+            db.engine.dispose()
+        os.chdir(original_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print_report(summary)
+    print(f'\nSEC stand-in requests: {stub.requests_served}')
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'created_at': datetime.now().isoformat(timespec='seconds'), 'arguments': vars(args),
+                       'routes': summary, 'sec_requests': stub.requests_served}, file, indent=2)
+        print(f'Results written to {args.output}')
+    return 1 if summary.get('all', {}).get('errors') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
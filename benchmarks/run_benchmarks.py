@@ -0,0 +1,397 @@
+"""
+Benchmarks of the ingestion and holdings-processing hot paths.
+
+Usage:
+    python -m benchmarks.run_benchmarks --suite quick
+    python -m benchmarks.run_benchmarks --suite full --baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --suite quick --save-baseline
+
+Every case is timed over several repeats after a warm-up run. Peak memory is measured in a separate run under
+tracemalloc, so its overhead does not distort the timings. Results are written as JSON and, when a baseline is
+given, compared with it; the exit status is 1 if any case regressed by more than the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+
+BENCHMARK_CIK = '0009999999'
+
+# (positions, submissions) of the seeded fund used by the processing benchmarks,
+# (funds, submissions, positions) of the in-memory funds used by the analytics benchmark and
+# (positions,) of the N-PORT filings parsed by the parser benchmark
+SUITES: Dict[str, Dict[str, List[Tuple[int, ...]]]] = {
+    'quick': {
+        'ingest': [(1000, 1)],
+        'process': [(1000, 1), (1000, 8)],
+        'analytics': [(100, 40, 100)],
+        'nport': [(2000,)],
+    },
+    'full': {
+        'ingest': [(1000, 1), (10000, 1), (100000, 1)],
+        'process': [(1000, 1), (1000, 60), (10000, 12), (10000, 60), (100000, 1), (100000, 12)],
+        'analytics': [(100, 40, 100), (100, 40, 1000)],
+        'nport': [(20000,)],
+    },
+}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """
+    Get a percentile of the samples, interpolated linearly between the closest ranks.
+    """
+    return float(np.percentile(samples, q))
+
+
+def measure(function: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None,
+            items: int = 1) -> Dict[str, float]:
+    """
+    Time a function and measure its peak memory.
+
+    Args:
+        function (Callable[[], Any]): The code under test.
+        repeat (int): Number of timed runs.
+        setup (Optional[Callable[[], None]]): Untimed code run before every call, e.g. to reset the database.
+        items (int): Number of items (positions or holdings rows) one call processes, used for the throughput.
+
+    Returns:
+        Dict[str, float]: Latency percentiles and mean in milliseconds, throughput in items per second and
+            peak traced memory in MiB.
+    """
+    def run_once() -> float:
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+    # Warm up caches (imports, compiled statements, the SQLite page cache)
+    run_once()
+    samples = [run_once() for _ in range(repeat)]
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mean = sum(samples) / len(samples)
+    return {
+        'repeat': repeat,
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+        'mean_ms': mean * 1000,
+        'throughput_per_s': items / mean if mean else 0.0,
+        'peak_memory_mib': peak / (1024 * 1024),
+    }
+
+
+def create_benchmark_app(database_url: Optional[str]) -> Tuple[Any, Optional[str]]:
+    """
+    Create the application against a scratch database.
+
+    Args:
+        database_url (Optional[str]): A dedicated database to use instead of a temporary SQLite file, e.g. an
+            embedded or throwaway PostgreSQL instance. All tables are dropped and recreated.
+
+    Returns:
+        Tuple[Any, Optional[str]]: The Flask application and the temporary directory to remove afterwards.
+    """
+    temp_dir = None
+    if not database_url:
+        temp_dir = tempfile.mkdtemp(prefix='finalfinance-bench-')
+        database_url = f"sqlite:///{os.path.join(temp_dir, 'benchmark.db')}"
+
+    from FinalFinance import create_app
+    from FinalFinance.config import TestingConfig
+
+    # The testing configuration reads TEST_DATABASE_URL at import time, which may already have happened
+    TestingConfig.SQLALCHEMY_DATABASE_URI = database_url
+    return create_app('testing'), temp_dir
+
+
+def reset_database() -> None:
+    """
+    Drop and recreate all tables.
+    """
+    from FinalFinance.database import db
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+
+def run_ingest_case(positions: int, submission_type: str, repeat: int, work_dir: str) -> Dict[str, Any]:
+    """
+    Benchmark `extract_holdings_from_file` on one synthetic filing.
+    """
+    from FinalFinance.database import db
+    from FinalFinance.models import FundData
+    from FinalFinance.utils import extract_holdings_from_file
+    from .generators import write_filing
+
+    path, _ = write_filing(work_dir, BENCHMARK_CIK, positions, submission_type=submission_type)
+
+    def setup() -> None:
+        reset_database()
+        db.session.add(FundData(fund_name='Benchmark Fund', cik=BENCHMARK_CIK))
+        db.session.commit()
+
+    result = measure(lambda: extract_holdings_from_file(path), repeat, setup=setup, items=positions)
+    result['file_size_mib'] = os.path.getsize(path) / (1024 * 1024)
+    return result
+
+
+def run_process_cases(positions: int, submissions: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Benchmark the holdings processing of a seeded fund. The holdings comparison is computed on every repetition
+    rather than read from the diff cache.
+    """
+    from FinalFinance.utils import fetch_and_process_holdings, holdings_diff_cache, process_holdings_dataframe, \
+        process_monitor_holdings_dataframe
+    from .generators import seed_fund
+
+    reset_database()
+    seeded = seed_fund(BENCHMARK_CIK, positions, submissions)
+    _, all_submissions, holdings_df = fetch_and_process_holdings(BENCHMARK_CIK, download_missing=False)
+
+    return {
+        'fetch_and_process_holdings': measure(
+            lambda: fetch_and_process_holdings(BENCHMARK_CIK, download_missing=False), repeat,
+            items=seeded['holdings']),
+        'process_holdings_dataframe': measure(
+            lambda: process_holdings_dataframe(holdings_df, all_submissions), repeat, setup=holdings_diff_cache.clear,
+            items=seeded['holdings']),
+        'process_monitor_holdings_dataframe': measure(
+            lambda: process_monitor_holdings_dataframe(holdings_df, all_submissions), repeat,
+            items=seeded['holdings']),
+    }
+
+
+def run_analytics_case(funds: int, submissions: int, positions: int, repeat: int) -> Dict[str, Any]:
+    """
+    Benchmark `compute_fund_analytics` over the full history of many funds, without the cache.
+    """
+    from FinalFinance.analytics import clear_analytics_cache, compute_fund_analytics
+    from .generators import build_holdings_frame
+
+    fund_frames = [build_holdings_frame(f'{index:010d}', positions, submissions, seed=index) for index in range(funds)]
+
+    def run() -> None:
+        for holdings_df, all_submissions in fund_frames:
+            compute_fund_analytics(holdings_df, all_submissions)
+
+    return measure(run, repeat, setup=clear_analytics_cache, items=sum(len(frame) for frame, _ in fund_frames))
+
+
+def parse_nport_with_beautifulsoup(data: str) -> List[Dict[str, Any]]:
+    """
+    Read the positions of an N-PORT filing like `extract_holdings_from_file` does when the investments section
+    cannot be streamed: the whole document is parsed with BeautifulSoup's lxml HTML parser.
+    """
+    from bs4 import BeautifulSoup
+
+    def text(tag: Any, name: str) -> Optional[str]:
+        child = tag.find(name)
+        return child.text.strip() if child else None
+
+    return [{'company_name': text(tag, 'name'), 'cusip': text(tag, 'cusip'), 'value_usd': float(text(tag, 'valusd')),
+             'share_amount': float(text(tag, 'balance')), 'asset_category': text(tag, 'assetcat'),
+             'issuer_lei': text(tag, 'lei'), 'pct_of_net_assets': float(text(tag, 'pctval'))}
+            for tag in BeautifulSoup(data, 'lxml').find_all('invstorsec')]
+
+
+def run_nport_cases(positions: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Benchmark reading the positions of a synthetic N-PORT filing, streamed and with BeautifulSoup.
+    """
+    from FinalFinance.nport import parse_nport_positions
+    from .generators import generate_filing, iter_portfolios, quarter_end
+
+    data = generate_filing(BENCHMARK_CIK, 'Benchmark Fund', '0009999999-24-000001', quarter_end(1),
+                           next(iter_portfolios(positions, 1)), 'NPORT-P')
+    return {
+        'stream': measure(lambda: parse_nport_positions(data), repeat, items=positions),
+        'beautifulsoup': measure(lambda: parse_nport_with_beautifulsoup(data), repeat, items=positions),
+    }
+
+
+def run_suite(suite: str, repeat: int, database_url: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Run all cases of a suite.
+
+    Args:
+        suite (str): The suite name, a key of SUITES.
+        repeat (int): Number of timed runs per case.
+        database_url (Optional[str]): A dedicated database instead of a temporary SQLite file.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The results keyed by case name, e.g. 'process_holdings_dataframe[10000x12]'.
+    """
+    app, temp_dir = create_benchmark_app(database_url)
+    work_dir = tempfile.mkdtemp(prefix='finalfinance-filings-')
+    results = {}
+    try:
+        with app.app_context():
+            for positions, _ in SUITES[suite]['ingest']:
+                for submission_type in ('13F-HR', 'NPORT-P'):
+                    name = f'extract_holdings_from_file[{submission_type}:{positions}]'
+                    print(f'Running {name}...', file=sys.stderr)
+                    results[name] = run_ingest_case(positions, submission_type, repeat, work_dir)
+
+            for positions, submissions in SUITES[suite]['process']:
+                print(f'Running processing cases [{positions}x{submissions}]...', file=sys.stderr)
+                for name, result in run_process_cases(positions, submissions, repeat).items():
+                    results[f'{name}[{positions}x{submissions}]'] = result
+
+            for funds, submissions, positions in SUITES[suite]['analytics']:
+                name = f'compute_fund_analytics[{funds}x{submissions}x{positions}]'
+                print(f'Running {name}...', file=sys.stderr)
+                results[name] = run_analytics_case(funds, submissions, positions, repeat)
+
+            for positions, in SUITES[suite]['nport']:
+                print(f'Running N-PORT parser cases [{positions}]...', file=sys.stderr)
+                for parser, result in run_nport_cases(positions, repeat).items():
+                    results[f'parse_nport_positions[{parser}:{positions}]'] = result
+
+            from FinalFinance.database import db
+            db.session.remove()
+            db.drop_all()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return results
+
+
+def get_environment(database_url: Optional[str]) -> Dict[str, str]:
+    """
+    Describe the machine and library versions the results were measured with.
+    """
+    import pandas
+    import sqlalchemy
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=BENCHMARKS_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = 'unknown'
+
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'pandas': pandas.__version__,
+        'sqlalchemy': sqlalchemy.__version__,
+        'database': (database_url or 'sqlite').split(':', 1)[0],
+    }
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+                          tolerance: float) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    A case regresses when its median latency or its peak memory exceeds the baseline by more than the tolerance.
+    Cases missing from either side are ignored.
+
+    Args:
+        results (Dict[str, Dict[str, Any]]): The current results.
+        baseline (Dict[str, Dict[str, Any]]): The baseline results.
+        tolerance (float): The allowed relative increase, e.g. 0.2 for 20%.
+
+    Returns:
+        List[str]: One message per regression.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        for metric in ('p50_ms', 'peak_memory_mib'):
+            previous, current = baseline[name].get(metric), result.get(metric)
+            if not previous or current is None:
+                continue
+            change = current / previous - 1
+            if change > tolerance:
+                regressions.append(f'{name} {metric}: {previous:.2f} -> {current:.2f} ({change:+.0%})')
+    return regressions
+
+
+def print_report(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]]) -> None:
+    """
+    Print the results as a table, with the change of the median latency against the baseline.
+    """
+    print(f"{'case':<62} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'items/s':>12} {'peak MiB':>9} "
+          f"{'vs base':>8}")
+    for name, result in results.items():
+        change = ''
+        if baseline and baseline.get(name, {}).get('p50_ms'):
+            change = f"{result['p50_ms'] / baseline[name]['p50_ms'] - 1:+.0%}"
+        print(f"{name:<62} {result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f} {result['p99_ms']:>10.1f} "
+              f"{result['throughput_per_s']:>12.0f} {result['peak_memory_mib']:>9.1f} {change:>8}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the ingestion and holdings-processing hot paths.')
+    parser.add_argument('--suite', choices=sorted(SUITES), default='quick', help='Set of cases to run.')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case.')
+    parser.add_argument('--database-url', default=None,
+                        help='Dedicated scratch database (all tables are dropped). Defaults to a temporary SQLite file.')
+    parser.add_argument('--output', default=None, help='Where to write the results JSON.')
+    parser.add_argument('--baseline', default=None, help='Results JSON to compare with.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression (0.2 = 20%%).')
+    parser.add_argument('--save-baseline', action='store_true', help=f'Also write the results to {DEFAULT_BASELINE}.')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.suite, args.repeat, args.database_url)
+    report = {
+        'suite': args.suite,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': get_environment(args.database_url),
+        'results': results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{args.suite}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+    if args.save_baseline:
+        shutil.copyfile(output, DEFAULT_BASELINE)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+
+    print_report(results, baseline)
+    print(f'\nResults written to {output}')
+
+    if baseline is not None:
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
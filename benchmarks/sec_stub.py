@@ -0,0 +1,199 @@
+import json
+import re
+import threading
+import time
+from datetime import date, timedelta
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from html import escape
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .generators import accession_number_for, generate_filing, iter_portfolios
+
+
+class SecStub:
+    """
+    Local stand-in for the SEC Edgar endpoints the application calls.
+
+    It serves the "getcurrent" Atom feeds, the per-CIK submissions index, complete submission text files and the
+    CIK lookup list, all generated from the synthetic portfolios in `generators`. Point the application at it with
+    the SEC_URL and SEC_DATA_URL settings.
+
+    Attributes:
+        funds (Dict[str, str]): Fund names keyed by the CIKs the stub has filings for.
+        positions (int): Number of positions in every filing.
+        filings_per_fund (int): Number of quarterly 13F-HR filings of every fund, the newest for 2024 Q1.
+        latency (float): Seconds every response is delayed, to imitate the round trip to the SEC.
+        requests_served (Dict[str, int]): Number of responses per endpoint.
+    """
+
+    def __init__(self, funds: Dict[str, str], positions: int = 500, filings_per_fund: int = 4,
+                 latency: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        self.funds = funds
+        self.positions = positions
+        self.filings_per_fund = filings_per_fund
+        self.latency = latency
+        self.requests_served: Dict[str, int] = {}
+        self._filings: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        The base URL of the stand-in, used for both SEC_URL and SEC_DATA_URL.
+        """
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'SecStub':
+        """
+        Serve requests in a background thread.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, name='sec-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop serving and close the socket.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def fund_filings(self, cik: str) -> List[Tuple[str, date]]:
+        """
+        List the accession number and period of report of a fund's filings, newest first.
+        """
+        filings = []
+        for sequence in range(self.filings_per_fund):
+            quarters_back = self.filings_per_fund - 1 - sequence
+            year, quarter = divmod(2024 * 4 - quarters_back, 4)
+            month = quarter * 3 + 3
+            period_of_report = date(year, month, 30 if month in (6, 9) else 31)
+            filings.append((accession_number_for(cik, sequence), period_of_report))
+        return filings[::-1]
+
+    def filing_text(self, cik: str, accession_number: str) -> Optional[str]:
+        """
+        Render the complete submission text file of a filing, generated once and then cached.
+        """
+        with self._lock:
+            if accession_number in self._filings:
+                return self._filings[accession_number]
+
+            filings = self.fund_filings(cik)[::-1]
+            portfolios = list(iter_portfolios(self.positions, len(filings), seed=int(cik)))
+            for (filing_accession_number, period_of_report), portfolio in zip(filings, portfolios):
+                self._filings[filing_accession_number] = generate_filing(cik, self.funds[cik],
+                                                                         filing_accession_number,
+                                                                         period_of_report, portfolio)
+            return self._filings.get(accession_number)
+
+    def submissions_index(self, cik: str) -> Dict[str, object]:
+        """
+        Build the submissions index document of a fund.
+        """
+        filings = self.fund_filings(cik)
+        return {
+            'cik': cik.lstrip('0'),
+            'name': self.funds[cik],
+            'filings': {
+                'recent': {
+                    'accessionNumber': [accession_number for accession_number, _ in filings],
+                    'filingDate': [(period + timedelta(days=45)).isoformat() for _, period in filings],
+                    'reportDate': [period.isoformat() for _, period in filings],
+                    'form': ['13F-HR'] * len(filings),
+                    'primaryDocument': ['primary_doc.xml'] * len(filings),
+                },
+                'files': [],
+            },
+        }
+
+    def atom_feed(self, filing_type: str, count: int) -> str:
+        """
+        Build a "getcurrent" Atom feed with the newest filing of every fund.
+        """
+        entries = []
+        for cik, fund_name in list(self.funds.items())[:count]:
+            accession_number, period = self.fund_filings(cik)[0]
+            filed = period + timedelta(days=45)
+            summary = escape(f'<b>Filed:</b> {filed.isoformat()} <b>AccNo:</b> {accession_number} <b>Size:</b> 1 MB')
+            entries.append(f'<entry><title>{filing_type.upper()} - {escape(fund_name)} ({cik}) (Filer)</title>'
+                           f'<summary type="html">{summary}</summary>'
+                           f'<updated>{filed.isoformat()}T16:00:00-04:00</updated>'
+                           f'<id>urn:tag:sec.gov,2008:accession-number={accession_number}</id></entry>')
+        return ('<?xml version="1.0" encoding="ISO-8859-1" ?><feed xmlns="http://www.w3.org/2005/Atom">'
+                f'<title>Latest Filings</title>{"".join(entries)}</feed>')
+
+    def _count(self, endpoint: str) -> None:
+        with self._lock:
+            self.requests_served[endpoint] = self.requests_served.get(endpoint, 0) + 1
+
+    def _handler_class(self) -> type:
+        stub = self
+        # Feeds are static for the lifetime of the stand-in, so one validator is enough
+        etag = f'"{int(time.time())}"'
+        last_modified = formatdate(usegmt=True)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+            def send_body(self, body: str, content_type: str, status: int = 200, headers: Optional[Dict] = None):
+                payload = body.encode('latin-1', errors='replace')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self) -> None:
+                if stub.latency:
+                    time.sleep(stub.latency)
+                url = urlparse(self.path)
+
+                if url.path == '/cgi-bin/browse-edgar':
+                    stub._count('rss')
+                    if self.headers.get('If-None-Match') == etag:
+                        self.send_response(304)
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    query = parse_qs(url.query)
+                    feed = stub.atom_feed(query.get('type', ['13f-hr'])[0], int(query.get('count', ['20'])[0]))
+                    self.send_body(feed, 'application/atom+xml',
+                                   headers={'ETag': etag, 'Last-Modified': last_modified})
+                    return
+
+                match = re.fullmatch(r'/submissions/CIK(\d{10})\.json', url.path)
+                if match and match.group(1) in stub.funds:
+                    stub._count('submissions')
+                    self.send_body(json.dumps(stub.submissions_index(match.group(1))), 'application/json')
+                    return
+
+                match = re.fullmatch(r'/Archives/edgar/data/(\d+)/\d+/([\d-]+)\.txt', url.path)
+                if match:
+                    cik = match.group(1).zfill(10)
+                    text = stub.filing_text(cik, match.group(2)) if cik in stub.funds else None
+                    if text:
+                        stub._count('filing')
+                        self.send_body(text, 'text/plain')
+                        return
+
+                if url.path == '/Archives/edgar/cik-lookup-data.txt':
+                    stub._count('cik_lookup')
+                    self.send_body(''.join(f'{name}:{cik}:\n' for cik, name in stub.funds.items()), 'text/plain')
+                    return
+
+                stub._count('not_found')
+                self.send_body('Not Found', 'text/plain', status=404)
+
+        return Handler
@@ -0,0 +1,100 @@
+"""
+Startup-time benchmark: how long a fresh process needs to import the package and create the application.
+
+Usage:
+    python -m benchmarks.startup --repeat 10
+    python -m benchmarks.startup --baseline benchmarks/results/startup-before.json
+
+Every sample runs in a new interpreter, so nothing is cached in sys.modules. The same JSON layout as
+run_benchmarks is written, so results can be compared with a baseline in the same way.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from .run_benchmarks import RESULTS_DIR, compare_with_baseline, get_environment, percentile
+
+# Runs in the child process and prints the timings of its phases as JSON
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import FinalFinance
+imported = time.perf_counter()
+app = FinalFinance.create_app('testing')
+created = time.perf_counter()
+client = app.test_client()
+client.get('/about')
+served = time.perf_counter()
+heavy = sorted(name for name in ('pandas', 'matplotlib', 'yfinance', 'bs4', 'sec_edgar_downloader', 'feedparser',
+                                 'openpyxl', 'alembic') if name in sys.modules)
+print(json.dumps({'import': imported - start, 'create_app': created - imported,
+                  'first_request': served - created, 'total': served - start, 'heavy_modules': heavy}))
+"""
+
+
+def sample(database_url: str) -> Dict[str, object]:
+    """
+    Measure one cold start in a new interpreter.
+    """
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, 'TEST_DATABASE_URL': database_url, 'PYTHONDONTWRITEBYTECODE': '1'}
+    output = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, check=True, env=env,
+                            cwd=project_dir).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Measure the cold start of the application.')
+    parser.add_argument('--repeat', type=int, default=10, help='Number of fresh interpreters.')
+    parser.add_argument('--output', default=None, help='Where to write the results JSON.')
+    parser.add_argument('--baseline', default=None, help='Results JSON to compare with.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression (0.2 = 20%%).')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='finalfinance-startup-') as temp_dir:
+        database_url = f"sqlite:///{os.path.join(temp_dir, 'startup.db')}"
+        # The first run compiles byte code and warms the file system cache
+        sample(database_url)
+        samples = [sample(database_url) for _ in range(args.repeat)]
+
+    results = {}
+    for phase in ('import', 'create_app', 'first_request', 'total'):
+        durations = [result[phase] for result in samples]
+        results[f'startup[{phase}]'] = {
+            'repeat': args.repeat,
+            'p50_ms': percentile(durations, 50) * 1000,
+            'p95_ms': percentile(durations, 95) * 1000,
+            'p99_ms': percentile(durations, 99) * 1000,
+            'mean_ms': sum(durations) / len(durations) * 1000,
+        }
+
+    print(f"{'phase':<26} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, result in results.items():
+        print(f"{name:<26} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f}")
+    print(f"Heavy modules loaded after the first request: {', '.join(samples[-1]['heavy_modules']) or 'none'}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump({'suite': 'startup', 'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                   'environment': get_environment(None), 'heavy_modules': samples[-1]['heavy_modules'],
+                   'results': results}, file, indent=2)
+    print(f'\nResults written to {output}')
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare_with_baseline(results, json.load(file)['results'], args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Gunicorn settings for serving the application in production: `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+Every value can be overridden with an environment variable of the same name prefixed with GUNICORN_.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Requests mostly wait on the database and the SEC, so each process runs several threads
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import the application once in the master, so workers start faster and share memory pages
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Ingesting a fund on its first visit downloads several filings
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Restart workers periodically to bound the growth of caches and fragmented memory
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+
+
+def post_fork(server, worker):
+    """
+    Drop the database connections inherited from the master process.
+
+    With preload_app the master may already have connected, e.g. to create tables with AUTO_CREATE_TABLES.
+    A connection shared between processes corrupts the protocol state, so every worker starts with an empty pool.
+    """
+    from FinalFinance.database import db
+
+    flask_app = server.app.wsgi()
+    with flask_app.app_context():
+        # The primary and, if configured, the read replica
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,27 @@
+"""add amendment columns to submission
+
+Revision ID: 0b7207e48154
+Revises: ae3c3fc356a4
+Create Date: 2026-10-19 02:05:12.418306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7207e48154'
+down_revision = 'ae3c3fc356a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing submissions are original filings or amendments stored in full
+    op.add_column('submission', sa.Column('amendment_type', sa.String(length=20), nullable=True))
+    op.add_column('submission', sa.Column('base_accession_number', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    op.drop_column('submission', 'base_accession_number')
+    op.drop_column('submission', 'amendment_type')
@@ -0,0 +1,29 @@
+"""add N-PORT fields to fund_holdings
+
+Revision ID: 3f9d2c7a1b64
+Revises: 0b7207e48154
+Create Date: 2026-10-19 14:02:11.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9d2c7a1b64'
+down_revision = '0b7207e48154'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Adding the columns to the partitioned parent adds them to every partition
+    op.add_column('fund_holdings', sa.Column('asset_category', sa.String(length=10), nullable=True))
+    op.add_column('fund_holdings', sa.Column('issuer_lei', sa.String(length=20), nullable=True))
+    op.add_column('fund_holdings', sa.Column('pct_of_net_assets', sa.Float(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('fund_holdings', 'pct_of_net_assets')
+    op.drop_column('fund_holdings', 'issuer_lei')
+    op.drop_column('fund_holdings', 'asset_category')
@@ -0,0 +1,83 @@
+"""partition fund_holdings by reporting period
+
+Revision ID: 5b2f8c41d7e3
+Revises: 1ece567eab1d
+Create Date: 2026-10-19 02:10:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2f8c41d7e3'
+down_revision = '1ece567eab1d'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'id, company_name, value_usd, share_amount, cusip, cik, accession_number, period_of_portfolio, fund_data_id'
+
+# Same naming as FinalFinance.partitions.holdings_partition_name
+PERIOD_PATTERN = re.compile(r'^(\d{4}) Q([1-4])$')
+
+
+def create_holdings_table(primary_key, **kwargs):
+    op.create_table('fund_holdings',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('company_name', sa.String(length=200), nullable=False),
+    sa.Column('value_usd', sa.Float(), nullable=False),
+    sa.Column('share_amount', sa.Float(), nullable=False),
+    sa.Column('cusip', sa.String(length=9), nullable=False),
+    sa.Column('cik', sa.String(length=10), nullable=False),
+    sa.Column('accession_number', sa.String(length=20), nullable=False),
+    sa.Column('period_of_portfolio', sa.String(length=50), nullable=False),
+    sa.Column('fund_data_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['fund_data_id'], ['fund_data.id'], ),
+    sa.PrimaryKeyConstraint(*primary_key),
+    **kwargs
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+    postgresql = bind.dialect.name == 'postgresql'
+
+    op.rename_table('fund_holdings', 'fund_holdings_unpartitioned')
+    if postgresql:
+        # The primary key index keeps its name after the rename and would clash with the new table's
+        op.execute('ALTER TABLE fund_holdings_unpartitioned '
+                   'RENAME CONSTRAINT fund_holdings_pkey TO fund_holdings_unpartitioned_pkey')
+
+    # A partitioned table's primary key must contain the partition key
+    create_holdings_table(['id', 'period_of_portfolio'], postgresql_partition_by='LIST (period_of_portfolio)')
+
+    if postgresql:
+        op.execute('CREATE TABLE fund_holdings_default PARTITION OF fund_holdings DEFAULT')
+        periods = bind.execute(sa.text('SELECT DISTINCT period_of_portfolio FROM fund_holdings_unpartitioned'))
+        for period in periods.scalars():
+            match = PERIOD_PATTERN.match(period)
+            if match:
+                op.execute(f"CREATE TABLE fund_holdings_{match.group(1)}_q{match.group(2)} "
+                           f"PARTITION OF fund_holdings FOR VALUES IN ('{period}')")
+
+    op.execute(f'INSERT INTO fund_holdings ({COLUMNS}) SELECT {COLUMNS} FROM fund_holdings_unpartitioned')
+    op.drop_table('fund_holdings_unpartitioned')
+    op.create_index(op.f('ix_fund_holdings_accession_number'), 'fund_holdings', ['accession_number'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    postgresql = bind.dialect.name == 'postgresql'
+
+    op.drop_index(op.f('ix_fund_holdings_accession_number'), table_name='fund_holdings')
+    op.rename_table('fund_holdings', 'fund_holdings_partitioned')
+    if postgresql:
+        op.execute('ALTER TABLE fund_holdings_partitioned '
+                   'RENAME CONSTRAINT fund_holdings_pkey TO fund_holdings_partitioned_pkey')
+
+    create_holdings_table(['id'])
+    op.execute(f'INSERT INTO fund_holdings ({COLUMNS}) SELECT {COLUMNS} FROM fund_holdings_partitioned')
+    # Dropping the parent drops its partitions as well
+    op.drop_table('fund_holdings_partitioned')
@@ -0,0 +1,24 @@
+"""add submission cik filed_of_date index
+
+Revision ID: ae3c3fc356a4
+Revises: df010931f48e
+Create Date: 2026-10-19 01:45:00.082251
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ae3c3fc356a4'
+down_revision = 'df010931f48e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_submission_cik_filed_of_date', 'submission', ['cik', 'filed_of_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_submission_cik_filed_of_date', table_name='submission')
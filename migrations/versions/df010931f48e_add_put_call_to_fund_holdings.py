@@ -0,0 +1,25 @@
+"""add put_call to fund_holdings
+
+Revision ID: df010931f48e
+Revises: ac53f80fc8e4
+Create Date: 2026-10-19 01:23:45.930510
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'df010931f48e'
+down_revision = 'ac53f80fc8e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Adding the column to the partitioned parent adds it to every partition
+    op.add_column('fund_holdings', sa.Column('put_call', sa.String(length=4), nullable=True))
+
+
+def downgrade():
+    op.drop_column('fund_holdings', 'put_call')
@@ -4,5 +4,6 @@ from FinalFinance import create_app
 app = create_app()
 
 if __name__ == '__main__':
-    # Run the app in debug mode, accessible from any host
-    app.run(debug=True, host="0.0.0.0")
+    # Development server, accessible from any host; debug mode follows the configuration (FLASK_ENV).
+    # In production serve wsgi:app with gunicorn instead (see gunicorn.conf.py).
+    app.run(debug=app.config['DEBUG'], host="0.0.0.0")
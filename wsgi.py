@@ -0,0 +1,6 @@
+import os
+
+from FinalFinance import create_app
+
+# WSGI entry point for production servers, e.g. `gunicorn -c gunicorn.conf.py wsgi:app`
+app = create_app(os.environ.get('FLASK_ENV', 'production'))